@@ -1,21 +1,51 @@
 from django.contrib import admin
 
-from .models import Choice, Politician, Question
+from .changelist import EstimatedCountPaginator, KeysetChangeList, PeriodQuerySet
+from .models import Choice, Politician, Question, TestSubmission
+
+
+class ChoiceInline(admin.TabularInline):
+    model = Choice
+    fields = ("label", "text", "delta")
+    extra = 0
 
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ("order", "text")
+    list_display = ("order", "text", "axis", "weight")
+    list_filter = ("axis",)
     ordering = ("order",)
+    inlines = (ChoiceInline,)
 
 
 @admin.register(Choice)
 class ChoiceAdmin(admin.ModelAdmin):
-    list_display = ("question", "label", "text")
+    list_display = ("question", "label", "text", "delta")
     list_filter = ("question",)
+    list_select_related = ("question",)
 
 
 @admin.register(Politician)
 class PoliticianAdmin(admin.ModelAdmin):
     list_display = ("name", "x", "y")
     search_fields = ("name",)
+
+
+@admin.register(TestSubmission)
+class TestSubmissionAdmin(admin.ModelAdmin):
+    """Submissions, newest first; see ``changelist.py`` for why each page costs
+    the same few queries at any table size."""
+
+    list_display = ("id", "created_at", "answers_code", "x", "y")
+    date_hierarchy = "created_at"
+    ordering = ("-created_at", "-id")
+    sortable_by = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return PeriodQuerySet(queryset.model, queryset.query, using=queryset.db)
@@ -0,0 +1,207 @@
+"""Admission control for expensive views (``politics:score`` by default).
+
+``AdmissionMiddleware`` (see ``middleware.py``) asks ``admit`` before one of
+``POLITICS_ADMISSION_VIEWS`` runs. The request is turned away at once, with
+the ``result_busy.html`` fragment, when
+
+* it waited in the server's queue longer than
+  ``POLITICS_ADMISSION_MAX_QUEUE_WAIT`` seconds (503), measured from the
+  ``X-Request-Start: t=<seconds>`` header nginx adds;
+* this process already runs ``POLITICS_ADMISSION_MAX_INFLIGHT`` of those
+  views (503);
+* the client has used up its token bucket, refilled at
+  ``POLITICS_ADMISSION_RATE`` requests per second up to
+  ``POLITICS_ADMISSION_BURST`` (429). Clients are told apart by the last
+  ``X-Forwarded-For`` address, which nginx appends, or ``REMOTE_ADDR``.
+
+A zero setting switches that check off. All state is per process, so the
+effective limits scale with the number of workers. Other views never wait
+for a slot, which keeps the pages fast while scoring is saturated; their
+queue wait is still recorded.
+"""
+
+import collections
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.template.loader import render_to_string
+
+from . import metrics
+
+BUSY_TEMPLATE = "politics/partials/result_busy.html"
+
+
+class TokenBuckets:
+    """Bounded LRU of per-client token buckets."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "collections.OrderedDict[str, list]" = collections.OrderedDict()
+
+    def take(self, client: str, now: float) -> float:
+        """Take a token; return 0 on success, otherwise the seconds until one
+        is available. Not thread-safe."""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [self.burst, now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+
+class AdmissionController:
+    """In-flight, queue wait and per-client limits of one process."""
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queue_wait: float,
+        rate: float,
+        burst: float,
+        retry_after: int,
+    ):
+        self.max_inflight = max_inflight
+        self.max_queue_wait = max_queue_wait
+        self.retry_after = retry_after
+        self.buckets = TokenBuckets(rate, burst) if rate > 0 else None
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def acquire(
+        self, client: str, queue_wait: Optional[float], now: Optional[float] = None
+    ) -> Tuple[Optional[str], float]:
+        """Admit a request, or return why not and when to retry."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            if (
+                self.max_queue_wait > 0
+                and queue_wait is not None
+                and queue_wait > self.max_queue_wait
+            ):
+                return "queue_timeout", self.retry_after
+            if self.max_inflight > 0 and self.inflight >= self.max_inflight:
+                return "overloaded", self.retry_after
+            if self.buckets is not None:
+                delay = self.buckets.take(client, now)
+                if delay:
+                    return "rate_limited", delay
+            self.inflight += 1
+            return None, 0.0
+
+    def release(self) -> None:
+        with self._lock:
+            self.inflight -= 1
+
+
+def _limits() -> tuple:
+    return (
+        settings.POLITICS_ADMISSION_MAX_INFLIGHT,
+        settings.POLITICS_ADMISSION_MAX_QUEUE_WAIT,
+        settings.POLITICS_ADMISSION_RATE,
+        settings.POLITICS_ADMISSION_BURST,
+        settings.POLITICS_ADMISSION_RETRY_AFTER,
+    )
+
+
+_controller: Optional[AdmissionController] = None
+_controller_key: Optional[tuple] = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> AdmissionController:
+    """This process's controller; a fork or changed settings start a new one."""
+    global _controller, _controller_key
+    key = (os.getpid(), _limits())
+    if _controller_key != key:
+        with _controller_lock:
+            if _controller_key != key:
+                _controller = AdmissionController(*key[1])
+                _controller_key = key
+    return _controller
+
+
+def limits() -> Dict[str, float]:
+    """The configured limits, by the name they are exported under."""
+    max_inflight, max_queue_wait, rate, burst, retry_after = _limits()
+    return {
+        "max_inflight": max_inflight,
+        "max_queue_wait_seconds": max_queue_wait,
+        "rate": rate,
+        "burst": burst,
+        "retry_after_seconds": retry_after,
+    }
+
+
+def queue_wait(request: HttpRequest) -> Optional[float]:
+    """Seconds since the proxy received the request, from ``X-Request-Start``."""
+    header = request.META.get("HTTP_X_REQUEST_START", "")
+    try:
+        started = float(header[2:] if header.startswith("t=") else header)
+    except ValueError:
+        return None
+    return max(0.0, time.time() - started)
+
+
+def client_key(request: HttpRequest) -> str:
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if forwarded:
+        return forwarded.rsplit(",", 1)[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+_busy: Optional[bytes] = None
+
+
+def busy_response(status: int, retry_after: float) -> HttpResponse:
+    """The "try again" fragment, rendered once per process."""
+    global _busy
+    if _busy is None:
+        _busy = render_to_string(BUSY_TEMPLATE).encode()
+    response = HttpResponse(_busy, status=status)
+    seconds = max(1, math.ceil(retry_after))
+    response["Retry-After"] = str(seconds)
+    # Lets a cache in front answer repeats itself until the retry time.
+    response["Cache-Control"] = f"public, max-age={seconds}"
+    return response
+
+
+def admit(request: HttpRequest) -> Optional[HttpResponse]:
+    """Return a response that turns the request away, or None to go on."""
+    view = metrics.view_label(request)
+    wait = queue_wait(request)
+    if wait is not None:
+        metrics.registry.observe("politics_queue_wait_seconds", (("view", view),), wait)
+    if view not in settings.POLITICS_ADMISSION_VIEWS:
+        return None
+    controller = get_controller()
+    reason, retry_after = controller.acquire(client_key(request), wait)
+    if reason is None:
+        request.admission_controller = controller
+        metrics.registry.inc("politics_admission_admitted_total", (("view", view),))
+        return None
+    metrics.registry.inc(
+        "politics_admission_shed_total", (("view", view), ("reason", reason))
+    )
+    return busy_response(429 if reason == "rate_limited" else 503, retry_after)
+
+
+def release(request: HttpRequest) -> None:
+    controller = getattr(request, "admission_controller", None)
+    if controller is not None:
+        del request.admission_controller
+        controller.release()
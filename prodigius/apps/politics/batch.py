@@ -0,0 +1,143 @@
+"""Batch scoring for partner integrations (``politics:score_batch``).
+
+A partner POSTs many answer sets in one JSON body, with a bearer key from
+``POLITICS_API_KEYS``::
+
+    {"answers": [{"q1": "A", "q2": "Both"}, ...], "save": true}
+
+``parse_batch`` validates the body. ``score_batch`` scores every distinct
+answer pattern once with ``compute_coords_batch`` and looks up the nearest
+politicians once per distinct point, against one snapshot of the in-memory
+index. With ``"save": true``, ``save_batch`` inserts all the submissions with
+one ``bulk_create`` and adds them to the statistics in the same transaction;
+write-behind is not involved. ``result_stream`` then yields one NDJSON line
+per answer set, in request order.
+
+A batch holds at most ``POLITICS_API_MAX_ITEMS`` answer sets, and its body at
+most ``DATA_UPLOAD_MAX_MEMORY_SIZE`` bytes.
+"""
+
+import json
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from django.conf import settings
+from django.db import transaction
+
+from .export import chunked
+from .models import Politician, TestSubmission
+from .nearest import get_index
+from .stats import record_submissions
+from .utils import compute_coords_batch, encode_answers
+
+QUESTIONS = [f"q{i}" for i in range(1, 13)]
+
+
+class BatchError(ValueError):
+    """A batch that cannot be scored; ``status`` is the HTTP status for it."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Batch(NamedTuple):
+    answers: List[Dict[str, str]]
+    save: bool
+
+
+class Result(NamedTuple):
+    x: float
+    y: float
+    nearest: List[Politician]
+
+
+def parse_batch(body: bytes) -> Batch:
+    """Decode a request body; raise ``BatchError`` if it is malformed or holds
+    more than ``POLITICS_API_MAX_ITEMS`` answer sets."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise BatchError("Body is not valid JSON")
+    if not isinstance(data, dict) or not isinstance(data.get("answers"), list):
+        raise BatchError('Body must be an object with an "answers" list')
+    items = data["answers"]
+    limit = settings.POLITICS_API_MAX_ITEMS
+    if len(items) > limit:
+        raise BatchError(f"At most {limit} answer sets per request", status=413)
+    save = data.get("save", False)
+    if not isinstance(save, bool):
+        raise BatchError('"save" must be true or false')
+    return Batch([_clean(i, item) for i, item in enumerate(items)], save)
+
+
+def _clean(i: int, item) -> Dict[str, str]:
+    if not isinstance(item, dict):
+        raise BatchError(f"answers[{i}] is not an object")
+    for key, value in item.items():
+        if key not in QUESTIONS:
+            raise BatchError(f"answers[{i}] has an unknown question {key!r}")
+        if not isinstance(value, str):
+            raise BatchError(f"answers[{i}].{key} is not a string")
+    # Same shape as the form's answers: question order, blanks left out.
+    return {q: item[q] for q in QUESTIONS if item.get(q)}
+
+
+def score_batch(
+    answer_sets: Sequence[Dict[str, str]], k: Optional[int] = None
+) -> List[Result]:
+    """Coordinates and ``k`` nearest politicians (``POLITICS_NEAREST_K`` by
+    default) for each answer set."""
+    if k is None:
+        k = settings.POLITICS_NEAREST_K
+    index = get_index()
+    nearest = {}
+    results = []
+    for xy in compute_coords_batch(answer_sets):
+        found = nearest.get(xy)
+        if found is None:
+            found = nearest[xy] = index.nearest(*xy, k)
+        results.append(Result(*xy, found))
+    return results
+
+
+@transaction.atomic
+def save_batch(
+    answer_sets: Sequence[Dict[str, str]], results: Sequence[Result]
+) -> List[TestSubmission]:
+    """Insert one submission per answer set and count them in the statistics."""
+    submissions = [
+        TestSubmission(
+            answers=answers, answers_code=encode_answers(answers), x=r.x, y=r.y
+        )
+        for answers, r in zip(answer_sets, results)
+    ]
+    TestSubmission.objects.bulk_create(submissions)
+    record_submissions(submissions)
+    return submissions
+
+
+def result_lines(
+    results: Sequence[Result],
+    submissions: Optional[Sequence[TestSubmission]] = None,
+) -> Iterator[str]:
+    figures = {}
+    for i, (x, y, nearest) in enumerate(results):
+        line = {"index": i, "x": x, "y": y}
+        if submissions is not None:
+            line["id"] = submissions[i].pk
+        # Results at the same point share their list of politicians.
+        key = id(nearest)
+        if key not in figures:
+            figures[key] = [
+                {"id": p.pk, "name": p.name, "x": p.x, "y": p.y} for p in nearest
+            ]
+        line["nearest"] = figures[key]
+        yield json.dumps(line) + "\n"
+
+
+def result_stream(
+    results: Sequence[Result],
+    submissions: Optional[Sequence[TestSubmission]] = None,
+) -> Iterator[bytes]:
+    """NDJSON for ``results``, with each submission's ``id`` when saved."""
+    return chunked(result_lines(results, submissions))
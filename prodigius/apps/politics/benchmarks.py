@@ -0,0 +1,211 @@
+"""Micro-benchmarks for the scoring and ranking hot paths.
+
+``run_suite`` times
+
+* ``score_answer`` and ``compute_coords`` on random answers,
+* ``nearest_politicians`` (the lookup in ``ScoreView.post``) at several
+  roster sizes,
+* a full ``politics:score`` POST through the test client at several
+  submission table sizes (seeded up to that size; the timed posts add rows),
+
+against the current database, which it fills with seeded rows (and a
+twelve-question catalog if it has no questions); the ``benchmark`` command
+points it at a throwaway test database. Each result is
+the median time per operation over ``repeat`` rounds, and ``compare`` checks
+results against a saved baseline. ``BASELINE`` is the reference run that the
+``benchmark`` command compares against by default; its ``meta`` records the
+machine it came from.
+"""
+
+import os
+import platform
+import random
+import statistics
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Choice, Politician, Question, TestSubmission
+from .nearest import ROSTER_VERSION, nearest_politicians
+from .seeding import generate, insert_batch, load_distributions
+from .stats import StatsDelta
+from .utils import CATALOG_VERSION, CHOICES, compute_coords, score_answer
+from .versions import bump_version
+
+Results = Dict[str, Dict[str, float]]
+
+BASELINE = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+
+def measure(fn: Callable[[], object], number: int, repeat: int) -> Dict[str, float]:
+    """Call ``fn`` ``number`` times per round; report microseconds per call."""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "us_per_op": statistics.median(rounds),
+        "min_us": min(rounds),
+        "ops": number * repeat,
+    }
+
+
+def _answer_sets(rng: random.Random, count: int) -> List[Dict[str, str]]:
+    return [{f"q{i}": rng.choice(CHOICES) for i in range(1, 13)} for _ in range(count)]
+
+
+def _cycle(items: list) -> Callable[[], object]:
+    state = {"i": 0}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+
+    return next_item
+
+
+def _ensure_catalog() -> None:
+    """Twelve questions with A/B choices, alternating axes, so scoring has a
+    full table to work through; only the timings matter."""
+    if Question.objects.exists():
+        return
+    for order in range(1, 13):
+        question = Question.objects.create(
+            text=f"Q{order}?", order=order, axis="xy"[order % 2], weight=1.0
+        )
+        Choice.objects.bulk_create(
+            Choice(question=question, label=label, text=label, delta=delta)
+            for label, delta in (("A", -1.0), ("B", 1.0))
+        )
+    bump_version(CATALOG_VERSION)
+
+
+def _set_roster(size: int, rng: random.Random) -> None:
+    Politician.objects.all().delete()
+    Politician.objects.bulk_create(
+        Politician(name=f"P{i}", x=rng.uniform(-1, 1), y=rng.uniform(-1, 1), blurb="")
+        for i in range(size)
+    )
+    bump_version(ROSTER_VERSION)
+
+
+def _grow_submissions(target: int, rng: random.Random) -> None:
+    missing = target - TestSubmission.objects.count()
+    if missing <= 0:
+        return
+    delta = StatsDelta()
+    for batch in generate(
+        missing, rng, load_distributions(None), timezone.now(), 30, batch_size=5000
+    ):
+        insert_batch(batch, delta)
+    delta.apply()
+
+
+def run_suite(
+    rosters: Iterable[int],
+    submissions: Iterable[int],
+    repeat: int = 5,
+    seed: int = 0,
+    view_roster: Optional[int] = None,
+    log: Callable[[str], None] = lambda line: None,
+) -> Results:
+    rng = random.Random(seed)
+    _ensure_catalog()
+    answers = _answer_sets(rng, 1000)
+    results: Results = {}
+
+    def record(name: str, result: Dict[str, float]) -> None:
+        results[name] = result
+        log(f"{name:<32} {result['us_per_op']:>10.1f} us/op")
+
+    picks = [(int(q[1:]), choice) for a in answers[:100] for q, choice in a.items()]
+    next_pick = _cycle(picks)
+    record(
+        "score_answer",
+        measure(lambda: score_answer(*next_pick()), number=20000, repeat=repeat),
+    )
+    next_answers = _cycle(answers)
+    record(
+        "compute_coords",
+        measure(lambda: compute_coords(next_answers()), number=5000, repeat=repeat),
+    )
+
+    points = [(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(1000)]
+    next_point = _cycle(points)
+    rosters = list(rosters)
+    for size in rosters:
+        _set_roster(size, rng)
+        nearest_politicians(0.0, 0.0)  # build the index outside the timing
+        record(
+            f"nearest[roster={size}]",
+            measure(lambda: nearest_politicians(*next_point()), 2000, repeat),
+        )
+
+    _set_roster(view_roster or rosters[len(rosters) // 2], rng)
+    client = Client()
+    url = reverse("politics:score")
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        for size in submissions:
+            _grow_submissions(size, rng)
+            client.post(url, next_answers())  # warm caches
+            record(
+                f"score_view[submissions={size}]",
+                measure(lambda: client.post(url, next_answers()), 200, repeat),
+            )
+    return results
+
+
+def metadata(seed: int, repeat: int) -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+        "processor": _processor(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def _processor() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def _fastest(result: Dict[str, float]) -> float:
+    return result.get("min_us", result["us_per_op"])
+
+
+def compare(
+    results: Results, baseline: Results, threshold: float
+) -> List[Tuple[str, float, float, float]]:
+    """Benchmarks more than ``threshold`` (0.2 = 20%) slower than the baseline,
+    as ``(name, baseline_us, current_us, ratio)``. Names missing from either
+    side are ignored. The fastest round is compared, since it is the figure
+    least disturbed by other load on the machine."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, now = _fastest(baseline[name]), _fastest(result)
+        ratio = now / before if before else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append((name, before, now, ratio))
+    return regressions
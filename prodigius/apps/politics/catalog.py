@@ -0,0 +1,93 @@
+"""Cached question catalog for the quiz pages.
+
+The questions with their prefetched choices are kept in process memory and
+reused until the ``catalog`` version changes (saving or deleting a Question or
+Choice bumps it, see ``signals.py``). With ``POLITICS_CATALOG_CACHE`` naming a
+shared cache, a worker whose copy is stale loads the list from that cache
+before falling back to the database.
+
+``catalog_etag`` turns the version into the validator the quiz pages send for
+conditional GETs.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from typing import List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Question
+from .utils import CATALOG_VERSION
+from .versions import get_version
+
+CACHE_KEY = "politics:catalog:{}"
+CACHE_TIMEOUT = 24 * 60 * 60
+
+_lock = threading.Lock()
+_catalog: Tuple[Optional[str], List[Question]] = (None, [])
+
+
+def catalog_version() -> str:
+    return get_version(CATALOG_VERSION)
+
+
+def catalog_etag(request=None, *args, **kwargs) -> str:
+    """ETag for pages rendered only from the catalog.
+
+    Combines the catalog version with the release so a deploy that changes
+    templates does not answer 304 for pages built by the old code. Takes the
+    view arguments so it can be passed to ``condition`` directly, and uses the
+    version already read into ``request.catalog_version`` if there is one.
+    """
+    version = getattr(request, "catalog_version", None) or catalog_version()
+    return f"{version}-{_release()}"
+
+
+@functools.lru_cache(maxsize=None)
+def _release() -> str:
+    """``POLITICS_RELEASE``, or a fingerprint of the app's templates."""
+    if settings.POLITICS_RELEASE:
+        return settings.POLITICS_RELEASE
+    digest = hashlib.sha1()
+    root = os.path.join(apps.get_app_config("politics").path, "templates")
+    for dirpath, dirnames, filenames in sorted(os.walk(root)):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            digest.update(
+                f"{os.path.relpath(path, root)}:{os.path.getmtime(path)}".encode()
+            )
+    return digest.hexdigest()[:12]
+
+
+def get_catalog() -> List[Question]:
+    """Return all questions in order, each with its choices prefetched.
+
+    The list and its instances are shared between requests; treat them as
+    read-only.
+    """
+    global _catalog
+    version = catalog_version()
+    if _catalog[0] != version:
+        with _lock:
+            if _catalog[0] != version:
+                _catalog = (version, _load(version))
+    return _catalog[1]
+
+
+def _load(version: str) -> List[Question]:
+    alias = settings.POLITICS_CATALOG_CACHE
+    shared = caches[alias] if alias else None
+    key = CACHE_KEY.format(version)
+    if shared is not None:
+        questions = shared.get(key)
+        if questions is not None:
+            return questions
+    questions = list(Question.objects.prefetch_related("choices"))
+    if shared is not None:
+        shared.set(key, questions, CACHE_TIMEOUT)
+    return questions
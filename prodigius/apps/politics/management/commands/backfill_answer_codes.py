@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.politics.models import TestSubmission
+from apps.politics.utils import encode_answers
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill TestSubmission.answers_code for rows that do not have it yet. "
+        "Rows are streamed in chunks so memory use stays constant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        rows = (
+            TestSubmission.objects.filter(answers_code__isnull=True)
+            .only("id", "answers")
+            .order_by("pk")
+            .iterator(chunk_size=chunk_size)
+        )
+
+        self.processed = self.updated = 0
+        self.started = time.monotonic()
+        chunk = []
+        for sub in rows:
+            chunk.append(sub)
+            if len(chunk) >= chunk_size:
+                self.backfill(chunk)
+                chunk = []
+        if chunk:
+            self.backfill(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {self.processed} rows scanned, {self.updated} encoded, "
+                f"{self.processed - self.updated} cannot be packed, "
+                f"in {time.monotonic() - self.started:.1f}s."
+            )
+        )
+
+    def backfill(self, chunk):
+        changed = []
+        for sub in chunk:
+            sub.answers_code = encode_answers(sub.answers)
+            if sub.answers_code is not None:
+                changed.append(sub)
+        if changed:
+            TestSubmission.objects.bulk_update(changed, ["answers_code"])
+
+        self.processed += len(chunk)
+        self.updated += len(changed)
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{self.processed} rows scanned, {self.updated} encoded "
+            f"({rate:,.0f} rows/s)"
+        )
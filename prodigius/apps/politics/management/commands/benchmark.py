@@ -0,0 +1,114 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.politics.benchmarks import BASELINE, compare, metadata, run_suite
+
+
+def _sizes(value):
+    return [int(s) for s in value.split(",") if s]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the scoring and ranking micro-benchmarks in a throwaway test "
+        "database, optionally save the results as JSON, and fail if any "
+        "benchmark is slower than the baseline (by default the committed "
+        "reference run) by more than --threshold."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rosters", type=_sizes, default="10,100,1000,10000")
+        parser.add_argument("--submissions", type=_sizes, default="0,10000,100000")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", "-o", help="Write results to this JSON file.")
+        parser.add_argument(
+            "--baseline",
+            default=BASELINE,
+            help="JSON results to compare against (default: the reference run "
+            "in apps/politics/benchmark_baseline.json).",
+        )
+        parser.add_argument(
+            "--no-baseline",
+            action="store_const",
+            const=None,
+            dest="baseline",
+            help="Do not compare against any baseline.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.5,
+            help="Allowed slowdown against the baseline (1.5 = 150%%).",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as f:
+                    saved = json.load(f)
+                baseline = saved["results"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+            self._describe_baseline(saved.get("meta", {}))
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = run_suite(
+                options["rosters"],
+                options["submissions"],
+                repeat=options["repeat"],
+                seed=options["seed"],
+                log=self.stdout.write,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(
+                    {
+                        "meta": metadata(options["seed"], options["repeat"]),
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options["threshold"])
+            for name, before, now, ratio in regressions:
+                self.stderr.write(
+                    f"{name}: {before:.1f} -> {now:.1f} us/op ({ratio:.2f}x)"
+                )
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} benchmark(s) slower than the baseline by "
+                    f"more than {options['threshold']:.0%}."
+                )
+            self.stdout.write(
+                self.style.SUCCESS("No regressions against the baseline.")
+            )
+
+    def _describe_baseline(self, meta):
+        current = metadata(0, 0)
+        self.stdout.write(
+            f"Baseline: {meta.get('processor', '?')} ({meta.get('cpus', '?')} CPUs), "
+            f"{meta.get('database', '?')}, {meta.get('created', '?')}"
+        )
+        differs = [
+            key
+            for key in ("processor", "cpus", "database")
+            if key in meta and meta[key] != current[key]
+        ]
+        if differs:
+            self.stderr.write(
+                f"Warning: the baseline comes from a different {', '.join(differs)}; "
+                "save a baseline on this machine with -o and pass it with "
+                "--baseline."
+            )
@@ -0,0 +1,100 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.politics.loadgen import drive, percentile, run_server, score_task
+
+# Environment for the gunicorn run of each mode, see DATABASES in settings.
+MODES = {
+    "fresh": {"SQL_POOL": "false", "SQL_CONN_MAX_AGE": "0"},
+    "persistent": {"SQL_POOL": "false", "SQL_CONN_MAX_AGE": "60"},
+    "pooled": {"SQL_POOL": "true"},
+}
+
+
+def sessions() -> int:
+    """Connections the database has accepted so far (PostgreSQL 14+)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(
+            "SELECT sessions FROM pg_stat_database WHERE datname = current_database()"
+        )
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn against the configured PostgreSQL database with a new "
+        "connection per request, persistent connections and a connection "
+        "pool, post random answer sets to politics:score from concurrent "
+        "clients and compare throughput, latency and connections opened."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default=",".join(MODES))
+        parser.add_argument("--server-mode", choices=("wsgi", "asgi"), default="wsgi")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--warmup", type=float, default=2.0)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql" or os.environ.get("DATABASE_URL"):
+            raise CommandError(
+                "Needs PostgreSQL configured through the SQL_* variables "
+                "(DATABASE_URL must not be set)."
+            )
+        modes = options["modes"].split(",")
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+        rows = []
+        for mode in modes:
+            self.stdout.write(f"Running {mode} connections...")
+            run = [options["port"], score_task, options["concurrency"]]
+            try:
+                with run_server(
+                    options["server_mode"],
+                    options["workers"],
+                    options["port"],
+                    MODES[mode],
+                ):
+                    drive(*run, options["warmup"], options["seed"])
+                    before = sessions()
+                    latencies, errors = drive(
+                        *run, options["duration"], options["seed"]
+                    )
+                    # Count connections opened during the run only, not the
+                    # ones the pool keeps open at exit.
+                    time.sleep(1.0)
+                    opened = sessions() - before
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            latencies.sort()
+            requests = len(latencies) + errors
+            rows.append(
+                (
+                    mode,
+                    len(latencies),
+                    errors,
+                    len(latencies) / options["duration"],
+                    percentile(latencies, 50) * 1000,
+                    percentile(latencies, 99) * 1000,
+                    opened / requests if requests else 0.0,
+                )
+            )
+
+        self.stdout.write(
+            f"{'mode':<11} {'requests':>9} {'errors':>7} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'conn/req':>9}"
+        )
+        for mode, count, errors, rps, p50, p99, per_request in rows:
+            self.stdout.write(
+                f"{mode:<11} {count:>9} {errors:>7} {rps:>8.1f} {p50:>8.1f} "
+                f"{p99:>8.1f} {per_request:>9.3f}"
+            )
@@ -0,0 +1,60 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.politics.models import Politician
+from apps.politics.nearest import PoliticianIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the nearest-politician lookup against a full sort of the roster "
+        "for several synthetic roster sizes. Does not touch the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="10,100,1000,10000,100000",
+            help="Comma separated roster sizes.",
+        )
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("-k", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        k = options["k"]
+        queries = [
+            (rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(options["queries"])
+        ]
+        self.stdout.write(
+            f"{'roster':>8} {'build ms':>10} {'index us/q':>12} {'sort us/q':>12}"
+        )
+        for size in (int(s) for s in options["sizes"].split(",")):
+            roster = [
+                Politician(pk=i, x=rng.uniform(-1, 1), y=rng.uniform(-1, 1))
+                for i in range(1, size + 1)
+            ]
+
+            start = time.perf_counter()
+            index = PoliticianIndex(roster)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for x, y in queries:
+                index.nearest(x, y, k)
+            index_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+            # The full sort is O(n log n) per query, so sample fewer queries.
+            sample = queries[: max(1, min(len(queries), 200_000 // size))]
+            start = time.perf_counter()
+            for x, y in sample:
+                sorted(roster, key=lambda p: math.hypot(p.x - x, p.y - y))[:k]
+            sort_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+            self.stdout.write(
+                f"{size:>8} {build_ms:>10.1f} {index_us:>12.1f} {sort_us:>12.1f}"
+            )
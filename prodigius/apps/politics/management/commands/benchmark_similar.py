@@ -0,0 +1,72 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.politics.seeding import load_distributions, synthetic_patterns
+from apps.politics.similar import PatternIndex, distance
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the similar-answers search against a scan of every answer pattern "
+        "for several synthetic submission counts, drawn like seed_submissions "
+        "draws them. Does not touch the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000000,10000000,50000000",
+            help="Comma separated numbers of submissions.",
+        )
+        parser.add_argument(
+            "--distances", default="1,2,3", help="Comma separated values of k."
+        )
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--distributions", help="JSON file, as seed_submissions.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            distributions = load_distributions(options["distributions"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        rng = random.Random(options["seed"])
+        distances = [int(k) for k in options["distances"].split(",")]
+        queries, _ = synthetic_patterns(options["queries"], rng, distributions)
+        queries = list(queries)
+        rng.shuffle(queries)
+
+        self.stdout.write(
+            f"{'submissions':>11} {'patterns':>10} {'MiB':>6} {'build s':>8} "
+            f"{'scan ms/q':>10} {'k':>2} {'us/q':>8} {'p99 us':>8} {'matched':>9}"
+        )
+        for size in (int(s) for s in options["sizes"].split(",")):
+            start = time.perf_counter()
+            index = PatternIndex(*synthetic_patterns(size, rng, distributions))
+            build_s = time.perf_counter() - start
+
+            # A scan touches every pattern, so time fewer queries.
+            sample = queries[: max(1, min(len(queries), 2_000_000 // index.size))]
+            start = time.perf_counter()
+            for code in sample:
+                sum(n for other, n in index.items() if distance(code, other) <= 1)
+            scan_ms = (time.perf_counter() - start) / len(sample) * 1000
+
+            for k in distances:
+                timings, matched = [], []
+                for code in queries:
+                    start = time.perf_counter()
+                    count, _ = index.search(code, k, sample=5)
+                    timings.append(time.perf_counter() - start)
+                    matched.append(count)
+                timings.sort()
+                p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+                self.stdout.write(
+                    f"{size:>11} {index.size:>10} {index.nbytes / 2**20:>6.0f} "
+                    f"{build_s:>8.1f} {scan_ms:>10.0f} {k:>2} "
+                    f"{statistics.median(timings) * 1e6:>8.0f} {p99 * 1e6:>8.0f} "
+                    f"{statistics.mean(matched):>9.0f}"
+                )
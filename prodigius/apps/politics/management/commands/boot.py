@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.politics.startup import boot
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply pending migrations, make sure the admin user exists with the "
+        "default password and collect static files, skipping each step that "
+        "would change nothing. Run by the container entrypoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force", action="store_true", help="Run every step regardless."
+        )
+
+    def handle(self, *args, **options):
+        boot(options["force"], log=self.stdout.write)
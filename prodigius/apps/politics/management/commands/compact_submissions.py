@@ -0,0 +1,68 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.politics.retention import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Move TestSubmission rows older than the retention window into gzipped "
+        "NDJSON archive files and per-day SubmissionRollup counts, then delete "
+        "them in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=settings.POLITICS_RETENTION_DAYS,
+            help="Keep submissions from this many most recent days.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=settings.POLITICS_ARCHIVE_DIR,
+            help="Directory for the archive files.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between delete batches.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many rows would be compacted without writing.",
+        )
+
+    def handle(self, *args, **options):
+        if options["keep_days"] < 0:
+            raise CommandError("--keep-days must not be negative.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        until = timezone.localdate() - datetime.timedelta(days=options["keep_days"])
+        self.stdout.write(f"Compacting submissions from before {until}...")
+
+        started = time.monotonic()
+        totals = compact(
+            until,
+            options["archive_dir"],
+            batch_size=options["batch_size"],
+            chunk_size=options["chunk_size"],
+            pause=options["pause"],
+            dry_run=options["dry_run"],
+            log=self.stdout.write,
+        )
+        verb = "would be deleted" if options["dry_run"] else "deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {totals['days']} days, {totals['archived']} rows archived, "
+                f"{totals['deleted']} {verb} in {time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.politics.loadgen import drive, percentile, run_server, score_task
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn on localhost in WSGI and ASGI mode with the same worker "
+        "count, post random answer sets to politics:score and compare "
+        "requests/sec and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default="wsgi,asgi")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--warmup", type=float, default=2.0)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows = []
+        for mode in options["modes"].split(","):
+            self.stdout.write(f"Running {mode} with {options['workers']} workers...")
+            try:
+                with run_server(mode, options["workers"], options["port"]):
+                    drive(
+                        options["port"],
+                        score_task,
+                        options["concurrency"],
+                        options["warmup"],
+                        options["seed"],
+                    )
+                    latencies, errors = drive(
+                        options["port"],
+                        score_task,
+                        options["concurrency"],
+                        options["duration"],
+                        options["seed"],
+                    )
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            latencies.sort()
+            rows.append(
+                (
+                    mode,
+                    len(latencies),
+                    errors,
+                    len(latencies) / options["duration"],
+                    percentile(latencies, 50) * 1000,
+                    percentile(latencies, 99) * 1000,
+                )
+            )
+
+        self.stdout.write(
+            f"{'mode':<6} {'requests':>9} {'errors':>7} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p99 ms':>8}"
+        )
+        for mode, count, errors, rps, p50, p99 in rows:
+            self.stdout.write(
+                f"{mode:<6} {count:>9} {errors:>7} {rps:>8.1f} {p50:>8.1f} {p99:>8.1f}"
+            )
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.politics.export import FORMATS, export_stream, parse_bound
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream TestSubmission rows as CSV or NDJSON with the answers flattened "
+        "into q1..q12 columns. Rows are read through a cursor in chunks, so "
+        "memory use stays constant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument(
+            "--since", help="Only rows created at or after this ISO date/datetime."
+        )
+        parser.add_argument(
+            "--until", help="Only rows created before this ISO date/datetime."
+        )
+        parser.add_argument("--gzip", action="store_true", help="Compress the output.")
+        parser.add_argument(
+            "--output", "-o", default="-", help="File to write (default: stdout)."
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_bound(options["since"])
+            until = parse_bound(options["until"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        chunks = export_stream(
+            options["format"],
+            since=since,
+            until=until,
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["output"] != "-":
+            with open(options["output"], "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+        elif options["gzip"]:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
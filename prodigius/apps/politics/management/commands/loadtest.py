@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.politics.loadgen import load_config, run_mix, run_server, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn on localhost and drive a weighted mix of index, test and "
+        "score requests from concurrent clients, then report throughput, error "
+        "rate and latency percentiles per endpoint. Options override the "
+        "--config JSON file, which overrides the defaults."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", help="JSON file with run settings.")
+        parser.add_argument("--mode", choices=("wsgi", "asgi"))
+        parser.add_argument("--workers", type=int)
+        parser.add_argument("--concurrency", type=int)
+        parser.add_argument("--duration", type=float)
+        parser.add_argument("--warmup", type=float)
+        parser.add_argument("--port", type=int)
+        parser.add_argument("--seed", type=int)
+        parser.add_argument(
+            "--output", "-o", help="Write the config, summary and histograms as JSON."
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            key: options[key]
+            for key in (
+                "mode",
+                "workers",
+                "concurrency",
+                "duration",
+                "warmup",
+                "port",
+                "seed",
+            )
+        }
+        try:
+            config = load_config(options["config"], overrides)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"Running {config['mode']} with {config['workers']} workers, "
+            f"{config['concurrency']} clients for {config['duration']}s, "
+            f"mix {config['mix']}..."
+        )
+        try:
+            with run_server(config["mode"], config["workers"], config["port"]):
+                run = [config["port"], config["mix"], config["concurrency"]]
+                if config["warmup"]:
+                    run_mix(
+                        *run, config["warmup"], config["seed"], config["revalidate"]
+                    )
+                stats = run_mix(
+                    *run, config["duration"], config["seed"], config["revalidate"]
+                )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        rows = list(summarize(stats, config["duration"]))
+        self.stdout.write(
+            f"{'endpoint':<8} {'requests':>9} {'errors':>7} {'err %':>6} "
+            f"{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<8} {row['requests']:>9} {row['errors']:>7} "
+                f"{row['error_rate'] * 100:>6.2f} {row['rps']:>8.1f} "
+                f"{row['p50_us'] / 1000:>8.1f} {row['p95_us'] / 1000:>8.1f} "
+                f"{row['p99_us'] / 1000:>8.1f} {row['max_us'] / 1000:>8.1f}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({"config": config, "results": rows}, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
@@ -0,0 +1,98 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.politics.loadgen import (
+    Client,
+    drive,
+    memory_usage,
+    percentile,
+    random_answers,
+    run_server,
+    score_task,
+    worker_pids,
+)
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn on localhost with and without GUNICORN_WARM_START and "
+        "report the time to the first response, the latency of the first quiz "
+        "and score requests, steady-state latency after a short load, and the "
+        "resident, proportional and private memory of each worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=("wsgi", "asgi"), default="wsgi")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0)
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows = []
+        for variant, warm in (("cold", "false"), ("warm", "true")):
+            self.stdout.write(f"Running {variant} start...")
+            env = {"GUNICORN_WARM_START": warm}
+            start = time.perf_counter()
+            try:
+                with run_server(
+                    options["mode"], options["workers"], options["port"], env
+                ) as proc:
+                    rows.append((variant, *self.measure(proc, start, options)))
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{'start':<6} {'ready s':>8} {'1st test':>9} {'1st score':>10} "
+            f"{'p50 ms':>7} {'RSS MB':>7} {'PSS MB':>7} {'priv MB':>8} "
+            f"{'master':>7}"
+        )
+        for row in rows:
+            self.stdout.write(
+                "{:<6} {:>8.2f} {:>9.1f} {:>10.1f} {:>7.1f} {:>7.1f} {:>7.1f} "
+                "{:>8.1f} {:>7.1f}".format(*row)
+            )
+        self.stdout.write(
+            "Latencies in ms; memory is the mean per worker after the load, "
+            "master is its RSS."
+        )
+
+    def measure(self, proc, start, options):
+        ready = time.perf_counter() - start
+        client = Client(options["port"])
+        began = time.perf_counter()
+        client.request("GET", "/politics/test/")
+        first_test = time.perf_counter() - began
+        began = time.perf_counter()
+        client.post_form(
+            "/politics/score/", random_answers(random.Random(options["seed"]))
+        )
+        first_score = time.perf_counter() - began
+        client.close()
+
+        latencies, _ = drive(
+            options["port"],
+            score_task,
+            options["workers"] * 2,
+            options["duration"],
+            options["seed"],
+        )
+        latencies.sort()
+        usage = [memory_usage(pid) for pid in worker_pids(proc.pid)]
+        if not usage:
+            raise CommandError("gunicorn has no workers")
+        mean = {key: sum(u[key] for u in usage) / len(usage) / MB for key in usage[0]}
+        return (
+            ready,
+            first_test * 1000,
+            first_score * 1000,
+            percentile(latencies, 50) * 1000,
+            mean["rss"],
+            mean["pss"],
+            mean["private"],
+            memory_usage(proc.pid)["rss"] / MB,
+        )
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.politics.similar import get_pattern_index, rebuild_patterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the submissions per answer pattern (AnswerPattern) with one "
+        "GROUP BY over TestSubmission.answers_code and make every process "
+        "reload its similar-answers index."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        patterns = rebuild_patterns()
+        counted = time.monotonic() - started
+        index = get_pattern_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {patterns} patterns of {index.total} submissions counted "
+                f"in {counted:.1f}s; index loaded in "
+                f"{time.monotonic() - started - counted:.1f}s "
+                f"({index.nbytes / 2**20:.1f} MiB)."
+            )
+        )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.politics.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the submission statistics (the x/y histogram and the per-axis "
+        "percentile bins) from every stored TestSubmission in one streaming "
+        "pass."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counted = rebuild_stats(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {counted} submissions counted "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
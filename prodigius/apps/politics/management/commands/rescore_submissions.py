@@ -0,0 +1,74 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.politics.models import TestSubmission
+from apps.politics.stats import rebuild_stats
+from apps.politics.utils import compute_coords_batch, get_score_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute x/y for every stored TestSubmission with the current scoring "
+        "weights. Rows are streamed in chunks so memory use stays constant."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many rows would change without writing them.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        table = get_score_table()
+        rows = (
+            TestSubmission.objects.only("id", "answers", "x", "y")
+            .order_by("pk")
+            .iterator(chunk_size=chunk_size)
+        )
+
+        self.processed = self.updated = 0
+        self.started = time.monotonic()
+        chunk = []
+        for sub in rows:
+            chunk.append(sub)
+            if len(chunk) >= chunk_size:
+                self.rescore(chunk, table, dry_run)
+                chunk = []
+        if chunk:
+            self.rescore(chunk, table, dry_run)
+
+        if self.updated and not dry_run:
+            self.stdout.write("Rebuilding submission statistics...")
+            rebuild_stats(chunk_size=chunk_size)
+
+        verb = "would change" if dry_run else "updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {self.processed} rows scanned, {self.updated} {verb} "
+                f"in {time.monotonic() - self.started:.1f}s."
+            )
+        )
+
+    def rescore(self, chunk, table, dry_run):
+        changed = []
+        coords = compute_coords_batch((sub.answers for sub in chunk), table)
+        for sub, (x, y) in zip(chunk, coords):
+            if sub.x != x or sub.y != y:
+                sub.x, sub.y = x, y
+                changed.append(sub)
+        if changed and not dry_run:
+            TestSubmission.objects.bulk_update(changed, ["x", "y"])
+
+        self.processed += len(chunk)
+        self.updated += len(changed)
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{self.processed} rows scanned, {self.updated} changed "
+            f"({rate:,.0f} rows/s)"
+        )
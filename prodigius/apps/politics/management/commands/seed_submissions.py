@@ -0,0 +1,94 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.politics.export import parse_bound
+from apps.politics.seeding import can_copy, generate, insert_batch, load_distributions
+from apps.politics.similar import rebuild_patterns
+from apps.politics.stats import StatsDelta
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert synthetic TestSubmission rows with answers drawn from per-question "
+        "distributions. The same --seed and options produce the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--distributions",
+            help='JSON file mapping "q1".."q12" or "default" to {label: weight}; '
+            'use "" as the label for a skipped question.',
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Spread created_at over this many days before --end.",
+        )
+        parser.add_argument(
+            "--end",
+            help="Latest created_at as an ISO date/datetime (default: today 00:00).",
+        )
+        parser.add_argument(
+            "--method",
+            choices=("auto", "bulk", "copy"),
+            default="auto",
+            help="Insert with bulk_create or COPY; auto uses COPY on Postgres.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            distributions = load_distributions(options["distributions"])
+            end = parse_bound(options["end"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        if end is None:
+            end = timezone.make_aware(
+                datetime.datetime.combine(timezone.localdate(), datetime.time())
+            )
+        method = options["method"]
+        if method == "auto":
+            method = "copy" if can_copy() else "bulk"
+        elif method == "copy" and not can_copy():
+            raise CommandError("COPY needs a PostgreSQL database.")
+
+        rng = random.Random(options["seed"])
+        batches = generate(
+            options["count"],
+            rng,
+            distributions,
+            end,
+            options["days"],
+            options["batch_size"],
+        )
+        delta = StatsDelta()
+        inserted = 0
+        started = time.monotonic()
+        try:
+            for batch in batches:
+                insert_batch(batch, delta, use_copy=method == "copy")
+                inserted += len(batch)
+                elapsed = time.monotonic() - started
+                rate = inserted / elapsed if elapsed else 0.0
+                self.stdout.write(f"{inserted} rows inserted ({rate:,.0f} rows/s)")
+        finally:
+            if delta.total:
+                self.stdout.write("Updating submission statistics...")
+                delta.apply()
+                rebuild_patterns()
+
+        elapsed = time.monotonic() - started
+        rate = inserted / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {inserted} rows inserted with {method} "
+                f"in {elapsed:.1f}s ({rate:,.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,142 @@
+"""Memo of score results keyed on the answer pattern.
+
+Twelve questions with five states each allow at most 5**12 answer patterns,
+and real traffic repeats a small share of them heavily. ``score`` keeps
+``(x, y, nearest politicians)`` per packed answer code (``encode_answers``)
+in a bounded per-process LRU of ``POLITICS_RESULT_MEMO_SIZE`` entries, and
+with ``POLITICS_RESULT_CACHE`` naming a shared cache also stores ``(x, y,
+politician ids)`` there for other workers.
+
+Entries belong to the catalog and roster versions and the
+``POLITICS_NEAREST_K`` they were computed with. The local memo is emptied as
+soon as one of those changes, and the shared keys include all three. Answer
+sets that do not pack (unknown labels) are scored directly.
+"""
+
+import collections
+import os
+import threading
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Politician
+from .nearest import ROSTER_VERSION, get_index, nearest_politicians
+from .utils import CATALOG_VERSION, compute_coords, encode_answers
+from .versions import get_versions
+
+CACHE_KEY = "politics:result:{}:{}:{}:{}"
+CACHE_TIMEOUT = 24 * 60 * 60
+
+Result = Tuple[float, float, List[Politician]]
+
+
+class ResultMemo:
+    """Thread-safe LRU whose entries all belong to one ``generation``; a
+    lookup or store with another generation empties it."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.hits = self.shared_hits = self.misses = 0
+        self._entries: "collections.OrderedDict[int, Result]" = (
+            collections.OrderedDict()
+        )
+        self._generation: Optional[Hashable] = None
+        self._lock = threading.Lock()
+
+    def _switch(self, generation: Hashable) -> None:
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, generation: Hashable, code: int) -> Optional[Result]:
+        with self._lock:
+            self._switch(generation)
+            result = self._entries.get(code)
+            if result is not None:
+                self._entries.move_to_end(code)
+                self.hits += 1
+            return result
+
+    def put(
+        self, generation: Hashable, code: int, result: Result, shared: bool = False
+    ) -> None:
+        """Store a result; ``shared`` counts it as a shared-cache hit, anything
+        else as a miss."""
+        with self._lock:
+            if shared:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+            self._switch(generation)
+            self._entries[code] = result
+            self._entries.move_to_end(code)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+_memo: Optional[ResultMemo] = None
+_memo_pid: Optional[int] = None
+_memo_lock = threading.Lock()
+
+
+def get_memo() -> ResultMemo:
+    """Return this process's memo, starting a fresh one after a fork so each
+    worker reports its own hit counts."""
+    global _memo, _memo_pid
+    if _memo is None or _memo_pid != os.getpid():
+        with _memo_lock:
+            if _memo is None or _memo_pid != os.getpid():
+                _memo = ResultMemo(settings.POLITICS_RESULT_MEMO_SIZE)
+                _memo_pid = os.getpid()
+    return _memo
+
+
+def _compute(answers: Dict[str, str], k: int) -> Result:
+    x, y = compute_coords(answers)
+    return x, y, nearest_politicians(x, y, k)
+
+
+def score(answers: Dict[str, str]) -> Result:
+    """``compute_coords`` plus ``nearest_politicians``, memoized."""
+    k = settings.POLITICS_NEAREST_K
+    code = encode_answers(answers)
+    if code is None or settings.POLITICS_RESULT_MEMO_SIZE <= 0:
+        return _compute(answers, k)
+
+    catalog, roster = get_versions(CATALOG_VERSION, ROSTER_VERSION)
+    generation = (catalog, roster, k)
+    memo = get_memo()
+    result = memo.get(generation, code)
+    if result is not None:
+        return result
+
+    alias = settings.POLITICS_RESULT_CACHE
+    shared = caches[alias] if alias else None
+    key = CACHE_KEY.format(catalog, roster, k, code)
+    if shared is not None:
+        cached = shared.get(key)
+        if cached is not None:
+            x, y, pks = cached
+            by_pk = get_index().by_pk
+            if all(pk in by_pk for pk in pks):
+                result = (x, y, [by_pk[pk] for pk in pks])
+                memo.put(generation, code, result, shared=True)
+                return result
+
+    result = _compute(answers, k)
+    memo.put(generation, code, result)
+    if shared is not None:
+        x, y, nearest = result
+        shared.set(key, (x, y, [p.pk for p in nearest]), CACHE_TIMEOUT)
+    return result
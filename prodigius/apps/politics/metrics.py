@@ -0,0 +1,389 @@
+"""Per-view request metrics in Prometheus text format.
+
+``MetricsMiddleware`` (see ``middleware.py``) opens a ``Sample`` for each
+request. Database time is added to it by ``db_wrapper``, which
+``signals.py`` installs on every new connection and which finds the sample
+through a context variable (so queries run via ``sync_to_async`` still
+count). Template render time is measured between ``process_template_response``
+and the response's post-render callback. When the request finishes the
+sample goes into the process-wide ``registry``:
+
+* ``politics_request_duration_seconds``: histogram by view, method and status
+* ``politics_response_size_bytes``: histogram by view
+* ``politics_db_queries_total`` / ``politics_db_duration_seconds_total``
+* ``politics_template_render_seconds_total``
+* ``politics_queue_wait_seconds`` and the ``politics_admission_*`` counters,
+  recorded by ``admission.py``
+
+Write-behind buffer, result memo and admission in-flight values
+(``EXTRA_METRICS``) are read from those modules when a snapshot is taken, and
+the admission limits from the settings. Each worker writes a snapshot to
+``POLITICS_METRICS_DIR`` at most every ``POLITICS_METRICS_DUMP_INTERVAL``
+seconds and on exit; ``/metrics`` merges the snapshots of all workers.
+"""
+
+import atexit
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "politics_request_duration_seconds": (
+        "histogram",
+        "Time from the metrics middleware receiving a request to its response.",
+        LATENCY_BUCKETS,
+    ),
+    "politics_response_size_bytes": (
+        "histogram",
+        "Size of non-streaming response bodies.",
+        SIZE_BUCKETS,
+    ),
+    "politics_db_queries_total": ("counter", "Database queries run.", None),
+    "politics_db_duration_seconds_total": (
+        "counter",
+        "Time spent in database queries.",
+        None,
+    ),
+    "politics_template_render_seconds_total": (
+        "counter",
+        "Time spent rendering template responses.",
+        None,
+    ),
+    "politics_queue_wait_seconds": (
+        "histogram",
+        "Time from the proxy receiving a request to a worker picking it up.",
+        LATENCY_BUCKETS,
+    ),
+    "politics_admission_admitted_total": (
+        "counter",
+        "Requests let through by admission control.",
+        None,
+    ),
+    "politics_admission_shed_total": (
+        "counter",
+        "Requests turned away by admission control, by reason.",
+        None,
+    ),
+}
+
+# Unlabelled values reported by other modules (see ``_extra``): name ->
+# (type, help).
+EXTRA_METRICS = {
+    "politics_writebehind_depth": (
+        "gauge",
+        "Submissions waiting in write-behind buffers.",
+    ),
+    "politics_writebehind_enqueued_total": (
+        "counter",
+        "Submissions queued by write-behind buffers.",
+    ),
+    "politics_writebehind_flushed_total": (
+        "counter",
+        "Submissions written by write-behind buffers.",
+    ),
+    "politics_writebehind_rejected_total": (
+        "counter",
+        "Submissions inserted directly because a write-behind buffer was full "
+        "or stopping.",
+    ),
+    "politics_writebehind_retried_total": (
+        "counter",
+        "Submissions put back in write-behind buffers after a failed flush.",
+    ),
+    "politics_writebehind_failed_total": (
+        "counter",
+        "Submissions lost to failed write-behind flushes.",
+    ),
+    "politics_result_memo_hits_total": (
+        "counter",
+        "Score results served from a per-process result memo.",
+    ),
+    "politics_result_memo_shared_hits_total": (
+        "counter",
+        "Score results loaded from the shared result cache.",
+    ),
+    "politics_result_memo_misses_total": (
+        "counter",
+        "Score results computed because no memo held them.",
+    ),
+    "politics_result_memo_entries": (
+        "gauge",
+        "Entries held in per-process result memos.",
+    ),
+    "politics_admission_inflight": (
+        "gauge",
+        "Requests running under admission control.",
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Sample:
+    __slots__ = ("start", "queries", "db_time", "render_start", "render_time")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_start: Optional[float] = None
+        self.render_time = 0.0
+
+
+_current: contextvars.ContextVar[Optional[Sample]] = contextvars.ContextVar(
+    "politics_metrics_sample", default=None
+)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook counting queries for the request."""
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_time += time.perf_counter() - start
+
+
+class Registry:
+    """Process-wide metric values.
+
+    Histograms are stored as per-bucket counts (the last one for +Inf)
+    followed by the sum; counters as a one-element list.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        buckets = METRICS[name][2]
+        with self._lock:
+            values = self._values.get((name, labels))
+            if values is None:
+                values = self._values[name, labels] = [0] * (len(buckets) + 2)
+            values[bisect.bisect_left(buckets, value)] += 1
+            values[-1] += value
+
+    def inc(self, name: str, labels: Labels, amount: float = 1) -> None:
+        with self._lock:
+            values = self._values.setdefault((name, labels), [0])
+            values[0] += amount
+
+    def snapshot(self) -> List[list]:
+        with self._lock:
+            return [
+                [name, list(labels), list(values)]
+                for (name, labels), values in self._values.items()
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+registry = Registry()
+
+
+def start_request() -> Tuple[Sample, contextvars.Token]:
+    sample = Sample()
+    return sample, _current.set(sample)
+
+
+def finish_request(sample: Sample, token, request, response) -> None:
+    _current.reset(token)
+    elapsed = time.perf_counter() - sample.start
+    view = view_label(request)
+    status = f"{response.status_code // 100}xx"
+    registry.observe(
+        "politics_request_duration_seconds",
+        (("view", view), ("method", request.method), ("status", status)),
+        elapsed,
+    )
+    labels = (("view", view),)
+    if not response.streaming:
+        registry.observe("politics_response_size_bytes", labels, len(response.content))
+    if sample.queries:
+        registry.inc("politics_db_queries_total", labels, sample.queries)
+        registry.inc("politics_db_duration_seconds_total", labels, sample.db_time)
+    if sample.render_time:
+        registry.inc(
+            "politics_template_render_seconds_total", labels, sample.render_time
+        )
+    maybe_dump()
+
+
+def view_label(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    if "admin" in match.namespaces:
+        return "admin"
+    return match.view_name
+
+
+# Snapshots shared between workers.
+
+_last_dump = 0.0
+_dump_pending = False
+_dump_lock = threading.Lock()
+
+
+def _dump_path(pid: int) -> str:
+    return os.path.join(settings.POLITICS_METRICS_DIR, f"{pid}.json")
+
+
+def dump() -> None:
+    """Write this process's snapshot to ``POLITICS_METRICS_DIR``."""
+    if not settings.POLITICS_METRICS_DIR:
+        return
+    path = _dump_path(os.getpid())
+    os.makedirs(settings.POLITICS_METRICS_DIR, exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"metrics": registry.snapshot(), "extra": _extra()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def maybe_dump() -> None:
+    """Dump if the interval has passed, otherwise make sure a dump happens
+    once it has, so a worker that goes idle still publishes its last
+    requests."""
+    global _dump_pending
+    if not settings.POLITICS_METRICS_DIR:
+        return
+    wait = _last_dump + settings.POLITICS_METRICS_DUMP_INTERVAL - time.monotonic()
+    if wait <= 0:
+        _scheduled_dump()
+        return
+    with _dump_lock:
+        if _dump_pending:
+            return
+        _dump_pending = True
+    timer = threading.Timer(wait, _scheduled_dump)
+    timer.daemon = True
+    timer.start()
+
+
+def _scheduled_dump() -> None:
+    global _last_dump, _dump_pending
+    with _dump_lock:
+        _last_dump = time.monotonic()
+        _dump_pending = False
+        dump()
+
+
+def _extra() -> Dict[str, float]:
+    """Counters kept by other parts of the app in this process, by metric
+    name: the write-behind buffer and the result memo, if they exist."""
+    from . import admission, memo, writebehind
+
+    values: Dict[str, float] = {}
+    pid = os.getpid()
+    if writebehind._buffer is not None and writebehind._buffer_pid == pid:
+        for key, value in writebehind._buffer.stats().items():
+            suffix = "" if key == "depth" else "_total"
+            values[f"politics_writebehind_{key}{suffix}"] = value
+    if memo._memo is not None and memo._memo_pid == pid:
+        for key, value in memo._memo.stats().items():
+            suffix = "" if key == "entries" else "_total"
+            values[f"politics_result_memo_{key}{suffix}"] = value
+    if admission._controller is not None and admission._controller_key[0] == pid:
+        values["politics_admission_inflight"] = admission._controller.inflight
+    return values
+
+
+def _shutdown() -> None:
+    try:
+        dump()
+    except OSError:
+        pass
+
+
+atexit.register(_shutdown)
+
+
+def collect() -> Tuple[Dict[Tuple[str, Labels], List[float]], Dict[str, float]]:
+    """Merge this process's live values with the other workers' snapshots."""
+    snapshots = [{"metrics": registry.snapshot(), "extra": _extra()}]
+    directory = settings.POLITICS_METRICS_DIR
+    if directory and os.path.isdir(directory):
+        own = f"{os.getpid()}.json"
+        for name in os.listdir(directory):
+            if name.endswith(".json") and name != own:
+                try:
+                    with open(os.path.join(directory, name)) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue  # being replaced or truncated
+    merged: Dict[Tuple[str, Labels], List[float]] = {}
+    extra: Dict[str, float] = {}
+    for snapshot in snapshots:
+        for name, labels, values in snapshot["metrics"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if key in merged:
+                merged[key] = [a + b for a, b in zip(merged[key], values)]
+            else:
+                merged[key] = list(values)
+        for key, value in snapshot.get("extra", {}).items():
+            extra[key] = extra.get(key, 0) + value
+    return merged, extra
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _format_labels(labels, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render() -> str:
+    """All metrics across workers in Prometheus text exposition format."""
+    merged, extra = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((k[1], v) for k, v in merged.items() if k[0] == name)
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, values in series:
+            if kind == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {_num(values[0])}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*buckets, "+Inf"], values[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, le)} {_num(cumulative)}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {_num(values[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_num(cumulative)}")
+    for name, (kind, help_text) in EXTRA_METRICS.items():
+        if name in extra:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_num(extra[name])}")
+    # Settings, the same in every worker.
+    from .admission import limits
+
+    lines.append("# HELP politics_admission_limit Configured per-process limits.")
+    lines.append("# TYPE politics_admission_limit gauge")
+    for name, value in limits().items():
+        lines.append(f'politics_admission_limit{{limit="{name}"}} {_num(value)}')
+    return "\n".join(lines) + "\n"
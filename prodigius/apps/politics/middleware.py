@@ -0,0 +1,101 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.middleware.gzip import GZipMiddleware
+
+from . import admission, metrics
+
+
+class MetricsMiddleware:
+    """Record per-view latency, response size, database and template time.
+
+    Put it first in MIDDLEWARE so the latency covers the rest of the stack.
+    Works for both sync and async views without an adapter hop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sample, token = metrics.start_request()
+        request.metrics_sample = sample
+        response = self.get_response(request)
+        metrics.finish_request(sample, token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        sample, token = metrics.start_request()
+        request.metrics_sample = sample
+        response = await self.get_response(request)
+        metrics.finish_request(sample, token, request, response)
+        return response
+
+    def process_template_response(self, request, response):
+        sample = getattr(request, "metrics_sample", None)
+        if sample is not None:
+            sample.render_start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: _rendered(sample, rendered)
+            )
+        return response
+
+
+def _rendered(sample, response):
+    sample.render_time += time.perf_counter() - sample.render_start
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """``GZipMiddleware`` that leaves already compressed bodies alone.
+
+    The export view sends ``gzip=1`` downloads as ``application/gzip`` without
+    a ``Content-Encoding``, which GZipMiddleware would compress a second time.
+    """
+
+    compressed_types = frozenset(
+        ["application/gzip", "application/x-gzip", "application/zip"]
+    )
+
+    def process_response(self, request, response):
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type in self.compressed_types:
+            return response
+        return super().process_response(request, response)
+
+
+class AdmissionMiddleware:
+    """Turn away requests to ``POLITICS_ADMISSION_VIEWS`` over the limits in
+    ``admission.py`` before the view runs."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            admission.release(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            admission.release(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return admission.admit(request)
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0003_alter_choice_label"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="choice",
+            name="delta",
+            field=models.FloatField(
+                default=0.0, help_text="Score for this choice (times weight)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="axis",
+            field=models.CharField(
+                choices=[
+                    ("x", "Economic (left/right)"),
+                    ("y", "Social (authoritarian/libertarian)"),
+                ],
+                default="x",
+                max_length=1,
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="both_delta",
+            field=models.FloatField(
+                default=0.0,
+                help_text="Score for 'Both' (times weight) when there is no Both choice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="neither_delta",
+            field=models.FloatField(
+                default=0.0,
+                help_text="Score for 'Neither' (times weight) when there is no Neither choice",
+            ),
+        ),
+        migrations.AddField(
+            model_name="question",
+            name="weight",
+            field=models.FloatField(default=1.0),
+        ),
+    ]
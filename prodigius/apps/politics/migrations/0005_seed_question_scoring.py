@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Scoring rules as they were hard-coded in utils.py before weights moved onto
+# Question/Choice. Copied here so later edits to utils.py cannot change what
+# this migration writes.
+Q_AXIS = {
+    1: ("x", 1.0),
+    2: ("x", 1.0),
+    3: ("y", 1.0),
+    4: ("x", 1.0),
+    5: ("x", 0.8),
+    6: ("y", 0.8),
+    7: ("x", 0.8),
+    8: ("y", 0.8),
+    9: ("y", 0.9),
+    10: ("y", 0.7),
+    11: ("x", 0.9),
+    12: ("x", 0.8),
+}
+X_DELTAS = {"A": -1.0, "B": 1.0}
+Y_DELTAS = {"A": 1.0, "B": -1.0, "Both": 0.3}
+Q_DELTAS = {8: {"A": 0.6, "B": 0.6, "Both": 1.0}}
+
+
+def seed_scoring(apps, schema_editor):
+    Question = apps.get_model("politics", "Question")
+    for question in Question.objects.filter(order__in=Q_AXIS).prefetch_related(
+        "choices"
+    ):
+        axis, weight = Q_AXIS[question.order]
+        deltas = Q_DELTAS.get(question.order) or (X_DELTAS if axis == "x" else Y_DELTAS)
+        question.axis = axis
+        question.weight = weight
+        question.both_delta = deltas.get("Both", 0.0)
+        question.neither_delta = deltas.get("Neither", 0.0)
+        question.save(update_fields=["axis", "weight", "both_delta", "neither_delta"])
+        for choice in question.choices.all():
+            choice.delta = deltas.get(choice.label, 0.0)
+            choice.save(update_fields=["delta"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0004_question_scoring_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_scoring, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0005_seed_question_scoring"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistogramBin",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("size", models.PositiveSmallIntegerField()),
+                ("ix", models.PositiveSmallIntegerField()),
+                ("iy", models.PositiveSmallIntegerField()),
+                ("count", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("size", "ix", "iy")},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0006_histogrambin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AxisBin",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "axis",
+                    models.CharField(
+                        choices=[
+                            ("x", "Economic (left/right)"),
+                            ("y", "Social (authoritarian/libertarian)"),
+                        ],
+                        max_length=1,
+                    ),
+                ),
+                ("size", models.PositiveSmallIntegerField()),
+                ("index", models.PositiveSmallIntegerField()),
+                ("count", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "unique_together": {("axis", "size", "index")},
+            },
+        ),
+    ]
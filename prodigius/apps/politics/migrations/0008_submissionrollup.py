@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0007_axisbin"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="testsubmission",
+            name="created_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.CreateModel(
+            name="SubmissionRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("size", models.PositiveSmallIntegerField()),
+                ("ix", models.PositiveSmallIntegerField()),
+                ("iy", models.PositiveSmallIntegerField()),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                ("sum_x", models.FloatField(default=0.0)),
+                ("sum_y", models.FloatField(default=0.0)),
+            ],
+            options={
+                "unique_together": {("day", "size", "ix", "iy")},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0008_submissionrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="testsubmission",
+            name="answers_code",
+            field=models.BigIntegerField(
+                blank=True,
+                db_index=True,
+                help_text="answers packed by utils.encode_answers; null if they do not fit",
+                null=True,
+            ),
+        ),
+    ]
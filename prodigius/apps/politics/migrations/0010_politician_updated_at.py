@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0009_testsubmission_answers_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="politician",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
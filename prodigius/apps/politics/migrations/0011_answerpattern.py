@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0010_politician_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerPattern",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.BigIntegerField(unique=True)),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0011_answerpattern"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VersionToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("token", models.CharField(max_length=32)),
+            ],
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0012_versiontoken"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="choice",
+            name="delta",
+            field=models.FloatField(
+                blank=True,
+                help_text="Score for this choice (times weight). Leave blank for the default of questions 1-12.",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="axis",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("x", "Economic (left/right)"),
+                    ("y", "Social (authoritarian/libertarian)"),
+                ],
+                help_text="Leave blank for the default of questions 1-12.",
+                max_length=1,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="both_delta",
+            field=models.FloatField(
+                blank=True,
+                help_text="Score for 'Both' (times weight) when there is no Both choice. Leave blank for the default of questions 1-12.",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="neither_delta",
+            field=models.FloatField(
+                blank=True,
+                help_text="Score for 'Neither' (times weight) when there is no Neither choice. Leave blank for the default of questions 1-12.",
+                null=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="weight",
+            field=models.FloatField(
+                blank=True,
+                help_text="Leave blank for the default of questions 1-12.",
+                null=True,
+            ),
+        ),
+    ]
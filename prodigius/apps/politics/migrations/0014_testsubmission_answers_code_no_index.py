@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0013_blank_scoring_fields_use_defaults"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="testsubmission",
+            name="answers_code",
+            field=models.BigIntegerField(
+                blank=True,
+                help_text="answers packed by utils.encode_answers; null if they do not fit",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# The scoring rules that used to fill blank fields on every save, applied once
+# to the rows that still have blanks. Copied here so that nothing outside the
+# Question/Choice rows decides how an answer scores.
+Q_AXIS = {
+    1: ("x", 1.0),
+    2: ("x", 1.0),
+    3: ("y", 1.0),
+    4: ("x", 1.0),
+    5: ("x", 0.8),
+    6: ("y", 0.8),
+    7: ("x", 0.8),
+    8: ("y", 0.8),
+    9: ("y", 0.9),
+    10: ("y", 0.7),
+    11: ("x", 0.9),
+    12: ("x", 0.8),
+}
+X_DELTAS = {"A": -1.0, "B": 1.0}
+Y_DELTAS = {"A": 1.0, "B": -1.0, "Both": 0.3}
+Q_DELTAS = {8: {"A": 0.6, "B": 0.6, "Both": 1.0}}
+
+
+def fill_scoring(apps, schema_editor):
+    Question = apps.get_model("politics", "Question")
+    for question in Question.objects.prefetch_related("choices"):
+        # Saving a blank field on other question numbers was refused, so they
+        # only get the column defaults from before the fields became nullable.
+        axis, weight = Q_AXIS.get(question.order, ("x", 1.0))
+        deltas = {}
+        if question.order in Q_AXIS:
+            deltas = Q_DELTAS.get(question.order) or (
+                X_DELTAS if axis == "x" else Y_DELTAS
+            )
+        question.axis = question.axis or axis
+        if question.weight is None:
+            question.weight = weight
+        if question.both_delta is None:
+            question.both_delta = deltas.get("Both", 0.0)
+        if question.neither_delta is None:
+            question.neither_delta = deltas.get("Neither", 0.0)
+        question.save(update_fields=["axis", "weight", "both_delta", "neither_delta"])
+        for choice in question.choices.all():
+            if choice.delta is None:
+                choice.delta = deltas.get(choice.label, 0.0)
+                choice.save(update_fields=["delta"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0014_testsubmission_answers_code_no_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_scoring, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("politics", "0015_fill_scoring_fields"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="choice",
+            name="delta",
+            field=models.FloatField(help_text="Score for this choice (times weight)"),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="axis",
+            field=models.CharField(
+                choices=[
+                    ("x", "Economic (left/right)"),
+                    ("y", "Social (authoritarian/libertarian)"),
+                ],
+                max_length=1,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="both_delta",
+            field=models.FloatField(
+                default=0.0,
+                help_text="Score for 'Both' (times weight) when there is no Both choice",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="neither_delta",
+            field=models.FloatField(
+                default=0.0,
+                help_text="Score for 'Neither' (times weight) when there is no Neither choice",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="question",
+            name="weight",
+            field=models.FloatField(),
+        ),
+    ]
@@ -3,8 +3,22 @@ from django.utils import timezone
 
 
 class Question(models.Model):
+    AXIS_CHOICES = [
+        ("x", "Economic (left/right)"),
+        ("y", "Social (authoritarian/libertarian)"),
+    ]
     text = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=1)
+    axis = models.CharField(max_length=1, choices=AXIS_CHOICES)
+    weight = models.FloatField()
+    both_delta = models.FloatField(
+        default=0.0,
+        help_text="Score for 'Both' (times weight) when there is no Both choice",
+    )
+    neither_delta = models.FloatField(
+        default=0.0,
+        help_text="Score for 'Neither' (times weight) when there is no Neither choice",
+    )
 
     class Meta:
         ordering = ["order"]
@@ -25,6 +39,7 @@ class Choice(models.Model):
     )
     label = models.CharField(max_length=10, choices=QUESTION_CHOICES)
     text = models.CharField(max_length=255)
+    delta = models.FloatField(help_text="Score for this choice (times weight)")
 
     class Meta:
         unique_together = ("question", "label")
@@ -38,16 +53,97 @@ class Politician(models.Model):
     x = models.FloatField(help_text="-1.0 left, +1.0 right")
     y = models.FloatField(help_text="-1.0 authoritarian, +1.0 libertarian")
     blurb = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
 class TestSubmission(models.Model):
-    created_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
     answers = models.JSONField(default=dict)
+    answers_code = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="answers packed by utils.encode_answers; null if they do not fit",
+    )
     x = models.FloatField(default=0.0)
     y = models.FloatField(default=0.0)
 
     def __str__(self):
         return f"Submission {self.pk} @ {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class HistogramBin(models.Model):
+    """Number of submissions in one cell of a ``size`` x ``size`` grid over the
+    spectrum, kept current by ``stats.record_submissions``."""
+
+    size = models.PositiveSmallIntegerField()
+    ix = models.PositiveSmallIntegerField()
+    iy = models.PositiveSmallIntegerField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("size", "ix", "iy")
+
+    def __str__(self):
+        return f"Bin ({self.ix}, {self.iy}) of {self.size}: {self.count}"
+
+
+class AxisBin(models.Model):
+    """Number of submissions in one of ``size`` equal bins along one axis,
+    used for percentile ranks."""
+
+    axis = models.CharField(max_length=1, choices=Question.AXIS_CHOICES)
+    size = models.PositiveSmallIntegerField()
+    index = models.PositiveSmallIntegerField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("axis", "size", "index")
+
+    def __str__(self):
+        return f"{self.axis} bin {self.index} of {self.size}: {self.count}"
+
+
+class SubmissionRollup(models.Model):
+    """Submissions removed by ``compact_submissions``, counted per day and per
+    cell of a ``size`` x ``size`` grid, with their coordinate sums."""
+
+    day = models.DateField()
+    size = models.PositiveSmallIntegerField()
+    ix = models.PositiveSmallIntegerField()
+    iy = models.PositiveSmallIntegerField()
+    count = models.PositiveBigIntegerField(default=0)
+    sum_x = models.FloatField(default=0.0)
+    sum_y = models.FloatField(default=0.0)
+
+    class Meta:
+        unique_together = ("day", "size", "ix", "iy")
+
+    def __str__(self):
+        return f"{self.day} bin ({self.ix}, {self.iy}) of {self.size}: {self.count}"
+
+
+class AnswerPattern(models.Model):
+    """Number of submissions with one packed answer code (``answers_code``),
+    kept current by ``stats.record_submissions``. ``updated_at`` lets
+    ``similar.py`` load only the patterns that changed."""
+
+    code = models.BigIntegerField(unique=True)
+    count = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"Pattern {self.code}: {self.count}"
+
+
+class VersionToken(models.Model):
+    """Current token of one named version (``versions.py``), shared by every
+    process through the database."""
+
+    name = models.CharField(max_length=50, unique=True)
+    token = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.name}: {self.token}"
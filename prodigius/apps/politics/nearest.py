@@ -0,0 +1,106 @@
+"""k-nearest lookup of politicians around a point on the spectrum.
+
+The roster is loaded once per process into a 2-d tree and reused until the
+``roster`` version changes (see ``signals.py``), so a lookup touches the
+database only after a politician was saved or deleted.
+"""
+
+import heapq
+import threading
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+
+from .models import Politician
+from .versions import get_version
+
+ROSTER_VERSION = "roster"
+
+
+class PoliticianIndex:
+    """Static 2-d tree over politician coordinates.
+
+    Ties on distance are broken by primary key so results match a stable sort
+    of the roster in primary-key order.
+    """
+
+    def __init__(self, politicians: Sequence[Politician]):
+        points = [(p.x, p.y, p.pk, p) for p in politicians]
+        self.size = len(points)
+        self.by_pk = {p.pk: p for p in politicians}
+        self._root = self._build(points, 0)
+
+    def _build(self, points, axis):
+        if not points:
+            return None
+        points.sort(key=lambda point: point[axis])
+        mid = len(points) // 2
+        return (
+            points[mid],
+            axis,
+            self._build(points[:mid], 1 - axis),
+            self._build(points[mid + 1 :], 1 - axis),
+        )
+
+    def nearest(self, x: float, y: float, k: int) -> List[Politician]:
+        if k <= 0:
+            return []
+        # Max-heap on (distance, pk) stored negated for heapq.
+        heap = []
+
+        def visit(node):
+            (px, py, pk, politician), axis, left, right = node
+            dist = (px - x) ** 2 + (py - y) ** 2
+            entry = (-dist, -pk, politician)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+            diff = (x - px) if axis == 0 else (y - py)
+            near, far = (left, right) if diff < 0 else (right, left)
+            if near is not None:
+                visit(near)
+            if far is not None and (len(heap) < k or diff * diff <= -heap[0][0]):
+                visit(far)
+
+        if self._root is not None:
+            visit(self._root)
+        return [entry[2] for entry in sorted(heap, key=lambda e: e[:2], reverse=True)]
+
+
+_lock = threading.Lock()
+_index: Optional[PoliticianIndex] = None
+_index_version: Optional[str] = None
+
+
+def get_index() -> PoliticianIndex:
+    """Return the process-wide index, rebuilding it if the roster changed."""
+    global _index, _index_version
+    version = get_version(ROSTER_VERSION)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = PoliticianIndex(list(Politician.objects.all()))
+                _index_version = version
+    return _index
+
+
+def nearest_politicians(
+    x: float, y: float, k: Optional[int] = None
+) -> List[Politician]:
+    if k is None:
+        k = settings.POLITICS_NEAREST_K
+    return get_index().nearest(x, y, k)
+
+
+def figures_key(politicians: Sequence[Politician]) -> str:
+    """Template fragment cache key for a result's politicians: the roster
+    version and their ids in order.
+
+    ``QuerySet.update()`` and ``bulk_update()`` send no signals, so after
+    changing politicians that way call ``bump_version(ROSTER_VERSION)``; that
+    refreshes the index and these fragments together.
+    """
+    ids = ",".join(str(p.pk) for p in politicians)
+    return f"{get_version(ROSTER_VERSION)}:{ids}"
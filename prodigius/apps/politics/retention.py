@@ -0,0 +1,177 @@
+"""Retention for TestSubmission: archive, roll up and delete old rows.
+
+``compact`` works through the days before a cutoff date, oldest first. For
+each day it
+
+1. writes the day's rows as gzipped NDJSON (the ``export.py`` format) to
+   ``submissions-YYYY-MM-DD.ndjson.gz`` in the archive directory, or to a
+   numbered sibling if an earlier run already archived part of the day, and
+   syncs the file to disk;
+2. adds the archived rows to ``SubmissionRollup`` (count and coordinate sums
+   per day and ``POLITICS_HISTOGRAM_BINS`` grid cell) and deletes them, in
+   short transactions of ``batch_size`` rows. The day's rollup rows are
+   locked and written in bulk, so a batch costs a handful of queries.
+
+Only rows written to the archive are deleted, and each batch's rollup and
+delete commit together, so an interrupted run can simply be repeated.
+``HistogramBin`` and ``AxisBin`` are left alone: compacted submissions still
+count towards the statistics, and ``rebuild_stats`` reads them back from the
+rollups.
+"""
+
+import datetime
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .export import encode, submissions
+from .models import SubmissionRollup, TestSubmission
+from .stats import bin_index
+
+
+def day_bounds(day: datetime.date) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Start and end of ``day`` in the current time zone."""
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time()))
+    end = timezone.make_aware(
+        datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time())
+    )
+    return start, end
+
+
+def archive_path(directory: str, day: datetime.date) -> str:
+    """First unused archive file name for ``day``; existing files are never
+    overwritten."""
+    base = os.path.join(directory, f"submissions-{day.isoformat()}")
+    path, n = f"{base}.ndjson.gz", 0
+    while os.path.exists(path):
+        n += 1
+        path = f"{base}.{n}.ndjson.gz"
+    return path
+
+
+def _counted(rows: Iterable[tuple], counter: List[int]) -> Iterator[tuple]:
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def archive_day(
+    directory: str, day: datetime.date, max_pk: int, chunk_size: int = 2000
+) -> Tuple[str, int]:
+    """Write the rows of ``day`` up to ``max_pk`` to a new archive file;
+    return its path and the number of rows."""
+    start, end = day_bounds(day)
+    rows = submissions(start, end).filter(pk__lte=max_pk)
+    path = archive_path(directory, day)
+    os.makedirs(directory, exist_ok=True)
+    written = [0]
+    with open(path + ".part", "wb") as f:
+        for chunk in encode(
+            _counted(rows.iterator(chunk_size=chunk_size), written), "ndjson", True
+        ):
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".part", path)
+    return path, written[0]
+
+
+def compact_day(
+    day: datetime.date, max_pk: int, batch_size: int = 1000, pause: float = 0.0
+) -> int:
+    """Roll up and delete the rows of ``day`` up to ``max_pk`` in batches;
+    return the number deleted."""
+    start, end = day_bounds(day)
+    size = settings.POLITICS_HISTOGRAM_BINS
+    rows = TestSubmission.objects.filter(
+        created_at__gte=start, created_at__lt=end, pk__lte=max_pk
+    ).order_by("pk")
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                rows.select_for_update().values_list("pk", "x", "y")[:batch_size]
+            )
+            if not batch:
+                return deleted
+            _roll_up(day, size, batch)
+            TestSubmission.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+        deleted += len(batch)
+        if pause:
+            time.sleep(pause)
+
+
+def _roll_up(day: datetime.date, size: int, batch: List[tuple]) -> None:
+    """Add ``(pk, x, y)`` rows to the day's rollups with one read, one bulk
+    update and one bulk insert."""
+    rollups = {
+        (r.ix, r.iy): r
+        for r in SubmissionRollup.objects.select_for_update().filter(day=day, size=size)
+    }
+    touched = set()
+    for _, x, y in batch:
+        cell = (bin_index(x, size), bin_index(y, size))
+        rollup = rollups.get(cell)
+        if rollup is None:
+            rollup = rollups[cell] = SubmissionRollup(
+                day=day, size=size, ix=cell[0], iy=cell[1]
+            )
+        rollup.count += 1
+        rollup.sum_x += x
+        rollup.sum_y += y
+        touched.add(cell)
+    changed = [rollups[cell] for cell in sorted(touched)]
+    SubmissionRollup.objects.bulk_update(
+        [r for r in changed if r.pk is not None], ["count", "sum_x", "sum_y"]
+    )
+    SubmissionRollup.objects.bulk_create([r for r in changed if r.pk is None])
+
+
+def compact(
+    until: datetime.date,
+    directory: str,
+    batch_size: int = 1000,
+    chunk_size: int = 2000,
+    pause: float = 0.0,
+    dry_run: bool = False,
+    log: Callable[[str], None] = lambda line: None,
+) -> Dict[str, int]:
+    """Archive, roll up and delete all submissions from days before ``until``.
+
+    Returns the number of days, archived rows and deleted rows. With
+    ``dry_run`` nothing is written and ``archived``/``deleted`` are the rows
+    that would be.
+    """
+    totals = {"days": 0, "archived": 0, "deleted": 0}
+    cutoff = day_bounds(until)[0]
+    after: Optional[datetime.datetime] = None
+    while True:
+        pending = TestSubmission.objects.filter(created_at__lt=cutoff)
+        if after is not None:
+            pending = pending.filter(created_at__gte=after)
+        oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+        if oldest is None:
+            return totals
+        day = timezone.localtime(oldest).date()
+        start, after = day_bounds(day)
+        day_rows = TestSubmission.objects.filter(
+            created_at__gte=start, created_at__lt=after
+        )
+        totals["days"] += 1
+        if dry_run:
+            count = day_rows.count()
+            totals["archived"] += count
+            totals["deleted"] += count
+            log(f"{day}: {count} rows would be compacted")
+            continue
+        max_pk = day_rows.aggregate(max_pk=Max("pk"))["max_pk"]
+        path, archived = archive_day(directory, day, max_pk, chunk_size)
+        deleted = compact_day(day, max_pk, batch_size, pause)
+        totals["archived"] += archived
+        totals["deleted"] += deleted
+        log(f"{day}: {archived} rows archived to {path}, {deleted} deleted")
@@ -0,0 +1,201 @@
+"""Synthetic TestSubmission rows for load and scale testing.
+
+Answers are drawn per question from a weighted distribution over the choice
+labels, where ``""`` stands for a skipped question. Batches are scored with
+``compute_coords_batch`` (same results as ``compute_coords``) and inserted
+with ``bulk_create`` or, on Postgres, ``COPY``. The same seed and options give
+the same rows.
+
+Statistics for the whole run are collected in a ``StatsDelta`` and written
+once at the end instead of per batch, after which ``seed_submissions``
+recounts the answer patterns; run ``rebuild_submission_stats`` and
+``rebuild_answer_patterns`` if a run is interrupted.
+"""
+
+import collections
+import csv
+import datetime
+import io
+import json
+import random
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.db import connection
+
+from .models import TestSubmission
+from .stats import StatsDelta
+from .utils import ANSWER_BITS, CHOICE_CODES, compute_coords_batch, encode_answers
+
+Distribution = Dict[str, float]
+
+DEFAULT_DISTRIBUTION: Distribution = {
+    "A": 0.38,
+    "B": 0.38,
+    "Both": 0.12,
+    "Neither": 0.08,
+    "": 0.04,
+}
+QUESTIONS = [f"q{i}" for i in range(1, 13)]
+
+
+def load_distributions(path: Optional[str]) -> Dict[str, Distribution]:
+    """Per-question distributions from a JSON file.
+
+    The file maps ``"q1"``..``"q12"`` (and optionally ``"default"``) to
+    ``{label: weight}``; questions it leaves out use the default.
+    """
+    config = {}
+    if path:
+        with open(path) as f:
+            config = json.load(f)
+    unknown = set(config) - set(QUESTIONS) - {"default"}
+    if unknown:
+        raise ValueError(f"Unknown keys in distributions: {', '.join(sorted(unknown))}")
+    default = config.get("default", DEFAULT_DISTRIBUTION)
+    distributions = {q: config.get(q, default) for q in QUESTIONS}
+    for q, dist in distributions.items():
+        if not dist or any(w < 0 for w in dist.values()) or not sum(dist.values()):
+            raise ValueError(f"{q}: weights must be non-negative and not all zero")
+    return distributions
+
+
+def generate(
+    count: int,
+    rng: random.Random,
+    distributions: Dict[str, Distribution],
+    end: datetime.datetime,
+    days: int,
+    batch_size: int,
+) -> Iterator[List[TestSubmission]]:
+    """Yield scored, unsaved submissions in batches, created over the ``days``
+    before ``end``."""
+    samplers = [
+        (q, list(dist), _cumulative(dist.values())) for q, dist in distributions.items()
+    ]
+    span = days * 86400
+    while count > 0:
+        n = min(batch_size, count)
+        columns = [
+            (q, rng.choices(labels, cum_weights=cum, k=n))
+            for q, labels, cum in samplers
+        ]
+        answer_sets = [
+            {q: picks[i] for q, picks in columns if picks[i]} for i in range(n)
+        ]
+        offsets = sorted(rng.uniform(0, span) for _ in range(n))
+        batch = [
+            TestSubmission(
+                created_at=end - datetime.timedelta(seconds=span - offset),
+                answers=answers,
+                answers_code=encode_answers(answers),
+                x=x,
+                y=y,
+            )
+            for answers, offset, (x, y) in zip(
+                answer_sets, offsets, compute_coords_batch(answer_sets)
+            )
+        ]
+        yield batch
+        count -= n
+
+
+def synthetic_patterns(
+    count: int,
+    rng: random.Random,
+    distributions: Dict[str, Distribution],
+    chunk_size: int = 1_000_000,
+) -> Tuple[array, array]:
+    """Packed answer codes of ``count`` submissions drawn like ``generate``
+    draws them, without scoring or storing them, as ascending unique codes and
+    their counts (what ``similar.load_index`` reads from ``AnswerPattern``)."""
+    samplers = []
+    for q, dist in distributions.items():
+        unknown = set(dist) - set(CHOICE_CODES) - {""}
+        if unknown:
+            raise ValueError(f"{q}: cannot pack {', '.join(sorted(unknown))}")
+        shift = ANSWER_BITS * (QUESTIONS.index(q))
+        values = [CHOICE_CODES.get(label, 0) << shift for label in dist]
+        samplers.append((values, _cumulative(dist.values())))
+
+    # Partition by the top bits so that sorting each partition in turn sorts
+    # everything without holding all codes as Python ints.
+    shift = ANSWER_BITS * len(QUESTIONS) - 8
+    partitions = [array("q") for _ in range(256)]
+    while count > 0:
+        n = min(chunk_size, count)
+        columns = [
+            rng.choices(values, cum_weights=cum, k=n) for values, cum in samplers
+        ]
+        for code in map(sum, zip(*columns)):
+            partitions[code >> shift].append(code)
+        count -= n
+
+    codes, counts = array("q"), array("I")
+    for i, partition in enumerate(partitions):
+        tally = collections.Counter(partition)
+        partitions[i] = None
+        keys = sorted(tally)
+        codes.extend(keys)
+        counts.extend(map(tally.__getitem__, keys))
+    return codes, counts
+
+
+def _cumulative(weights) -> List[float]:
+    total, out = 0.0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def can_copy() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def insert_batch(
+    batch: List[TestSubmission], delta: StatsDelta, use_copy: bool = False
+) -> None:
+    """Insert a batch and add it to ``delta``."""
+    if use_copy:
+        _copy(batch)
+    else:
+        TestSubmission.objects.bulk_create(batch)
+    delta.add((sub.x, sub.y) for sub in batch)
+
+
+def _copy(batch: List[TestSubmission]) -> None:
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    sql = (
+        f"COPY {TestSubmission._meta.db_table} "
+        "(created_at, answers, answers_code, x, y) FROM STDIN"
+    )
+    with connection.cursor() as cursor:
+        if is_psycopg3:
+            with cursor.copy(sql) as copy:
+                for sub in batch:
+                    copy.write_row(
+                        (
+                            sub.created_at,
+                            json.dumps(sub.answers),
+                            sub.answers_code,
+                            sub.x,
+                            sub.y,
+                        )
+                    )
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for sub in batch:
+            writer.writerow(
+                (
+                    sub.created_at.isoformat(),
+                    json.dumps(sub.answers),
+                    sub.answers_code,
+                    sub.x,
+                    sub.y,
+                )
+            )
+        buffer.seek(0)
+        cursor.copy_expert(sql + " WITH (FORMAT csv)", buffer)
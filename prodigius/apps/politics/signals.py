@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .metrics import db_wrapper
+from .models import Choice, Politician, Question, TestSubmission
+from .nearest import ROSTER_VERSION
+from .utils import CATALOG_VERSION, encode_answers
+from .versions import bump_version
+
+
+def invalidate(name: str) -> None:
+    """Bump a version now and again once the surrounding transaction commits.
+
+    The immediate bump keeps the current process consistent with its own
+    writes; the second one stops another worker from caching rows it read
+    before the commit was visible.
+    """
+    bump_version(name)
+    transaction.on_commit(lambda: bump_version(name))
+
+
+@receiver(post_save, sender=Politician)
+@receiver(post_delete, sender=Politician)
+def invalidate_roster(sender, **kwargs):
+    invalidate(ROSTER_VERSION)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_catalog(sender, **kwargs):
+    invalidate(CATALOG_VERSION)
+
+
+@receiver(pre_save, sender=TestSubmission)
+def pack_answers(sender, instance, **kwargs):
+    # bulk_create skips this; save_submission and seeding pack explicitly.
+    instance.answers_code = encode_answers(instance.answers)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    # Per-request query counts for the metrics middleware.
+    if db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_wrapper)
@@ -0,0 +1,334 @@
+"""Past submissions whose answers nearly match ("people who answered like
+you").
+
+Two answer sets are ``d`` apart when ``d`` of the twelve packed questions got
+a different choice; a skipped question counts as a choice of its own.
+``AnswerPattern`` holds the number of submissions per packed answer code
+(``encode_answers``), and each process keeps those counts in a
+``PatternIndex``: the codes in a sorted ``array`` with their counts alongside,
+12 bytes per pattern, plus a dict of the patterns first seen since the arrays
+were built.
+
+A search treats the sorted codes as a trie, highest question first: each
+step splits the current range of codes by that question's answer with binary
+searches and only follows answers that keep the differences within ``k``.
+Empty branches end at once, and the work is bounded by the number of codes
+within ``k`` of the query (1,105 for ``k = 2``), not by how many submissions
+there are. Pending patterns are scanned, or looked up one neighbour at a time
+when there are more of them than neighbours.
+
+The index is loaded once per process (``startup.warm_up`` does it in the
+gunicorn master) and then, every ``POLITICS_SIMILAR_REFRESH`` seconds, reads
+only the ``AnswerPattern`` rows updated since the last refresh.
+``rebuild_patterns`` recounts the table from the submissions and bumps the
+``PATTERNS_VERSION`` token. A refresh reads that token from the database and
+loads the whole index again when it changed, so patterns the rebuild removed
+drop out in every process, not only the one that ran it.
+"""
+
+import bisect
+import datetime
+import functools
+import heapq
+import itertools
+import math
+import operator
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AnswerPattern, TestSubmission
+from .utils import (
+    ANSWER_BITS,
+    CHOICES,
+    PACKED_QUESTIONS,
+    decode_answers,
+    encode_answers,
+)
+from .versions import bump_version, fetch_version, get_version
+
+PATTERNS_VERSION = "patterns"
+# Skipped plus each choice.
+STATES = len(CHOICES) + 1
+# Rows updated up to this many seconds before the last refresh are read again,
+# in case their transaction committed after it.
+REFRESH_OVERLAP = 60.0
+MERGE_MIN = 4096
+
+_FIELD = (1 << ANSWER_BITS) - 1
+_LOW_BITS = sum(1 << (ANSWER_BITS * q) for q in range(PACKED_QUESTIONS))
+
+
+def distance(a: int, b: int) -> int:
+    """Number of questions whose packed answers differ."""
+    diff = a ^ b
+    # Fold each 3-bit field onto its lowest bit.
+    return ((diff | diff >> 1 | diff >> 2) & _LOW_BITS).bit_count()
+
+
+def neighbourhood_size(k: int) -> int:
+    """Number of codes at most ``k`` from any code."""
+    return sum(
+        math.comb(PACKED_QUESTIONS, d) * (STATES - 1) ** d
+        for d in range(min(k, PACKED_QUESTIONS) + 1)
+    )
+
+
+def neighbours(code: int, k: int) -> Iterator[Tuple[int, int]]:
+    """Every code at most ``k`` from ``code``, with its distance."""
+    yield code, 0
+    flips = []
+    for q in range(PACKED_QUESTIONS):
+        shift = ANSWER_BITS * q
+        current = (code >> shift) & _FIELD
+        flips.append(
+            [(current ^ state) << shift for state in range(STATES) if state != current]
+        )
+    for d in range(1, min(k, PACKED_QUESTIONS) + 1):
+        for questions in itertools.combinations(flips, d):
+            for masks in itertools.product(*questions):
+                yield code ^ functools.reduce(operator.xor, masks), d
+
+
+class Match(NamedTuple):
+    answers: Dict[str, str]
+    count: int
+    distance: int
+
+
+class Similar(NamedTuple):
+    count: int
+    distance: int
+    sample: List[Match]
+
+
+class PatternIndex:
+    """Submission counts per packed answer code, searchable by distance.
+    Not thread-safe while it is being updated."""
+
+    def __init__(self, codes: Iterable[int] = (), counts: Iterable[int] = ()):
+        """``codes`` must be ascending and unique; arrays are used as given."""
+        self.codes = codes if isinstance(codes, array) else array("q", codes)
+        self.counts = counts if isinstance(counts, array) else array("I", counts)
+        self.pending: Dict[int, int] = {}
+        self.total = sum(self.counts)
+
+    @property
+    def size(self) -> int:
+        return len(self.codes) + len(self.pending)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays, without the pending dict."""
+        return (
+            len(self.codes) * self.codes.itemsize
+            + len(self.counts) * self.counts.itemsize
+        )
+
+    def set(self, code: int, count: int) -> None:
+        i = bisect.bisect_left(self.codes, code)
+        if i < len(self.codes) and self.codes[i] == code:
+            self.total += count - self.counts[i]
+            self.counts[i] = count
+        else:
+            self.total += count - self.pending.get(code, 0)
+            self.pending[code] = count
+
+    def merge(self) -> None:
+        """Move the pending patterns into the sorted arrays."""
+        codes, counts = array("q"), array("I")
+        start = 0
+        for code, count in sorted(self.pending.items()):
+            end = bisect.bisect_left(self.codes, code, start)
+            codes.extend(self.codes[start:end])
+            counts.extend(self.counts[start:end])
+            codes.append(code)
+            counts.append(count)
+            start = end
+        codes.extend(self.codes[start:])
+        counts.extend(self.counts[start:])
+        self.codes, self.counts, self.pending = codes, counts, {}
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        yield from zip(self.codes, self.counts)
+        yield from self.pending.items()
+
+    def search(
+        self, code: int, k: int, sample: int = 0
+    ) -> Tuple[int, List[Tuple[int, int, int]]]:
+        """Number of submissions at most ``k`` from ``code``, and up to
+        ``sample`` of their patterns as ``(code, count, distance)``, closest
+        and most common first."""
+        matches = [(d, -self.counts[i], self.codes[i]) for d, i in self._walk(code, k)]
+        if neighbourhood_size(k) < len(self.pending):
+            pending = (
+                (other, self.pending.get(other, 0)) for other, _ in neighbours(code, k)
+            )
+        else:
+            pending = self.pending.items()
+        for other, n in pending:
+            d = distance(code, other)
+            if n and d <= k:
+                matches.append((d, -n, other))
+        total = -sum(match[1] for match in matches)
+        best = heapq.nsmallest(sample, matches) if sample > 0 else []
+        return total, [(other, -n, d) for d, n, other in best]
+
+    def _walk(self, code: int, k: int) -> List[Tuple[int, int]]:
+        """``(distance, position)`` of the sorted codes at most ``k`` from
+        ``code``."""
+        codes = self.codes
+        found = []
+
+        def visit(q, lo, hi, budget, dist):
+            # codes[lo:hi] share their answers to the questions above q.
+            shift = ANSWER_BITS * q
+            width = shift + ANSWER_BITS
+            prefix = codes[lo] >> width << width
+            if budget == 0:
+                target = prefix | (code & ((1 << width) - 1))
+                i = bisect.bisect_left(codes, target, lo, hi)
+                if i < hi and codes[i] == target:
+                    found.append((dist, i))
+                return
+            own = (code >> shift) & _FIELD
+            start = lo
+            for state in range(STATES):
+                end = hi
+                if state < STATES - 1:
+                    end = bisect.bisect_left(
+                        codes, prefix | (state + 1) << shift, start, hi
+                    )
+                if end > start:
+                    cost = state != own
+                    if q == 0:
+                        found.append((dist + cost, start))
+                    else:
+                        visit(q - 1, start, end, budget - cost, dist + cost)
+                start = end
+
+        if codes:
+            visit(PACKED_QUESTIONS - 1, 0, len(codes), k, 0)
+        return found
+
+
+def load_index(chunk_size: int = 10000) -> PatternIndex:
+    rows = (
+        AnswerPattern.objects.filter(count__gt=0)
+        .order_by("code")
+        .values_list("code", "count")
+        .iterator(chunk_size=chunk_size)
+    )
+    codes, counts = array("q"), array("I")
+    for code, count in rows:
+        codes.append(code)
+        counts.append(count)
+    return PatternIndex(codes, counts)
+
+
+def refresh_index(index: PatternIndex, since: datetime.datetime) -> int:
+    """Apply the ``AnswerPattern`` rows updated since ``since``; return how
+    many were read."""
+    rows = AnswerPattern.objects.filter(updated_at__gte=since).values_list(
+        "code", "count"
+    )
+    read = 0
+    for code, count in rows.iterator():
+        index.set(code, count)
+        read += 1
+    if len(index.pending) > max(MERGE_MIN, len(index.codes) // 64):
+        index.merge()
+    return read
+
+
+_lock = threading.Lock()
+_index: Optional[PatternIndex] = None
+_index_version: Optional[str] = None
+_loaded_at: Optional[datetime.datetime] = None
+_refreshed = 0.0
+
+
+def _reload(version: str) -> None:
+    global _index, _index_version, _loaded_at, _refreshed
+    _loaded_at = timezone.now()
+    _index = load_index()
+    _index_version = version
+    _refreshed = time.monotonic()
+
+
+def get_pattern_index() -> PatternIndex:
+    """Return the process-wide index, loading it if the patterns were rebuilt
+    and applying recent changes every ``POLITICS_SIMILAR_REFRESH`` seconds."""
+    global _loaded_at, _refreshed
+    version = get_version(PATTERNS_VERSION)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _reload(version)
+    elif time.monotonic() - _refreshed >= settings.POLITICS_SIMILAR_REFRESH:
+        with _lock:
+            if time.monotonic() - _refreshed >= settings.POLITICS_SIMILAR_REFRESH:
+                # The cached token may predate a rebuild in another process,
+                # and applying updated rows would keep the removed patterns.
+                version = fetch_version(PATTERNS_VERSION)
+                if version != _index_version:
+                    _reload(version)
+                    return _index
+                started = timezone.now()
+                overlap = datetime.timedelta(seconds=REFRESH_OVERLAP)
+                refresh_index(_index, _loaded_at - overlap)
+                _loaded_at = started
+                _refreshed = time.monotonic()
+    return _index
+
+
+def find_similar(
+    answers: Dict[str, str], k: Optional[int] = None, sample: int = 0
+) -> Optional[Similar]:
+    """Past submissions at most ``k`` (``POLITICS_SIMILAR_DISTANCE`` by
+    default) from ``answers``; None when that is 0 or the answers do not
+    pack."""
+    if k is None:
+        k = settings.POLITICS_SIMILAR_DISTANCE
+    code = encode_answers(answers)
+    if k <= 0 or code is None:
+        return None
+    index = get_pattern_index()
+    with _lock:
+        count, best = index.search(code, k, sample)
+    return Similar(
+        count, k, [Match(decode_answers(other), n, d) for other, n, d in best]
+    )
+
+
+def rebuild_patterns() -> int:
+    """Recount ``AnswerPattern`` from the stored submissions and make every
+    process load its index again; return the number of patterns.
+
+    Submissions removed by ``compact_submissions`` are no longer counted
+    afterwards. Submissions inserted while it runs may be missed; run it when
+    writes are quiet.
+    """
+    qn = connection.ops.quote_name
+    now = AnswerPattern._meta.get_field("updated_at").get_db_prep_value(
+        timezone.now(), connection
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        AnswerPattern.objects.all().delete()
+        cursor.execute(
+            f"INSERT INTO {qn(AnswerPattern._meta.db_table)} "
+            f"({qn('code')}, {qn('count')}, {qn('updated_at')}) "
+            f"SELECT {qn('answers_code')}, COUNT(*), %s "
+            f"FROM {qn(TestSubmission._meta.db_table)} "
+            f"WHERE {qn('answers_code')} IS NOT NULL "
+            f"GROUP BY {qn('answers_code')}",
+            [now],
+        )
+        patterns = cursor.rowcount
+    bump_version(PATTERNS_VERSION)
+    return patterns
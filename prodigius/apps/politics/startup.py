@@ -0,0 +1,166 @@
+"""Container boot steps and the gunicorn warm start.
+
+``boot`` (the ``boot`` management command, run by the entrypoints) replaces
+the separate ``migrate``, ``createadmin.sh``, ``setadminpw.py`` and
+``collectstatic`` runs with one process whose steps each skip themselves when
+they would change nothing:
+
+* migrations run only if some are unapplied;
+* the ``admin`` superuser is created if missing, and its password is set to
+  ``admin`` only if it is something else;
+* ``collectstatic`` runs only if the source files differ from the ones
+  recorded in ``STATIC_ROOT/.collectstatic`` by the last run.
+
+``warm_up`` is called by ``gunicorn.conf.py`` in the master when
+``GUNICORN_WARM_START`` preloads the application. It loads the question
+catalog, score table, politician index and answer pattern index, compiles the
+project's templates and resolves the URLconf, then closes database connections
+and pools and cache connections and freezes the garbage collector, so that
+forked workers start with all of it in memory shared copy-on-write with the
+master.
+"""
+
+import gc
+import hashlib
+import os
+from typing import Callable, Dict, List
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.template.autoreload import get_template_directories
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+from .catalog import catalog_etag, get_catalog
+from .nearest import get_index
+from .similar import get_pattern_index
+from .utils import get_score_table
+
+ADMIN_USERNAME = "admin"
+ADMIN_EMAIL = "admin@localhost"
+ADMIN_PASSWORD = "admin"
+STATIC_STAMP = ".collectstatic"
+
+
+def pending_migrations(database: str = DEFAULT_DB_ALIAS) -> List[str]:
+    """Names of the migrations ``migrate`` would apply."""
+    executor = MigrationExecutor(connections[database])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [f"{migration.app_label}.{migration.name}" for migration, _ in plan]
+
+
+def ensure_admin() -> str:
+    """Create the ``admin`` superuser or reset its password; return what was
+    done (``created``, ``password reset`` or ``unchanged``)."""
+    User = get_user_model()
+    user = User.objects.filter(username=ADMIN_USERNAME).first()
+    if user is None:
+        User.objects.create_superuser(ADMIN_USERNAME, ADMIN_EMAIL, ADMIN_PASSWORD)
+        return "created"
+    if user.check_password(ADMIN_PASSWORD):
+        return "unchanged"
+    user.set_password(ADMIN_PASSWORD)
+    user.save(update_fields=["password"])
+    return "password reset"
+
+
+def static_fingerprint() -> str:
+    """Digest of the storage class and the path, size and modification time of
+    every file ``collectstatic`` would copy."""
+    digest = hashlib.sha1(settings.STORAGES["staticfiles"]["BACKEND"].encode())
+    entries = []
+    for finder in finders.get_finders():
+        for path, storage in finder.list(["CVS", ".*", "*~"]):
+            stat = os.stat(storage.path(path))
+            prefix = getattr(storage, "prefix", None) or ""
+            entries.append(f"{prefix}/{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+def collect_static(force: bool = False) -> bool:
+    """Run ``collectstatic`` unless ``STATIC_ROOT`` already holds the current
+    files; return whether it ran."""
+    stamp = os.path.join(settings.STATIC_ROOT, STATIC_STAMP)
+    fingerprint = static_fingerprint()
+    if not force:
+        try:
+            with open(stamp) as f:
+                if f.read().strip() == fingerprint:
+                    return False
+        except OSError:
+            pass
+    call_command("collectstatic", interactive=False, verbosity=0)
+    with open(stamp, "w") as f:
+        f.write(fingerprint + "\n")
+    return True
+
+
+def boot(force: bool = False, log: Callable[[str], None] = lambda line: None) -> None:
+    """Bring the database, admin user and static files up to date."""
+    pending = pending_migrations()
+    if pending or force:
+        log(f"Applying {len(pending)} migrations")
+        call_command("migrate", interactive=False, verbosity=0)
+    else:
+        log("Migrations up to date")
+    log(f"Admin user {ensure_admin()}")
+    if collect_static(force):
+        log("Static files collected")
+    else:
+        log("Static files up to date")
+
+
+def compile_templates() -> int:
+    """Load every template in the project's template directories through the
+    cached loader; return how many were compiled."""
+    count = 0
+    for directory in get_template_directories():
+        if not directory.is_relative_to(settings.BASE_DIR):
+            continue
+        for path in sorted(directory.rglob("*.html")):
+            get_template(path.relative_to(directory).as_posix())
+            count += 1
+    return count
+
+
+def close_pools() -> None:
+    """Close the psycopg connection pools this process opened; their threads
+    do not survive a fork."""
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+
+
+def warm_up() -> Dict[str, int]:
+    """Load the data and templates workers share, then prepare for fork."""
+    questions = get_catalog()
+    get_score_table()
+    index = get_index()
+    catalog_etag()
+    patterns = get_pattern_index().size if settings.POLITICS_SIMILAR_DISTANCE else 0
+    templates = compile_templates()
+    get_resolver().reverse_dict  # imports every urls module
+
+    # Forked workers must not share sockets with the master or each other.
+    connections.close_all()
+    close_pools()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+
+    # Keep the collector from writing to the shared objects' headers, which
+    # would copy their pages into every worker.
+    gc.collect()
+    gc.freeze()
+    return {
+        "questions": len(questions),
+        "politicians": index.size,
+        "patterns": patterns,
+        "templates": templates,
+    }
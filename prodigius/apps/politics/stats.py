@@ -0,0 +1,288 @@
+"""Aggregate statistics over stored submissions.
+
+Two sets of counters are kept over the [-1, 1] spectrum:
+
+* ``HistogramBin``: a ``POLITICS_HISTOGRAM_BINS`` square grid over the x/y
+  plane, drawn as a heatmap by the result chart (``get_distribution``).
+* ``AxisBin``: ``POLITICS_PERCENTILE_BINS`` finer bins along each axis, whose
+  cumulative counts give a percentile rank in constant time
+  (``percentile_ranks``).
+
+New submissions are added with ``record_submissions`` in the same transaction
+as their insert, and ``rebuild_stats`` recounts everything in one streaming
+pass, including compacted ``SubmissionRollup`` rows (use it after changing a
+bin count or rescoring). Reads are cached for ``POLITICS_STATS_TTL`` seconds.
+
+``record_submissions`` also counts each submission's packed answer code in
+``AnswerPattern``, which ``similar.py`` searches; ``similar.rebuild_patterns``
+recounts that table.
+"""
+
+import collections
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    AnswerPattern,
+    AxisBin,
+    HistogramBin,
+    SubmissionRollup,
+    TestSubmission,
+)
+
+DISTRIBUTION_CACHE_KEY = "politics:stats:distribution:{}"
+CUMULATIVE_CACHE_KEY = "politics:stats:cumulative:{}"
+UPSERT_BATCH = 500
+
+Cell = Tuple[int, int]
+
+
+def bin_index(value: float, size: int) -> int:
+    """Index of the bin holding ``value`` on a [-1, 1] axis cut into ``size``."""
+    return max(0, min(size - 1, int((value + 1.0) / 2.0 * size)))
+
+
+class StatsDelta:
+    """Grid and per-axis counts for a batch of points, to be added to the
+    stored statistics with ``apply``."""
+
+    def __init__(self):
+        self.grid_size = settings.POLITICS_HISTOGRAM_BINS
+        self.axis_size = settings.POLITICS_PERCENTILE_BINS
+        self.grid: Dict[Cell, int] = collections.Counter()
+        self.axes: Dict[Tuple[str, int], int] = collections.Counter()
+        self.total = 0
+
+    def add(self, points: Iterable[Tuple[float, float]]) -> "StatsDelta":
+        for x, y in points:
+            self.grid[bin_index(x, self.grid_size), bin_index(y, self.grid_size)] += 1
+            self.axes["x", bin_index(x, self.axis_size)] += 1
+            self.axes["y", bin_index(y, self.axis_size)] += 1
+            self.total += 1
+        return self
+
+    def add_counts(self, rows: Iterable[Tuple[float, float, int]]) -> "StatsDelta":
+        """Add ``n`` points at ``(x, y)`` for each ``(x, y, n)`` row."""
+        for x, y, n in rows:
+            self.grid[bin_index(x, self.grid_size), bin_index(y, self.grid_size)] += n
+            self.axes["x", bin_index(x, self.axis_size)] += n
+            self.axes["y", bin_index(y, self.axis_size)] += n
+            self.total += n
+        return self
+
+    def apply(self) -> None:
+        """Increment the stored counts."""
+        increment_many(
+            HistogramBin,
+            ("size", "ix", "iy"),
+            {(self.grid_size, ix, iy): n for (ix, iy), n in self.grid.items()},
+        )
+        increment_many(
+            AxisBin,
+            ("axis", "size", "index"),
+            {
+                (axis, self.axis_size, index): n
+                for (axis, index), n in self.axes.items()
+            },
+        )
+
+
+def record_submissions(submissions: Iterable[TestSubmission]) -> None:
+    """Add saved submissions to the statistics and the answer pattern counts;
+    call inside their transaction."""
+    submissions = list(submissions)
+    StatsDelta().add((s.x, s.y) for s in submissions).apply()
+    record_patterns(s.answers_code for s in submissions)
+
+
+def record_patterns(codes: Iterable[Optional[int]]) -> None:
+    """Count submissions per packed answer code for ``similar.py``; None
+    codes are skipped."""
+    counts = collections.Counter((code,) for code in codes if code is not None)
+    increment_many(AnswerPattern, ("code",), counts, {"updated_at": timezone.now()})
+
+
+def increment(
+    model, cell: Dict[str, object], values: Optional[Dict] = None, **amounts
+) -> None:
+    """Add ``amounts`` to the fields of the ``cell`` row, creating it if
+    missing, and set the fields in ``values``."""
+    values = values or {}
+    rows = model.objects.filter(**cell)
+    changes = {field: F(field) + n for field, n in amounts.items()}
+    changes.update(values)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**cell, **values, **amounts)
+    except IntegrityError:
+        # Another writer created the row first.
+        rows.update(**changes)
+
+
+def increment_many(
+    model,
+    keys: Sequence[str],
+    amounts: Dict[tuple, int],
+    values: Optional[Dict] = None,
+    field: str = "count",
+) -> None:
+    """Add each of ``amounts`` to ``field`` of the row whose ``keys`` fields
+    hold its key, creating missing rows, and set the fields in ``values``.
+
+    Rows are written in key order, so concurrent writers lock them in the same
+    order, with one ``INSERT ... ON CONFLICT DO UPDATE`` per ``UPSERT_BATCH``
+    rows; one ``increment`` each on databases without that statement.
+    """
+    values = values or {}
+    rows = sorted(amounts.items())
+    connection = connections[router.db_for_write(model)]
+    if not connection.features.supports_update_conflicts_with_target:
+        for key, n in rows:
+            increment(model, dict(zip(keys, key)), values, **{field: n})
+        return
+
+    opts = model._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    column = {name: qn(opts.get_field(name).column) for name in [*keys, field, *values]}
+    fixed = [
+        opts.get_field(name).get_db_prep_save(value, connection)
+        for name, value in values.items()
+    ]
+    updates = [f"{column[field]} = {table}.{column[field]} + EXCLUDED.{column[field]}"]
+    updates += [f"{column[name]} = EXCLUDED.{column[name]}" for name in values]
+    placeholder = "(" + ", ".join(["%s"] * len(column)) + ")"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH):
+            batch = rows[start : start + UPSERT_BATCH]
+            params = []
+            for key, n in batch:
+                params.extend([*key, n, *fixed])
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(column.values())}) "
+                f"VALUES {', '.join([placeholder] * len(batch))} "
+                f"ON CONFLICT ({', '.join(column[name] for name in keys)}) "
+                f"DO UPDATE SET {', '.join(updates)}",
+                params,
+            )
+
+
+def rebuild_stats(chunk_size: int = 5000) -> int:
+    """Recount all statistics for the current bin sizes from all submissions.
+
+    Submissions already compacted into ``SubmissionRollup`` rows are counted
+    at the mean position of their rollup cell. That keeps them in the right
+    grid cell while ``POLITICS_HISTOGRAM_BINS`` is unchanged, but their
+    percentile bins are approximate.
+
+    Returns the number of submissions counted. Submissions inserted while the
+    scan runs may be missed; run it when writes are quiet.
+    """
+    rows = TestSubmission.objects.values_list("x", "y").iterator(chunk_size=chunk_size)
+    counts = StatsDelta().add(rows)
+    rollups = SubmissionRollup.objects.filter(count__gt=0).values_list(
+        "sum_x", "sum_y", "count"
+    )
+    counts.add_counts(
+        (sum_x / n, sum_y / n, n)
+        for sum_x, sum_y, n in rollups.iterator(chunk_size=chunk_size)
+    )
+    with transaction.atomic():
+        HistogramBin.objects.filter(size=counts.grid_size).delete()
+        HistogramBin.objects.bulk_create(
+            HistogramBin(size=counts.grid_size, ix=ix, iy=iy, count=n)
+            for (ix, iy), n in counts.grid.items()
+        )
+        AxisBin.objects.filter(size=counts.axis_size).delete()
+        AxisBin.objects.bulk_create(
+            AxisBin(axis=axis, size=counts.axis_size, index=index, count=n)
+            for (axis, index), n in counts.axes.items()
+        )
+    cache.delete_many(
+        [
+            DISTRIBUTION_CACHE_KEY.format(counts.grid_size),
+            CUMULATIVE_CACHE_KEY.format(counts.axis_size),
+        ]
+    )
+    return counts.total
+
+
+def get_distribution() -> List[Dict[str, float]]:
+    """Non-empty cells as ``{"x", "y", "count", "weight"}`` dicts.
+
+    ``x``/``y`` are the cell centres and ``weight`` is the count relative to
+    the fullest cell, ready to be drawn as a heatmap layer.
+    """
+    size = settings.POLITICS_HISTOGRAM_BINS
+    key = DISTRIBUTION_CACHE_KEY.format(size)
+    cells = cache.get(key)
+    if cells is None:
+        cells = list(
+            HistogramBin.objects.filter(size=size, count__gt=0).values_list(
+                "ix", "iy", "count"
+            )
+        )
+        cache.set(key, cells, settings.POLITICS_STATS_TTL)
+    if not cells:
+        return []
+    peak = max(count for _, _, count in cells)
+    width = 2.0 / size
+    return [
+        {
+            "x": round(-1.0 + (ix + 0.5) * width, 4),
+            "y": round(-1.0 + (iy + 0.5) * width, 4),
+            "count": count,
+            "weight": round(count / peak, 4),
+        }
+        for ix, iy, count in cells
+    ]
+
+
+def get_cumulative() -> Dict[str, List[int]]:
+    """Per axis, ``size + 1`` running totals: entry ``i`` counts the
+    submissions in bins below ``i``."""
+    size = settings.POLITICS_PERCENTILE_BINS
+    key = CUMULATIVE_CACHE_KEY.format(size)
+    cumulative = cache.get(key)
+    if cumulative is None:
+        per_bin = {axis: [0] * size for axis in ("x", "y")}
+        for axis, index, count in AxisBin.objects.filter(size=size).values_list(
+            "axis", "index", "count"
+        ):
+            per_bin[axis][index] = count
+        cumulative = {}
+        for axis, counts in per_bin.items():
+            totals = [0]
+            for count in counts:
+                totals.append(totals[-1] + count)
+            cumulative[axis] = totals
+        cache.set(key, cumulative, settings.POLITICS_STATS_TTL)
+    return cumulative
+
+
+def percentile_rank(totals: List[int], value: float) -> Optional[float]:
+    """Percentile rank of ``value``: the percentage of submissions below it,
+    counting those in its own bin as ties (half below, half above)."""
+    if not totals[-1]:
+        return None
+    index = bin_index(value, len(totals) - 1)
+    below = totals[index] + (totals[index + 1] - totals[index]) / 2.0
+    return 100.0 * below / totals[-1]
+
+
+def percentile_ranks(x: float, y: float) -> Optional[Dict[str, int]]:
+    """Share of test-takers (in whole percent) that ``(x, y)`` is further
+    left and further libertarian than, or None before any submission."""
+    cumulative = get_cumulative()
+    below_x = percentile_rank(cumulative["x"], x)
+    below_y = percentile_rank(cumulative["y"], y)
+    if below_x is None or below_y is None:
+        return None
+    return {"left": round(100.0 - below_x), "libertarian": round(below_y)}
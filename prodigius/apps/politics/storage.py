@@ -0,0 +1,67 @@
+"""Static files storage that fingerprints and precompresses assets.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage (file
+names carry a hash of their content, looked up through ``staticfiles.json``)
+that also writes a ``.gz`` and, when the optional ``brotli`` package is
+installed, a ``.br`` sibling of every text asset after ``collectstatic``
+hashed it. nginx serves those with ``gzip_static`` and marks hashed names
+immutable (see ``nginx/nginx.conf``). Variants that would not be smaller than
+the original are not written.
+
+Until ``collectstatic`` has written a manifest (development, tests) assets
+are served under their plain names, as with the default storage.
+"""
+
+import gzip
+import os
+from typing import Iterable, List, Tuple
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip variants are written
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".json", ".map", ".svg", ".txt", ".xml", ".html")
+MIN_SIZE = 256
+
+
+def compress_file(path: str) -> List[Tuple[str, int]]:
+    """Write the compressed variants of ``path``; return each variant's path
+    and size."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < MIN_SIZE:
+        return []
+    # mtime=0 keeps the output identical across runs.
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) >= len(data):
+            continue
+        with open(path + suffix + ".part", "wb") as f:
+            f.write(compressed)
+        os.replace(path + suffix + ".part", path + suffix)
+        written.append((path + suffix, len(compressed)))
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name: str) -> str:
+        if not self.manifest_hash:
+            return name
+        return super().stored_name(name)
+
+    def post_process(
+        self, paths: dict, dry_run: bool = False, **options
+    ) -> Iterable[tuple]:
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress_file(self.path(name))
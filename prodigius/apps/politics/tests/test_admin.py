@@ -0,0 +1,149 @@
+import datetime
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.politics.admin import TestSubmissionAdmin
+from apps.politics.changelist import (
+    EstimatedCountPaginator,
+    PeriodQuerySet,
+    format_cursor,
+    parse_cursor,
+)
+from apps.politics.models import Choice, Question, TestSubmission
+
+
+def at(month, day, hour=12):
+    return timezone.make_aware(datetime.datetime(2025, month, day, hour))
+
+
+def add_submissions(count, month=1):
+    TestSubmission.objects.bulk_create(
+        TestSubmission(created_at=at(month, 1 + n % 28, n % 24), answers={})
+        for n in range(count)
+    )
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_superuser("admin", "", "admin")
+        self.client.force_login(user)
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in context]
+
+
+class SubmissionAdminTests(AdminTestCase):
+    url = reverse("admin:politics_testsubmission_changelist")
+
+    def test_query_budget_does_not_grow_with_rows(self):
+        add_submissions(5)
+        _, small = self.queries(self.url)
+        add_submissions(300)
+        response, large = self.queries(self.url)
+        self.assertEqual(len(small), len(large))
+        self.assertLessEqual(len(large), 8)
+        self.assertFalse([sql for sql in large if "OFFSET" in sql])
+        self.assertEqual(len(response.context["cl"].result_list), 100)
+
+    def test_cursors_walk_both_ways(self):
+        add_submissions(7)
+        expected = list(TestSubmission.objects.order_by("-created_at", "-pk"))
+        with mock.patch.object(TestSubmissionAdmin, "list_per_page", 3):
+            pages, query = [], ""
+            while query is not None:
+                cl = self.client.get(self.url + query).context["cl"]
+                pages.append(cl.result_list)
+                query = cl.older_url
+            self.assertEqual([len(page) for page in pages], [3, 3, 1])
+            self.assertEqual(sum(pages, []), expected)
+
+            cl = self.client.get(self.url + cl.newer_url).context["cl"]
+            self.assertEqual(cl.result_list, expected[3:6])
+            cl = self.client.get(self.url + cl.newer_url).context["cl"]
+            self.assertEqual(cl.result_list, expected[:3])
+            self.assertIsNone(cl.newer_url)
+            self.assertEqual(cl.newest_url, "?")
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(self.url + "?after=soon")
+        self.assertRedirects(response, self.url + "?e=1")
+
+    def test_date_hierarchy_lists_periods_with_rows(self):
+        add_submissions(3, month=2)
+        add_submissions(3, month=5)
+        response, queries = self.queries(self.url + "?created_at__year=2025")
+        self.assertLessEqual(len(queries), 8)
+        self.assertContains(response, "created_at__month=2")
+        self.assertContains(response, "created_at__month=5")
+        self.assertNotContains(response, "created_at__month=3")
+
+        response = self.client.get(
+            self.url + "?created_at__year=2025&created_at__month=2"
+        )
+        self.assertEqual(len(response.context["cl"].result_list), 3)
+        self.assertContains(response, "created_at__day=3")
+        self.assertNotContains(response, "created_at__day=4&")
+
+
+class PeriodQuerySetTests(TestCase):
+    def test_matches_datetimes(self):
+        for created_at in [at(1, 31, 23), at(3, 1, 0), at(3, 1, 5), at(12, 9)]:
+            TestSubmission.objects.create(created_at=created_at, answers={})
+        queryset = PeriodQuerySet(TestSubmission)
+        for kind in ("year", "month", "day"):
+            with self.assertNumQueries(2):
+                periods = queryset.datetimes("created_at", kind)
+            self.assertEqual(
+                periods, list(TestSubmission.objects.datetimes("created_at", kind))
+            )
+        self.assertEqual(queryset.none().datetimes("created_at", "day"), [])
+
+
+class CursorTests(TestCase):
+    def test_round_trip(self):
+        moment = at(6, 30, 7) + datetime.timedelta(microseconds=123)
+        self.assertEqual(parse_cursor(format_cursor(moment, 42)), (moment, 42))
+
+
+@skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+class EstimatedCountTests(TestCase):
+    def test_large_counts_come_from_the_planner(self):
+        add_submissions(50)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE politics_testsubmission")
+        paginator = EstimatedCountPaginator(TestSubmission.objects.order_by("-pk"), 10)
+        paginator.exact_below = 10
+        with self.assertNumQueries(1):
+            self.assertGreater(paginator.count, 0)
+        self.assertTrue(paginator.estimated)
+
+        paginator = EstimatedCountPaginator(TestSubmission.objects.order_by("-pk"), 10)
+        self.assertEqual(paginator.count, 50)
+        self.assertFalse(paginator.estimated)
+
+
+class ChoiceAdminTests(AdminTestCase):
+    def add_questions(self, count):
+        start = Question.objects.count()
+        for order in range(start, start + count):
+            question = Question.objects.create(
+                text=f"Q{order}?", order=order, axis="x", weight=1.0
+            )
+            Choice.objects.create(question=question, label="A", text="Yes", delta=1.0)
+
+    def test_query_budget_does_not_grow_with_rows(self):
+        url = reverse("admin:politics_choice_changelist")
+        self.add_questions(2)
+        _, small = self.queries(url)
+        self.add_questions(20)
+        _, large = self.queries(url)
+        self.assertEqual(len(small), len(large))
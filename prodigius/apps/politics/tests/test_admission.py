@@ -0,0 +1,103 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.politics import admission, metrics
+from apps.politics.admission import AdmissionController, TokenBuckets
+from apps.politics.models import Politician, TestSubmission
+
+
+class TokenBucketsTests(TestCase):
+    def test_burst_then_refill(self):
+        buckets = TokenBuckets(rate=2.0, burst=2)
+        self.assertEqual(buckets.take("a", 0.0), 0)
+        self.assertEqual(buckets.take("a", 0.0), 0)
+        self.assertAlmostEqual(buckets.take("a", 0.0), 0.5)
+        self.assertEqual(buckets.take("b", 0.0), 0)
+        self.assertEqual(buckets.take("a", 0.5), 0)
+
+    def test_forgets_least_recent_clients(self):
+        buckets = TokenBuckets(rate=1.0, burst=1, max_clients=1)
+        buckets.take("a", 0.0)
+        buckets.take("b", 0.0)
+        self.assertEqual(buckets.take("a", 0.0), 0)
+
+
+class AdmissionControllerTests(TestCase):
+    def test_limits(self):
+        controller = AdmissionController(
+            max_inflight=1, max_queue_wait=1.0, rate=0, burst=0, retry_after=3
+        )
+        self.assertEqual(controller.acquire("a", 2.0), ("queue_timeout", 3))
+        self.assertEqual(controller.acquire("a", 0.5), (None, 0.0))
+        self.assertEqual(controller.acquire("b", None), ("overloaded", 3))
+        controller.release()
+        self.assertEqual(controller.acquire("b", None), (None, 0.0))
+
+
+@override_settings(
+    POLITICS_METRICS_DIR="",
+    POLITICS_ADMISSION_RATE=0.1,
+    POLITICS_ADMISSION_BURST=1,
+    POLITICS_ADMISSION_MAX_QUEUE_WAIT=1.0,
+)
+class AdmissionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        for name in ("_controller", "_controller_key"):
+            patcher = mock.patch.object(admission, name, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        Politician.objects.create(name="Someone", x=0.0, y=0.0, blurb="")
+        self.url = reverse("politics:score")
+
+    def post(self, **headers):
+        return self.client.post(
+            self.url, {"q1": "A"}, HTTP_HX_REQUEST="true", **headers
+        )
+
+    def test_rate_limited_client_gets_busy_fragment(self):
+        self.assertEqual(self.post().status_code, 200)
+        response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "10")
+        self.assertEqual(response["Cache-Control"], "public, max-age=10")
+        self.assertContains(response, "Try again", status_code=429)
+        self.assertEqual(TestSubmission.objects.count(), 1)
+        other = self.post(HTTP_X_FORWARDED_FOR="203.0.113.9, 198.51.100.7")
+        self.assertEqual(other.status_code, 200)
+        self.assertEqual(admission.get_controller().inflight, 0)
+
+    def test_sheds_requests_that_queued_too_long(self):
+        stale = f"t={time.time() - 5:.3f}"
+        response = self.post(HTTP_X_REQUEST_START=stale)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            response["Cache-Control"], f"public, max-age={response['Retry-After']}"
+        )
+        page = self.client.get(reverse("politics:index"), HTTP_X_REQUEST_START=stale)
+        self.assertEqual(page.status_code, 200)
+        self.assertFalse(TestSubmission.objects.exists())
+
+    def test_exports_counters_and_limits(self):
+        self.post(HTTP_X_REQUEST_START=f"t={time.time():.3f}")
+        self.post()
+        text = metrics.render()
+        self.assertIn(
+            'politics_admission_admitted_total{view="politics:score"} 1', text
+        )
+        self.assertIn(
+            'politics_admission_shed_total{view="politics:score",'
+            'reason="rate_limited"} 1',
+            text,
+        )
+        self.assertIn(
+            'politics_queue_wait_seconds_count{view="politics:score"} 1', text
+        )
+        self.assertIn("politics_admission_inflight 0", text)
+        self.assertIn('politics_admission_limit{limit="burst"} 1', text)
+        self.assertIn('politics_admission_limit{limit="max_inflight"} 16', text)
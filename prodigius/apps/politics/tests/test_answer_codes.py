@@ -0,0 +1,91 @@
+import itertools
+import random
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.politics.models import TestSubmission
+from apps.politics.utils import (
+    CHOICES,
+    answer_mask,
+    decode_answers,
+    encode_answers,
+    filter_answers,
+)
+from apps.politics.writebehind import save_submission
+
+
+class EncodeAnswersTests(TestCase):
+    def test_round_trips_every_choice_on_every_question(self):
+        for qnum, choice in itertools.product(range(1, 13), CHOICES):
+            answers = {f"q{qnum}": choice}
+            self.assertEqual(decode_answers(encode_answers(answers)), answers)
+
+    def test_round_trips_random_answer_sets(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            answers = {
+                f"q{i}": rng.choice(CHOICES) for i in range(1, 13) if rng.random() < 0.8
+            }
+            code = encode_answers(answers)
+            self.assertLess(code, 1 << 36)
+            self.assertEqual(decode_answers(code), answers)
+        self.assertEqual(encode_answers({}), 0)
+        self.assertEqual(decode_answers(0), {})
+
+    def test_unpackable_answers(self):
+        for answers in ({"q1": "Maybe"}, {"q13": "A"}, {"x": "A"}, {"q1": ""}):
+            self.assertIsNone(encode_answers(answers))
+
+    def test_answer_mask(self):
+        mask, value = answer_mask({"q1": "B", "q2": ""})
+        self.assertEqual((mask, value), (0b111111, 0b000010))
+        with self.assertRaises(ValueError):
+            answer_mask({"q1": "Maybe"})
+
+
+class AnswersCodeColumnTests(TestCase):
+    def test_filter_answers(self):
+        rows = [
+            {"q3": "A", "q8": "Both"},
+            {"q3": "A", "q8": "Both", "q12": "B"},
+            {"q3": "A", "q8": "B"},
+            {"q8": "Both"},
+        ]
+        for answers in rows:
+            TestSubmission.objects.create(answers=answers)
+        matches = filter_answers(TestSubmission.objects, {"q3": "A", "q8": "Both"})
+        self.assertEqual([s.answers for s in matches.order_by("pk")], rows[:2])
+        skipped = filter_answers(TestSubmission.objects, {"q3": ""})
+        self.assertEqual([s.answers for s in skipped], [rows[3]])
+
+    def test_populated_on_every_write_path(self):
+        sub = TestSubmission.objects.create(answers={"q1": "A"})
+        self.assertEqual(sub.answers_code, 1)
+        sub.answers = {"q1": "Other"}
+        sub.save()
+        sub.refresh_from_db()
+        self.assertIsNone(sub.answers_code)
+
+        save_submission(TestSubmission(answers={"q2": "B"}))
+        self.assertEqual(
+            TestSubmission.objects.get(answers__q2="B").answers_code, 2 << 3
+        )
+
+    def test_backfill_command(self):
+        TestSubmission.objects.bulk_create(
+            [
+                TestSubmission(answers={"q1": "A", "q12": "Neither"}),
+                TestSubmission(answers={"q1": "Maybe"}),
+            ]
+        )
+        out = StringIO()
+        call_command("backfill_answer_codes", chunk_size=1, stdout=out)
+        self.assertIn("2 rows scanned, 1 encoded, 1 cannot be packed", out.getvalue())
+        codes = TestSubmission.objects.order_by("pk").values_list(
+            "answers_code", flat=True
+        )
+        self.assertEqual(
+            list(codes), [encode_answers({"q1": "A", "q12": "Neither"}), None]
+        )
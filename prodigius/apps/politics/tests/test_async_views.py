@@ -0,0 +1,107 @@
+import importlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+
+from apps.politics import urls
+from apps.politics.models import Choice, Politician, Question, TestSubmission
+from apps.politics.views import AsyncIndexView, AsyncScoreView, AsyncTakeView, IndexView
+
+from .test_score_view import TEMPLATES_OVERRIDE
+from .test_scoring import create_questions
+
+
+class AsyncQuestionViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for order in (2, 1):
+            q = Question.objects.create(
+                text=f"Q{order}?", order=order, axis="x", weight=1.0
+            )
+            Choice.objects.create(question=q, label="A", text="A choice", delta=0.0)
+            Choice.objects.create(question=q, label="B", text="B choice", delta=0.0)
+
+    def setUp(self):
+        # The catalog is cached per version token, which outlives the
+        # rollback of other test classes' questions.
+        cache.clear()
+
+    async def test_index_context_in_order(self):
+        request = AsyncRequestFactory().get(reverse("politics:index"))
+        response = await AsyncIndexView.as_view()(request)
+        self.assertEqual(response.template_name, ["politics/index.html"])
+        self.assertEqual([q.order for q in response.context_data["questions"]], [1, 2])
+
+    async def test_take_context_prefetches_choices(self):
+        request = AsyncRequestFactory().get(reverse("politics:test"))
+        response = await AsyncTakeView.as_view()(request)
+        questions = response.context_data["questions"]
+        self.assertEqual(len(questions), 2)
+        # A query here would raise SynchronousOnlyOperation, so this also
+        # checks that the choices were prefetched.
+        for q in questions:
+            self.assertEqual(len(q.choices.all()), 2)
+
+    async def test_take_sets_csrf_cookie_only_when_missing(self):
+        factory = AsyncRequestFactory()
+        request = factory.get(reverse("politics:test"))
+        await AsyncTakeView.as_view()(request)
+        self.assertTrue(request.META.get("CSRF_COOKIE_NEEDS_UPDATE"))
+        request = factory.get(reverse("politics:test"))
+        request.COOKIES[settings.CSRF_COOKIE_NAME] = "x" * 32
+        await AsyncTakeView.as_view()(request)
+        self.assertNotIn("CSRF_COOKIE_NEEDS_UPDATE", request.META)
+
+
+@override_settings(TEMPLATES=TEMPLATES_OVERRIDE)
+class AsyncScoreViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+        Politician.objects.create(name="Near-1", x=-1.00, y=0.90, blurb="")
+        Politician.objects.create(name="Far-1", x=1.00, y=-1.00, blurb="")
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_post_saves_submission_and_renders_nearest(self):
+        post_data = {f"q{i}": "A" for i in range(1, 9)}
+        request = AsyncRequestFactory().post(reverse("politics:score"), post_data)
+        response = await AsyncScoreView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        await sync_to_async(response.render)()
+        self.assertTrue(response.content.startswith(b"Near-1Far-1-1.0"))
+
+        sub = await TestSubmission.objects.aget()
+        self.assertEqual(sub.answers, post_data)
+        self.assertAlmostEqual(sub.x, -1.0)
+
+    async def test_get_is_bad_request(self):
+        request = AsyncRequestFactory().get(reverse("politics:score"))
+        response = await AsyncScoreView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncUrlSwitchTests(TestCase):
+    def reload_urls(self):
+        importlib.reload(urls)
+        importlib.reload(importlib.import_module("config.urls"))
+        clear_url_caches()
+
+    def tearDown(self):
+        self.reload_urls()
+
+    def resolve_after_reload(self, path):
+        self.reload_urls()
+        return resolve(path).func.view_class
+
+    def test_sync_views_by_default(self):
+        self.assertIs(self.resolve_after_reload("/politics/"), IndexView)
+
+    @override_settings(POLITICS_ASYNC_VIEWS=True)
+    def test_async_views_when_enabled(self):
+        self.assertIs(self.resolve_after_reload("/politics/"), AsyncIndexView)
+        self.assertIs(self.resolve_after_reload("/politics/score/"), AsyncScoreView)
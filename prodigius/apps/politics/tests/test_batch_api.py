@@ -0,0 +1,145 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from apps.politics.batch import BatchError, parse_batch
+from apps.politics.memo import score
+from apps.politics.models import AnswerPattern, HistogramBin, Politician, TestSubmission
+from apps.politics.utils import encode_answers
+from apps.politics.views import AsyncBatchScoreView
+
+from .test_scoring import create_questions
+
+ALL_A = {f"q{i}": "A" for i in range(1, 13)}
+MIXED = {"q1": "B", "q4": "Both", "q9": "Neither"}
+AUTH = {"HTTP_AUTHORIZATION": "Bearer partner-key"}
+
+
+def read_lines(response):
+    return [
+        json.loads(line) for line in b"".join(response.streaming_content).splitlines()
+    ]
+
+
+@override_settings(POLITICS_API_KEYS=["other-key", "partner-key"])
+class BatchScoreViewTests(TestCase):
+    url = reverse("politics:score_batch")
+
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+        Politician.objects.create(name="Near-1", x=-1.00, y=0.90, blurb="")
+        Politician.objects.create(name="Near-2", x=-0.90, y=0.90, blurb="")
+        Politician.objects.create(name="Near-3", x=-1.00, y=0.70, blurb="")
+        Politician.objects.create(name="Far-1", x=1.00, y=-1.00, blurb="")
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, data, **extra):
+        body = data if isinstance(data, bytes) else json.dumps(data)
+        return self.client.post(
+            self.url, body, content_type="application/json", **{**AUTH, **extra}
+        )
+
+    def test_results_match_the_form_path(self):
+        answer_sets = [ALL_A, MIXED, ALL_A, {}]
+        response = self.post({"answers": answer_sets})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = read_lines(response)
+        self.assertEqual([line["index"] for line in lines], [0, 1, 2, 3])
+        for answers, line in zip(answer_sets, lines):
+            x, y, nearest = score(answers)
+            self.assertEqual((line["x"], line["y"]), (x, y))
+            self.assertEqual(
+                [p["id"] for p in line["nearest"]], [p.pk for p in nearest]
+            )
+            self.assertNotIn("id", line)
+        self.assertEqual(lines[0]["nearest"][0]["name"], "Near-1")
+        self.assertFalse(TestSubmission.objects.exists())
+
+    def test_scoring_runs_no_queries_once_warm(self):
+        self.post({"answers": [ALL_A]})
+        with self.assertNumQueries(0):
+            lines = read_lines(self.post({"answers": [ALL_A, MIXED] * 50}))
+        self.assertEqual(len(lines), 100)
+
+    def test_save_inserts_every_submission(self):
+        response = self.post(
+            {"answers": [ALL_A, {**MIXED, "q2": ""}, ALL_A], "save": True}
+        )
+        lines = read_lines(response)
+        saved = TestSubmission.objects.in_bulk([line["id"] for line in lines])
+        self.assertEqual(len(saved), 3)
+        self.assertEqual(saved[lines[1]["id"]].answers, MIXED)
+        self.assertEqual(saved[lines[0]["id"]].answers_code, encode_answers(ALL_A))
+        self.assertEqual(saved[lines[2]["id"]].x, lines[2]["x"])
+        self.assertEqual(sum(HistogramBin.objects.values_list("count", flat=True)), 3)
+        self.assertEqual(AnswerPattern.objects.get(code=encode_answers(ALL_A)).count, 2)
+
+    def test_requires_a_known_key(self):
+        self.assertEqual(
+            self.post({"answers": []}, HTTP_AUTHORIZATION="").status_code, 403
+        )
+        response = self.post({"answers": []}, HTTP_AUTHORIZATION="Bearer nope")
+        self.assertEqual(response.status_code, 403)
+        with override_settings(POLITICS_API_KEYS=[]):
+            self.assertEqual(self.post({"answers": []}).status_code, 403)
+        self.assertEqual(self.client.get(self.url, **AUTH).status_code, 405)
+
+    def test_rejects_malformed_batches(self):
+        for body in (b"{", b"[]", {"answers": {}}, {"answers": [[]]}):
+            response = self.post(body)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("error", response.json())
+        response = self.post({"answers": [ALL_A, {"q13": "A"}]})
+        self.assertEqual(
+            response.json(), {"error": "answers[1] has an unknown question 'q13'"}
+        )
+        self.assertEqual(self.post({"answers": [{"q1": 1}]}).status_code, 400)
+        self.assertEqual(self.post({"answers": [], "save": "yes"}).status_code, 400)
+
+    def test_enforces_size_limits(self):
+        with override_settings(POLITICS_API_MAX_ITEMS=2):
+            self.assertEqual(self.post({"answers": [ALL_A] * 2}).status_code, 200)
+            self.assertEqual(self.post({"answers": [ALL_A] * 3}).status_code, 413)
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=100):
+            response = self.post({"answers": [ALL_A] * 3})
+            self.assertEqual(response.status_code, 413)
+        self.assertFalse(TestSubmission.objects.exists())
+
+    async def test_async_view_streams_results(self):
+        body = json.dumps({"answers": [ALL_A, MIXED], "save": True})
+        request = AsyncRequestFactory().post(
+            self.url,
+            body,
+            content_type="application/json",
+            headers={"Authorization": "Bearer partner-key"},
+        )
+        response = await AsyncBatchScoreView.as_view()(request)
+        lines = [
+            json.loads(line)
+            for chunk in [c async for c in response.streaming_content]
+            for line in chunk.splitlines()
+        ]
+        self.assertEqual([line["index"] for line in lines], [0, 1])
+        self.assertEqual(await TestSubmission.objects.acount(), 2)
+        x, y, _ = await sync_to_async(score)(MIXED)
+        self.assertEqual((lines[1]["x"], lines[1]["y"]), (x, y))
+
+
+class ParseBatchTests(TestCase):
+    def test_keeps_answers_in_question_order(self):
+        batch = parse_batch(b'{"answers": [{"q10": "A", "q2": "B", "q3": ""}]}')
+        self.assertEqual(list(batch.answers[0].items()), [("q2", "B"), ("q10", "A")])
+        self.assertFalse(batch.save)
+
+    def test_too_many_items_is_413(self):
+        with override_settings(POLITICS_API_MAX_ITEMS=0):
+            with self.assertRaises(BatchError) as ctx:
+                parse_batch(b'{"answers": [{}]}')
+        self.assertEqual(ctx.exception.status, 413)
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from apps.politics.benchmarks import BASELINE, compare, measure, run_suite
+from apps.politics.models import Politician, Question, TestSubmission
+
+
+class BenchmarkSuiteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_measure_reports_per_call_time(self):
+        calls = []
+        result = measure(lambda: calls.append(1), number=10, repeat=3)
+        self.assertEqual(len(calls), 30)
+        self.assertEqual(result["ops"], 30)
+        self.assertLessEqual(result["min_us"], result["us_per_op"])
+
+    def test_run_suite_times_every_case(self):
+        lines = []
+        results = run_suite([5, 20], [0, 30], repeat=1, log=lines.append)
+        self.assertEqual(
+            list(results),
+            [
+                "score_answer",
+                "compute_coords",
+                "nearest[roster=5]",
+                "nearest[roster=20]",
+                "score_view[submissions=0]",
+                "score_view[submissions=30]",
+            ],
+        )
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(Politician.objects.count(), 20)
+        self.assertEqual(Question.objects.count(), 12)
+        # Sizes are minimums: the 201 posts at size 0 already exceed 30, so
+        # nothing was seeded before the second round of posts.
+        self.assertEqual(TestSubmission.objects.count(), 2 * 201)
+
+    def test_compare_flags_slowdowns_past_threshold(self):
+        baseline = {"a": {"us_per_op": 10.0}, "b": {"us_per_op": 10.0}}
+        results = {
+            "a": {"us_per_op": 11.9},
+            "b": {"us_per_op": 12.5},
+            "new": {"us_per_op": 1.0},
+        }
+        self.assertEqual(compare(results, baseline, 0.2), [("b", 10.0, 12.5, 1.25)])
+
+    def test_compare_uses_fastest_round(self):
+        baseline = {"a": {"us_per_op": 12.0, "min_us": 10.0}}
+        results = {"a": {"us_per_op": 30.0, "min_us": 11.0}}
+        self.assertEqual(compare(results, baseline, 0.2), [])
+
+    def test_committed_baseline_covers_default_suite(self):
+        with open(BASELINE) as f:
+            saved = json.load(f)
+        for key in ("database", "machine", "processor", "cpus", "created"):
+            self.assertIn(key, saved["meta"])
+        self.assertEqual(
+            list(saved["results"]),
+            ["score_answer", "compute_coords"]
+            + [f"nearest[roster={n}]" for n in (10, 100, 1000, 10000)]
+            + [f"score_view[submissions={n}]" for n in (0, 10000, 100000)],
+        )
+
+
+class BenchmarkCommandTests(TestCase):
+    results = {"score_answer": {"us_per_op": 2.0, "min_us": 2.0, "ops": 1}}
+
+    def run_command(self, *args):
+        out = StringIO()
+        with (
+            mock.patch.object(connection.creation, "create_test_db") as create,
+            mock.patch.object(connection.creation, "destroy_test_db") as destroy,
+            mock.patch(
+                "apps.politics.management.commands.benchmark.run_suite",
+                return_value=self.results,
+            ),
+        ):
+            try:
+                call_command("benchmark", *args, stdout=out, stderr=out)
+            finally:
+                create.assert_called_once()
+                destroy.assert_called_once()
+        return out.getvalue()
+
+    def write_json(self, data):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        self.addCleanup(os.unlink, path)
+        return path
+
+    def test_writes_results(self):
+        path = self.write_json({})
+        self.run_command("-o", path)
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(data["results"], self.results)
+        self.assertEqual(data["meta"]["database"], connection.vendor)
+
+    def test_passes_within_threshold(self):
+        baseline = self.write_json({"results": {"score_answer": {"us_per_op": 1.9}}})
+        output = self.run_command("--baseline", baseline)
+        self.assertIn("No regressions", output)
+
+    def test_fails_past_threshold(self):
+        baseline = self.write_json({"results": {"score_answer": {"us_per_op": 1.0}}})
+        with self.assertRaisesMessage(CommandError, "1 benchmark(s) slower"):
+            self.run_command("--baseline", baseline, "--threshold", "0.5")
+
+    def test_compares_against_committed_baseline_by_default(self):
+        output = self.run_command()
+        self.assertIn("Baseline: ", output)
+        self.assertIn("No regressions", output)
+
+    def test_no_baseline(self):
+        output = self.run_command("--no-baseline")
+        self.assertNotIn("Baseline: ", output)
+        self.assertNotIn("No regressions", output)
+
+    def test_warns_when_baseline_is_from_elsewhere(self):
+        baseline = self.write_json(
+            {
+                "meta": {"database": "other", "cpus": os.cpu_count()},
+                "results": {"score_answer": {"us_per_op": 1.9}},
+            }
+        )
+        output = self.run_command("--baseline", baseline)
+        self.assertIn("baseline comes from a different database;", output)
+
+    def test_unreadable_baseline(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "--baseline", "/nonexistent.json")
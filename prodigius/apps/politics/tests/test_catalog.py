@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.politics import catalog
+from apps.politics.catalog import catalog_etag, catalog_version, get_catalog
+from apps.politics.models import Choice, Question
+
+
+class CatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.q2 = Question.objects.create(text="Q2?", order=2, axis="x", weight=1.0)
+        cls.q1 = Question.objects.create(text="Q1?", order=1, axis="x", weight=1.0)
+        cls.choice = Choice.objects.create(
+            question=cls.q1, label="A", text="A", delta=0.0
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Version rows from setUpTestData outlive each test, so the catalog
+        # an earlier test loaded would still count as current.
+        catalog._catalog = (None, [])
+
+    def test_questions_in_order_with_prefetched_choices(self):
+        questions = get_catalog()
+        self.assertEqual([q.order for q in questions], [1, 2])
+        with self.assertNumQueries(0):
+            self.assertEqual([c.label for c in questions[0].choices.all()], ["A"])
+
+    def test_served_from_memory_once_loaded(self):
+        get_catalog()
+        with self.assertNumQueries(0):
+            get_catalog()
+
+    def test_question_and_choice_changes_bump_version(self):
+        version = catalog_version()
+        get_catalog()
+
+        self.q2.text = "Changed?"
+        self.q2.save()
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual(get_catalog()[1].text, "Changed?")
+
+        self.choice.text = "New A"
+        self.choice.save()
+        self.assertEqual(get_catalog()[0].choices.all()[0].text, "New A")
+
+        self.choice.delete()
+        self.assertEqual(list(get_catalog()[0].choices.all()), [])
+
+        self.q1.delete()
+        self.assertEqual([q.order for q in get_catalog()], [2])
+
+    def test_etag_follows_version_and_release(self):
+        etag = catalog_etag()
+        self.assertTrue(etag.startswith(catalog_version()))
+        with override_settings(POLITICS_RELEASE="r2"):
+            catalog._release.cache_clear()
+            self.addCleanup(catalog._release.cache_clear)
+            self.assertEqual(catalog_etag(), f"{catalog_version()}-r2")
+
+    @override_settings(POLITICS_CATALOG_CACHE="default")
+    def test_shared_cache_used_by_cold_process(self):
+        get_catalog()
+        catalog._catalog = (None, [])  # as seen by another worker
+        with self.assertNumQueries(0):
+            questions = get_catalog()
+            self.assertEqual([q.order for q in questions], [1, 2])
+            self.assertEqual(len(questions[0].choices.all()), 1)
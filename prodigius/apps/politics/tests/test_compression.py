@@ -0,0 +1,87 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.politics.models import Choice, Politician, Question
+from apps.politics.storage import compress_file
+
+
+class StaticStorageTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def test_plain_names_before_collectstatic(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            self.assertEqual(static("css/styles.css"), "/static/css/styles.css")
+
+    def test_collectstatic_hashes_and_precompresses(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            url = static("css/styles.css")
+            self.assertRegex(url, r"^/static/css/styles\.[0-9a-f]{12}\.css$")
+            path = staticfiles_storage.path(url[len("/static/") :])
+            with open(path, "rb") as f:
+                original = f.read()
+            with open(path + ".gz", "rb") as f:
+                compressed = f.read()
+        self.assertEqual(gzip.decompress(compressed), original)
+        self.assertLess(len(compressed), len(original) / 3)
+
+    def test_skips_small_and_incompressible_files(self):
+        small = os.path.join(self.static_root, "small.css")
+        noise = os.path.join(self.static_root, "noise.js")
+        with open(small, "w") as f:
+            f.write("a{}")
+        with open(noise, "wb") as f:
+            f.write(os.urandom(4096))
+        self.assertEqual(compress_file(small), [])
+        self.assertEqual(compress_file(noise), [])
+        self.assertEqual(
+            sorted(os.listdir(self.static_root)), ["noise.js", "small.css"]
+        )
+
+
+class ResponseCompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for order in range(1, 4):
+            q = Question.objects.create(
+                text=f"Q{order}?", order=order, axis="x", weight=1.0
+            )
+            Choice.objects.create(question=q, label="A", text="A choice", delta=0.0)
+            Choice.objects.create(question=q, label="B", text="B choice", delta=0.0)
+        Politician.objects.create(name="Someone", x=0.0, y=0.0, blurb="")
+
+    def setUp(self):
+        cache.clear()
+
+    def assertCompressed(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertGreater(
+            len(gzip.decompress(response.content)), len(response.content)
+        )
+
+    def test_take_page(self):
+        url = reverse("politics:test")
+        self.assertCompressed(self.client.get(url, HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertFalse(self.client.get(url).has_header("Content-Encoding"))
+
+    def test_htmx_result(self):
+        response = self.client.post(
+            reverse("politics:score"),
+            {"q1": "A", "q2": "B"},
+            HTTP_HX_REQUEST="true",
+            HTTP_ACCEPT_ENCODING="gzip, br",
+        )
+        self.assertCompressed(response)
@@ -0,0 +1,36 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.politics.models import Politician
+
+
+@skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+class PreparedStatementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def prepared(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT statement FROM pg_prepared_statements")
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_repeated_queries_are_prepared(self):
+        threshold = connection.settings_dict["OPTIONS"]["prepare_threshold"]
+        Politician.objects.create(name="Someone", x=0.0, y=0.0, blurb="")
+        for n in range(threshold + 1):
+            self.client.post(reverse("politics:score"), {"q1": "A"})
+            list(Politician.objects.filter(x__gt=n))
+        statements = self.prepared()
+        self.assertTrue(
+            any(
+                s.startswith('INSERT INTO "politics_testsubmission"')
+                for s in statements
+            )
+        )
+        self.assertTrue(
+            any(s.startswith('SELECT "politics_politician"') for s in statements)
+        )
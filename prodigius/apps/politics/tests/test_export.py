@@ -0,0 +1,183 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.politics.export import COLUMNS, export_stream, parse_bound
+from apps.politics.models import TestSubmission
+from apps.politics.views import AsyncExportView
+
+
+def at(day):
+    return timezone.make_aware(datetime.datetime(2025, 1, day, 12))
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.old = TestSubmission.objects.create(
+            created_at=at(1), answers={"q1": "A", "q12": "Both"}, x=-0.5, y=0.25
+        )
+        cls.new = TestSubmission.objects.create(
+            created_at=at(5), answers={"q2": "Neither"}, x=0.5, y=-0.25
+        )
+
+    def read_csv(self, data: bytes):
+        return list(csv.DictReader(io.StringIO(data.decode())))
+
+    def test_csv_flattens_answers(self):
+        rows = self.read_csv(b"".join(export_stream("csv")))
+        self.assertEqual(list(rows[0]), COLUMNS)
+        self.assertEqual([int(r["id"]) for r in rows], [self.old.pk, self.new.pk])
+        self.assertEqual(rows[0]["q1"], "A")
+        self.assertEqual(rows[0]["q12"], "Both")
+        self.assertEqual(rows[0]["q2"], "")
+        self.assertEqual(float(rows[0]["x"]), -0.5)
+        self.assertEqual(rows[0]["created_at"], at(1).isoformat())
+
+    def test_ndjson_and_date_range(self):
+        data = b"".join(export_stream("ndjson", since=at(2), until=at(6)))
+        lines = [json.loads(line) for line in data.decode().splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["id"], self.new.pk)
+        self.assertEqual(lines[0]["q2"], "Neither")
+        self.assertEqual(lines[0]["y"], -0.25)
+
+    def test_gzip_round_trips(self):
+        plain = b"".join(export_stream("csv"))
+        packed = b"".join(export_stream("csv", compress=True))
+        self.assertEqual(gzip.decompress(packed), plain)
+
+    def test_rows_are_fetched_in_chunks(self):
+        with self.assertNumQueries(1):
+            b"".join(export_stream("csv", chunk_size=1))
+
+    def test_parse_bound(self):
+        self.assertEqual(
+            parse_bound("2025-01-05"), at(5) - datetime.timedelta(hours=12)
+        )
+        self.assertEqual(parse_bound("2025-01-05T12:00:00+00:00"), at(5))
+        self.assertIsNone(parse_bound(""))
+        with self.assertRaises(ValueError):
+            parse_bound("yesterday")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_stream("xml")
+
+
+class ExportCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        TestSubmission.objects.create(created_at=at(1), answers={"q1": "B"})
+        TestSubmission.objects.create(created_at=at(3), answers={"q1": "A"})
+
+    def test_writes_csv_to_stdout(self):
+        out = StringIO()
+        call_command("export_submissions", "--since", "2025-01-02", stdout=out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([r["q1"] for r in rows], ["A"])
+
+    def test_writes_gzip_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "out.ndjson.gz")
+            call_command(
+                "export_submissions", "--format", "ndjson", "--gzip", "-o", path
+            )
+            with gzip.open(path, "rt") as f:
+                self.assertEqual([json.loads(line)["q1"] for line in f], ["B", "A"])
+
+    def test_bad_date(self):
+        with self.assertRaises(CommandError):
+            call_command("export_submissions", "--until", "soon", stdout=StringIO())
+
+
+class ExportViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", password="x", is_staff=True)
+        cls.user = User.objects.create_user("user", password="x")
+        TestSubmission.objects.create(created_at=at(1), answers={"q1": "A"})
+
+    def test_requires_staff(self):
+        url = reverse("politics:export")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_streams_csv(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("politics:export"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="submissions.csv"', response["Content-Disposition"])
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines()[0], ",".join(COLUMNS))
+
+    def test_streams_gzipped_ndjson(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("politics:export"), {"format": "ndjson", "gzip": "1"}
+        )
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn("submissions.ndjson.gz", response["Content-Disposition"])
+        data = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(json.loads(data)["q1"], "A")
+
+    def test_gzipped_export_is_not_compressed_again(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("politics:export"),
+            {"format": "ndjson", "gzip": "1"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+        self.assertFalse(response.has_header("Content-Encoding"))
+        data = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(json.loads(data)["q1"], "A")
+
+    def test_plain_export_is_compressed_in_transit(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("politics:export"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content)).decode()
+        self.assertEqual(body.splitlines()[0], ",".join(COLUMNS))
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.staff)
+        url = reverse("politics:export")
+        self.assertEqual(self.client.get(url, {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"since": "soon"}).status_code, 400)
+
+    async def test_async_view_streams(self):
+        async def auser():
+            return self.staff
+
+        request = AsyncRequestFactory().get(reverse("politics:export"))
+        request.auser = auser
+        response = await AsyncExportView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertIn(b",A,", body)
+
+    async def test_async_view_rejects_anonymous(self):
+        async def auser():
+            return AnonymousUser()
+
+        request = AsyncRequestFactory().get(reverse("politics:export"))
+        request.auser = auser
+        response = await AsyncExportView.as_view()(request)
+        self.assertEqual(response.status_code, 302)
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import RequestFactory, TestCase, override_settings
 from django.urls import resolve, reverse
 
@@ -30,9 +31,14 @@ class IndexViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
         # Create questions with explicit order to verify Meta.ordering = ["order"]
-        Question.objects.create(text="Q3?", order=3)
-        Question.objects.create(text="Q1?", order=1)
-        Question.objects.create(text="Q2?", order=2)
+        Question.objects.create(text="Q3?", order=3, axis="x", weight=1.0)
+        Question.objects.create(text="Q1?", order=1, axis="x", weight=1.0)
+        Question.objects.create(text="Q2?", order=2, axis="x", weight=1.0)
+
+    def setUp(self):
+        # The catalog is cached per version token, which outlives the
+        # rollback of other test classes' questions.
+        cache.clear()
 
     def test_url_resolves_to_indexview(self):
         url = reverse("politics:index")
@@ -63,6 +69,23 @@ class IndexViewTests(TestCase):
         self.assertIn("questions", ctx)
         self.assertEqual([q.order for q in ctx["questions"]], [1, 2, 3])
 
+    def test_conditional_get_answers_304(self):
+        url = reverse("politics:index")
+        resp = self.client.get(url)
+        self.assertIn("no-cache", resp["Cache-Control"])
+        etag = resp["ETag"]
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_etag_changes_with_catalog(self):
+        url = reverse("politics:index")
+        etag = self.client.get(url)["ETag"]
+        Question.objects.create(text="Q4?", order=4, axis="x", weight=1.0)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
     def test_empty_state(self):
         Question.objects.all().delete()
         url = reverse("politics:index")
@@ -0,0 +1,120 @@
+import json
+import os
+import random
+import tempfile
+
+from django.core.cache import cache
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from apps.politics.loadgen import (
+    DEFAULT_CONFIG,
+    Client,
+    Histogram,
+    drive,
+    load_config,
+    percentile,
+    run_mix,
+    score_task,
+    summarize,
+)
+from apps.politics.models import Politician, Question, TestSubmission
+
+
+class LoadgenTests(LiveServerTestCase):
+    def setUp(self):
+        cache.clear()
+        Politician.objects.create(name="P", x=0.0, y=0.0, blurb="")
+
+    def test_score_task_handles_csrf(self):
+        client = Client(self.server_thread.port)
+        self.assertTrue(score_task(client, random.Random(0)))
+        self.assertIn("csrftoken", client.cookies)
+        self.assertEqual(TestSubmission.objects.count(), 1)
+
+    def test_drive_reports_latencies(self):
+        latencies, errors = drive(self.server_thread.port, score_task, 1, 0.3)
+        self.assertEqual(errors, 0)
+        self.assertGreater(len(latencies), 0)
+        self.assertEqual(TestSubmission.objects.count(), len(latencies))
+
+    def test_run_mix_reports_each_endpoint(self):
+        Question.objects.create(text="Q1?", order=1, axis="x", weight=1.0)
+        mix = {"index": 1, "test": 1, "score": 2}
+        # One client: the live server shares a single in-memory SQLite
+        # connection between its threads, so concurrent transactions clash.
+        stats = run_mix(self.server_thread.port, mix, 1, 0.5, seed=3)
+        self.assertEqual(set(stats), {"index", "test", "score"})
+        for endpoint_stats in stats.values():
+            self.assertEqual(endpoint_stats.errors, 0)
+            self.assertGreater(endpoint_stats.latency.count, 0)
+        self.assertEqual(TestSubmission.objects.count(), stats["score"].latency.count)
+
+        rows = {row["endpoint"]: row for row in summarize(stats, 0.5)}
+        total = sum(s.latency.count for s in stats.values())
+        self.assertEqual(rows["all"]["requests"], total)
+        self.assertEqual(rows["all"]["rps"], total / 0.5)
+
+    def test_run_mix_revalidates_pages(self):
+        stats = run_mix(self.server_thread.port, {"index": 1}, 1, 0.3)
+        self.assertEqual(stats["index"].errors, 0)  # 304s count as successes
+
+
+class PercentileTests(SimpleTestCase):
+    def test_percentile(self):
+        values = [i / 100 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.51)
+        self.assertEqual(percentile(values, 99), 1.0)
+        self.assertEqual(percentile([], 99), 0.0)
+
+
+class HistogramTests(SimpleTestCase):
+    def test_small_values_are_exact(self):
+        hist = Histogram()
+        for us in range(1, 101):
+            hist.record(us / 1e6)
+        self.assertEqual(hist.percentile(50), 50)
+        self.assertEqual(hist.percentile(99), 99)
+        self.assertEqual(hist.percentile(100), 100)
+        self.assertEqual((hist.min, hist.max, hist.count), (1, 100, 100))
+
+    def test_large_values_within_precision(self):
+        hist = Histogram()
+        values = [int(1.37**i) + 200 for i in range(40)]
+        for us in values:
+            hist.record(us / 1e6)
+        values.sort()
+        for pct in (50, 90, 99):
+            exact = values[-(-len(values) * pct // 100) - 1]
+            self.assertLessEqual(abs(hist.percentile(pct) - exact) / exact, 1 / 64)
+
+    def test_merge(self):
+        a, b = Histogram(), Histogram()
+        a.record(0.001)
+        b.record(0.003)
+        b.record(0.002)
+        a.merge(b)
+        self.assertEqual((a.count, a.min, a.max), (3, 1000, 3000))
+        self.assertEqual(sum(n for _, n in a.buckets()), 3)
+        self.assertEqual(Histogram().to_dict()["p99_us"], 0)
+
+
+class LoadConfigTests(SimpleTestCase):
+    def write(self, data):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        self.addCleanup(os.unlink, path)
+        return path
+
+    def test_file_then_overrides(self):
+        path = self.write({"concurrency": 4, "mix": {"score": 1}, "seed": 9})
+        config = load_config(path, {"concurrency": 8, "seed": None})
+        self.assertEqual(config["concurrency"], 8)
+        self.assertEqual(config["seed"], 9)
+        self.assertEqual(config["mix"], {"score": 1})
+        self.assertEqual(config["workers"], DEFAULT_CONFIG["workers"])
+
+    def test_rejects_unknown_keys_and_endpoints(self):
+        for data in ({"threads": 2}, {"mix": {"admin": 1}}, {"mix": {"score": 0}}):
+            with self.assertRaises(ValueError):
+                load_config(self.write(data))
@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.politics import memo, metrics
+from apps.politics.memo import ResultMemo, get_memo, score
+from apps.politics.models import Politician, Question
+from apps.politics.utils import compute_coords
+
+
+class ResultMemoTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = ResultMemo(capacity=2)
+        lru.put("g", 1, (0.0, 0.0, []))
+        lru.put("g", 2, (0.5, 0.5, []))
+        self.assertIsNotNone(lru.get("g", 1))
+        lru.put("g", 3, (1.0, 1.0, []))
+        self.assertIsNone(lru.get("g", 2))
+        self.assertIsNotNone(lru.get("g", 1))
+        self.assertEqual(
+            lru.stats(), {"hits": 2, "shared_hits": 0, "misses": 3, "entries": 2}
+        )
+
+    def test_new_generation_empties_it(self):
+        lru = ResultMemo(capacity=10)
+        lru.put("old", 1, (0.0, 0.0, []))
+        self.assertIsNone(lru.get("new", 1))
+        self.assertEqual(lru.stats()["entries"], 0)
+
+
+class ScoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(memo, "_memo", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.near = Politician.objects.create(name="Near", x=-1.0, y=0.9, blurb="")
+        Politician.objects.create(name="Far", x=1.0, y=-1.0, blurb="")
+        self.answers = {f"q{i}": "A" for i in range(1, 9)}
+
+    def test_repeated_pattern_is_served_from_memo(self):
+        x, y, nearest = score(self.answers)
+        self.assertEqual((x, y), compute_coords(self.answers))
+        self.assertEqual(nearest[0], self.near)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                score(dict(reversed(self.answers.items()))), (x, y, nearest)
+            )
+        self.assertEqual(get_memo().stats()["hits"], 1)
+
+    def test_invalidated_by_roster_and_weight_changes(self):
+        score(self.answers)
+        Politician.objects.create(name="Nearer", x=-1.0, y=0.88, blurb="")
+        _, _, nearest = score(self.answers)
+        self.assertEqual(nearest[0].name, "Nearer")
+
+        question = Question.objects.create(text="Q1?", order=1, axis="x", weight=0.0)
+        x, y, _ = score(self.answers)
+        self.assertEqual((x, y), compute_coords(self.answers))
+        question.delete()
+        self.assertEqual(get_memo().stats()["misses"], 3)
+
+    def test_unpackable_answers_are_not_memoized(self):
+        score({"q1": "Maybe"})
+        score({"q1": "Maybe"})
+        self.assertEqual(get_memo().stats()["entries"], 0)
+
+    @override_settings(POLITICS_RESULT_MEMO_SIZE=0)
+    def test_disabled(self):
+        score(self.answers)
+        self.assertIsNone(memo._memo)
+
+    @override_settings(POLITICS_RESULT_CACHE="default")
+    def test_shared_cache_serves_other_workers(self):
+        expected = score(self.answers)
+        memo._memo = None  # as if another worker
+        self.assertEqual(score(self.answers), expected)
+        self.assertEqual(get_memo().stats()["shared_hits"], 1)
+
+    @override_settings(POLITICS_METRICS_DIR="")
+    def test_hit_counts_are_exported(self):
+        score(self.answers)
+        score(self.answers)
+        text = metrics.render()
+        self.assertIn("politics_result_memo_hits_total 1", text)
+        self.assertIn("politics_result_memo_misses_total 1", text)
+        self.assertIn("politics_result_memo_entries 1", text)
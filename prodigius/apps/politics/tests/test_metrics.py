@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.politics import metrics
+from apps.politics.models import Politician
+
+from .test_score_view import TEMPLATES_OVERRIDE
+
+
+def series(text, prefix):
+    """``{line without value: value}`` for the sample lines starting with
+    ``prefix``."""
+    values = {}
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            key, value = line.rsplit(" ", 1)
+            values[key] = float(value)
+    return values
+
+
+class RegistryTests(TestCase):
+    def setUp(self):
+        metrics.registry.clear()
+
+    def test_histogram_buckets_are_cumulative(self):
+        labels = (("view", "v"),)
+        for size in (100, 300, 5000000):
+            metrics.registry.observe("politics_response_size_bytes", labels, size)
+        with override_settings(POLITICS_METRICS_DIR=""):
+            text = metrics.render()
+        buckets = series(text, "politics_response_size_bytes_bucket")
+        self.assertEqual(
+            buckets['politics_response_size_bytes_bucket{view="v",le="256"}'], 1
+        )
+        self.assertEqual(
+            buckets['politics_response_size_bytes_bucket{view="v",le="1024"}'], 2
+        )
+        self.assertEqual(
+            buckets['politics_response_size_bytes_bucket{view="v",le="+Inf"}'], 3
+        )
+        self.assertIn('politics_response_size_bytes_count{view="v"} 3', text)
+        self.assertIn('politics_response_size_bytes_sum{view="v"} 5000400', text)
+        self.assertIn("# TYPE politics_db_queries_total counter", text)
+
+    def test_merges_other_workers_snapshots(self):
+        labels = (("view", "v"),)
+        metrics.registry.inc("politics_db_queries_total", labels, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1.json"), "w") as f:
+                json.dump(
+                    {
+                        "metrics": [
+                            ["politics_db_queries_total", [["view", "v"]], [3]]
+                        ],
+                        "extra": {
+                            "politics_writebehind_depth": 4,
+                            "politics_writebehind_flushed_total": 10,
+                        },
+                    },
+                    f,
+                )
+            with override_settings(POLITICS_METRICS_DIR=directory):
+                text = metrics.render()
+                metrics.dump()
+                self.assertTrue(os.path.exists(metrics._dump_path(os.getpid())))
+        self.assertIn('politics_db_queries_total{view="v"} 5', text)
+        self.assertIn("politics_writebehind_depth 4", text)
+        self.assertIn("politics_writebehind_flushed_total 10", text)
+
+
+@override_settings(TEMPLATES=TEMPLATES_OVERRIDE, POLITICS_METRICS_DIR="")
+class MiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        Politician.objects.create(name="P", x=0.0, y=0.0, blurb="")
+
+    def test_records_view_queries_and_render_time(self):
+        self.client.post(reverse("politics:score"), {"q1": "A"})
+        text = metrics.render()
+        durations = series(text, "politics_request_duration_seconds_count")
+        key = (
+            "politics_request_duration_seconds_count"
+            '{view="politics:score",method="POST",status="2xx"}'
+        )
+        self.assertEqual(durations, {key: 1})
+        queries = series(text, "politics_db_queries_total")
+        self.assertGreater(
+            queries['politics_db_queries_total{view="politics:score"}'], 0
+        )
+        render = series(text, "politics_template_render_seconds_total")
+        self.assertGreater(
+            render['politics_template_render_seconds_total{view="politics:score"}'], 0
+        )
+
+    def test_unmatched_paths_share_a_label(self):
+        self.client.get("/no/such/page/")
+        self.client.get("/another/")
+        text = metrics.render()
+        self.assertIn(
+            'politics_request_duration_seconds_count{view="unmatched",method="GET",'
+            'status="4xx"} 2',
+            text,
+        )
+
+
+@override_settings(POLITICS_METRICS_DIR="", METRICS_TOKEN="s3cret")
+class MetricsViewTests(TestCase):
+    def test_requires_token_or_staff(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        self.assertIn(
+            b"# TYPE politics_request_duration_seconds histogram", response.content
+        )
+
+        staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_is_not_accepted(self):
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
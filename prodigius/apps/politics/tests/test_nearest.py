@@ -0,0 +1,86 @@
+import math
+import random
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.politics.models import Politician
+from apps.politics.nearest import PoliticianIndex, get_index, nearest_politicians
+
+
+def brute_force(roster, x, y, k):
+    return sorted(roster, key=lambda p: (math.hypot(p.x - x, p.y - y), p.pk))[:k]
+
+
+class PoliticianIndexTests(TestCase):
+    def test_matches_full_sort_on_random_rosters(self):
+        rng = random.Random(42)
+        for size in (1, 2, 5, 50, 500):
+            roster = [
+                Politician(pk=i, x=rng.uniform(-1, 1), y=rng.uniform(-1, 1))
+                for i in range(1, size + 1)
+            ]
+            index = PoliticianIndex(roster)
+            for _ in range(50):
+                x, y = rng.uniform(-1.2, 1.2), rng.uniform(-1.2, 1.2)
+                for k in (1, 3, 7):
+                    self.assertEqual(
+                        [p.pk for p in index.nearest(x, y, k)],
+                        [p.pk for p in brute_force(roster, x, y, k)],
+                    )
+
+    def test_ties_broken_by_primary_key(self):
+        # Four politicians on a unit circle around the origin, plus duplicates.
+        coords = [(1, 0), (0, 1), (-1, 0), (0, -1), (1, 0), (0, 1)]
+        roster = [Politician(pk=i, x=x, y=y) for i, (x, y) in enumerate(coords, 1)]
+        index = PoliticianIndex(roster)
+        self.assertEqual([p.pk for p in index.nearest(0, 0, 3)], [1, 2, 3])
+
+    def test_points_outside_unit_square(self):
+        roster = [
+            Politician(pk=1, x=10, y=10),
+            Politician(pk=2, x=-5, y=0),
+            Politician(pk=3, x=0.5, y=0.5),
+        ]
+        index = PoliticianIndex(roster)
+        self.assertEqual([p.pk for p in index.nearest(0, 0, 3)], [3, 2, 1])
+
+    def test_k_larger_than_roster_and_non_positive(self):
+        roster = [Politician(pk=1, x=0, y=0), Politician(pk=2, x=1, y=1)]
+        index = PoliticianIndex(roster)
+        self.assertEqual(len(index.nearest(0, 0, 10)), 2)
+        self.assertEqual(index.nearest(0, 0, 0), [])
+        self.assertEqual(PoliticianIndex([]).nearest(0, 0, 3), [])
+
+
+class NearestPoliticiansTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_lookup_is_served_from_memory_once_built(self):
+        Politician.objects.create(name="A", x=0.1, y=0.1, blurb="")
+        nearest_politicians(0, 0)
+        with self.assertNumQueries(0):
+            self.assertEqual([p.name for p in nearest_politicians(0, 0)], ["A"])
+
+    def test_rebuilt_after_save_and_delete(self):
+        a = Politician.objects.create(name="A", x=0.5, y=0.5, blurb="")
+        self.assertEqual([p.name for p in nearest_politicians(0, 0)], ["A"])
+
+        b = Politician.objects.create(name="B", x=0.1, y=0.1, blurb="")
+        self.assertEqual([p.name for p in nearest_politicians(0, 0)], ["B", "A"])
+
+        a.x = a.y = 0.0
+        a.save()
+        self.assertEqual([p.name for p in nearest_politicians(0, 0)], ["A", "B"])
+
+        b.delete()
+        self.assertEqual([p.name for p in nearest_politicians(0, 0)], ["A"])
+        self.assertEqual(get_index().size, 1)
+
+    @override_settings(POLITICS_NEAREST_K=1)
+    def test_k_from_settings(self):
+        Politician.objects.create(name="A", x=0.1, y=0.1, blurb="")
+        Politician.objects.create(name="B", x=0.2, y=0.2, blurb="")
+        self.assertEqual([p.name for p in nearest_politicians(0, 0)], ["A"])
+        self.assertEqual(len(nearest_politicians(0, 0, k=2)), 2)
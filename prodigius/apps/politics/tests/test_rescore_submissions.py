@@ -0,0 +1,53 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.politics.models import HistogramBin, TestSubmission
+from apps.politics.utils import compute_coords
+
+
+class RescoreSubmissionsCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.answers = [
+            {f"q{i}": "A" for i in range(1, 13)},
+            {f"q{i}": "B" for i in range(1, 13)},
+            {"q3": "Both", "q5": "B"},
+            {},
+            {"q8": "Both"},
+        ]
+        for answers in cls.answers:
+            TestSubmission.objects.create(answers=answers, x=0.5, y=0.5)
+
+    def setUp(self):
+        cache.clear()
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("rescore_submissions", "--chunk-size", "2", *args, stdout=out)
+        return out.getvalue()
+
+    def test_rewrites_coordinates_in_chunks(self):
+        output = self.run_command()
+        for sub in TestSubmission.objects.all():
+            self.assertEqual((sub.x, sub.y), compute_coords(sub.answers))
+        self.assertIn("2 rows scanned", output)
+        self.assertIn("Done: 5 rows scanned, 5 updated", output)
+        self.assertIn("rows/s", output)
+
+    def test_unchanged_rows_are_not_counted(self):
+        self.run_command()
+        output = self.run_command()
+        self.assertIn("Done: 5 rows scanned, 0 updated", output)
+
+    def test_dry_run_does_not_write(self):
+        output = self.run_command("--dry-run")
+        self.assertIn("5 would change", output)
+        self.assertEqual(TestSubmission.objects.filter(x=0.5, y=0.5).count(), 5)
+
+    def test_rebuilds_histogram_after_changes(self):
+        self.run_command()
+        total = sum(HistogramBin.objects.values_list("count", flat=True))
+        self.assertEqual(total, 5)
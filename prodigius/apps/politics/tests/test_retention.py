@@ -0,0 +1,99 @@
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.politics.models import AxisBin, HistogramBin, SubmissionRollup, TestSubmission
+from apps.politics.retention import archive_path, compact
+from apps.politics.stats import rebuild_stats
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime.datetime(2025, 1, day, hour))
+
+
+class CompactTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        for day, hour, x, y in [
+            (1, 9, -0.5, 0.5),
+            (1, 23, -0.48, 0.52),
+            (2, 0, 0.9, -0.9),
+            (5, 12, 0.0, 0.0),
+        ]:
+            TestSubmission.objects.create(
+                created_at=at(day, hour), answers={"q1": "A"}, x=x, y=y
+            )
+
+    def read_archive(self, name):
+        with gzip.open(os.path.join(self.directory, name), "rt") as f:
+            return [json.loads(line) for line in f]
+
+    def test_archives_rolls_up_and_deletes_old_days(self):
+        totals = compact(datetime.date(2025, 1, 5), self.directory, batch_size=1)
+        self.assertEqual(totals, {"days": 2, "archived": 3, "deleted": 3})
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ["submissions-2025-01-01.ndjson.gz", "submissions-2025-01-02.ndjson.gz"],
+        )
+        rows = self.read_archive("submissions-2025-01-01.ndjson.gz")
+        self.assertEqual([row["x"] for row in rows], [-0.5, -0.48])
+        self.assertEqual(rows[0]["q1"], "A")
+
+        self.assertEqual(TestSubmission.objects.get().created_at, at(5))
+        rollups = SubmissionRollup.objects.order_by("day")
+        self.assertEqual([(r.day.day, r.count) for r in rollups], [(1, 2), (2, 1)])
+        self.assertAlmostEqual(rollups[0].sum_x, -0.98)
+        self.assertAlmostEqual(rollups[0].sum_y, 1.02)
+
+    def test_rebuild_counts_rollups(self):
+        rebuild_stats()
+        before = sorted(HistogramBin.objects.values_list("ix", "iy", "count"))
+        compact(datetime.date(2025, 1, 5), self.directory)
+        rebuild_stats()
+        after = sorted(HistogramBin.objects.values_list("ix", "iy", "count"))
+        self.assertEqual(after, before)
+        total = sum(AxisBin.objects.filter(axis="x").values_list("count", flat=True))
+        self.assertEqual(total, 4)
+
+    def test_never_overwrites_an_archive(self):
+        compact(datetime.date(2025, 1, 2), self.directory)
+        TestSubmission.objects.create(created_at=at(1, 10), x=0.1, y=0.1)
+        compact(datetime.date(2025, 1, 2), self.directory)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            ["submissions-2025-01-01.1.ndjson.gz", "submissions-2025-01-01.ndjson.gz"],
+        )
+        self.assertEqual(
+            len(self.read_archive("submissions-2025-01-01.1.ndjson.gz")), 1
+        )
+        self.assertEqual(SubmissionRollup.objects.get(ix=11).count, 1)
+        self.assertEqual(
+            archive_path(self.directory, datetime.date(2025, 1, 1)),
+            os.path.join(self.directory, "submissions-2025-01-01.2.ndjson.gz"),
+        )
+
+    def test_dry_run_changes_nothing(self):
+        totals = compact(datetime.date(2025, 1, 5), self.directory, dry_run=True)
+        self.assertEqual(totals, {"days": 2, "archived": 3, "deleted": 3})
+        self.assertEqual(TestSubmission.objects.count(), 4)
+        self.assertFalse(SubmissionRollup.objects.exists())
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            "compact_submissions", keep_days=0, archive_dir=self.directory, stdout=out
+        )
+        self.assertIn("4 rows archived, 4 deleted", out.getvalue())
+        self.assertFalse(TestSubmission.objects.exists())
+        with self.assertRaises(CommandError):
+            call_command("compact_submissions", keep_days=-1, stdout=StringIO())
@@ -1,7 +1,12 @@
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from apps.politics.models import Politician, TestSubmission
+from apps.politics.nearest import ROSTER_VERSION
+from apps.politics.versions import bump_version
+
+from .test_scoring import create_questions
 
 # Provide an in-memory template so assertTemplateUsed works.
 TEMPLATES_OVERRIDE = [
@@ -32,12 +37,17 @@ class ScoreViewTests(TestCase):
     def setUpTestData(cls):
         # Politicians placed so we can verify nearest-3 ordering precisely.
         # Target point for "all A" answers is approximately (-1.0, 0.876923...)
+        create_questions()
         Politician.objects.create(name="Near-1", x=-1.00, y=0.90)  # closest
         Politician.objects.create(name="Near-2", x=-0.90, y=0.90)  # next
         Politician.objects.create(name="Near-3", x=-1.00, y=0.70)  # third
         Politician.objects.create(name="Far-1", x=1.00, y=-1.00)  # far away
         Politician.objects.create(name="Far-2", x=0.50, y=0.00)  # also far
 
+    def setUp(self):
+        # Drop score tables cached from catalog rows of earlier test classes.
+        cache.clear()
+
     def test_get_is_bad_request(self):
         resp = self.client.get(reverse("politics:score"))
         self.assertEqual(resp.status_code, 400)
@@ -122,3 +132,39 @@ class ScoreViewTests(TestCase):
         resp = self.client.post(url, data={})  # origin (0,0)
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(len(resp.context["nearest"]), 3)
+
+
+class ResultFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+
+    def setUp(self):
+        cache.clear()
+        self.near = Politician.objects.create(name="Near", x=-1.0, y=0.9, blurb="b")
+        Politician.objects.create(name="Far", x=1.0, y=-1.0, blurb="b")
+
+    def post(self, answers):
+        return self.client.post(reverse("politics:score"), answers).content.decode()
+
+    def test_figures_follow_the_politician_set_and_edits(self):
+        left = {f"q{i}": "A" for i in range(1, 9)}
+        right = {f"q{i}": "B" for i in range(1, 9)}
+        with override_settings(POLITICS_NEAREST_K=1):
+            self.assertIn("Near", self.post(left))
+            self.assertNotIn("Near", self.post(right))
+            self.near.name = "Renamed"
+            self.near.save()
+            content = self.post(left)
+        self.assertIn("label: 'Renamed'", content)
+        self.assertEqual(content.count("Renamed"), 2)  # chart and figures
+
+    def test_figures_follow_bulk_updates_after_a_roster_bump(self):
+        left = {f"q{i}": "A" for i in range(1, 9)}
+        with override_settings(POLITICS_NEAREST_K=1):
+            self.assertIn("Near", self.post(left))
+            Politician.objects.filter(pk=self.near.pk).update(name="Bulk")
+            bump_version(ROSTER_VERSION)
+            content = self.post(left)
+        self.assertEqual(content.count("Bulk"), 2)
+        self.assertNotIn("Near", content)
@@ -1,18 +1,73 @@
+import itertools
+import random
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
+from apps.politics.models import Choice, Question
+
 # If your module path differs, update the import below.
-from ..utils import Q_AXIS, compute_coords, score_answer
+from ..utils import (
+    CHOICES,
+    compile_score_table,
+    compute_coords,
+    compute_coords_batch,
+    score_answer,
+)
+
+# The twelve questions' scoring as migration 0005 seeded it:
+# question number -> (axis, weight, delta per choice).
+X_DELTAS = {"A": -1.0, "B": 1.0}
+Y_DELTAS = {"A": 1.0, "B": -1.0, "Both": 0.3}
+SCORING = {
+    1: ("x", 1.0, X_DELTAS),
+    2: ("x", 1.0, X_DELTAS),
+    3: ("y", 1.0, Y_DELTAS),
+    4: ("x", 1.0, X_DELTAS),
+    5: ("x", 0.8, X_DELTAS),
+    6: ("y", 0.8, Y_DELTAS),
+    7: ("x", 0.8, X_DELTAS),
+    8: ("y", 0.8, {"A": 0.6, "B": 0.6, "Both": 1.0}),
+    9: ("y", 0.9, Y_DELTAS),
+    10: ("y", 0.7, Y_DELTAS),
+    11: ("x", 0.9, X_DELTAS),
+    12: ("x", 0.8, X_DELTAS),
+}
+
+
+def create_questions(scoring=SCORING):
+    """Question rows with A/B choices for ``scoring``."""
+    for qnum, (axis, weight, deltas) in scoring.items():
+        question = Question.objects.create(
+            text=f"Q{qnum}?",
+            order=qnum,
+            axis=axis,
+            weight=weight,
+            both_delta=deltas.get("Both", 0.0),
+        )
+        for label in ("A", "B"):
+            Choice.objects.create(
+                question=question, label=label, text=label, delta=deltas[label]
+            )
 
 
 class ScoreAnswerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+
+    def setUp(self):
+        cache.clear()
+
     def test_x_axis_rules(self):
         # X-axis standard rule: A -> -weight, B -> +weight, other -> 0
-        w1 = Q_AXIS[1][1]
+        w1 = SCORING[1][1]
         self.assertAlmostEqual(score_answer(1, "A"), -1.0 * w1)
         self.assertAlmostEqual(score_answer(1, "B"), 1.0 * w1)
         self.assertAlmostEqual(score_answer(1, "C"), 0.0)
 
-        w5 = Q_AXIS[5][1]
+        w5 = SCORING[5][1]
         self.assertAlmostEqual(score_answer(5, "A"), -1.0 * w5)
         self.assertAlmostEqual(score_answer(5, "B"), 1.0 * w5)
         self.assertAlmostEqual(score_answer(5, "Both"), 0.0)
@@ -20,7 +75,7 @@ class ScoreAnswerTests(TestCase):
     def test_y_axis_special_q3_q6(self):
         # q3 & q6: A=+1, B=-1, Both=0.3, other=0 (times weight)
         for qnum in (3, 6):
-            _, w = Q_AXIS[qnum]
+            w = SCORING[qnum][1]
             self.assertAlmostEqual(score_answer(qnum, "A"), 1.0 * w)
             self.assertAlmostEqual(score_answer(qnum, "B"), -1.0 * w)
             self.assertAlmostEqual(score_answer(qnum, "Both"), 0.3 * w)
@@ -29,7 +84,7 @@ class ScoreAnswerTests(TestCase):
     def test_y_axis_special_q8(self):
         # q8: A=0.6, B=0.6, Both=1.0, other=0 (times weight)
         qnum = 8
-        _, w = Q_AXIS[qnum]
+        w = SCORING[qnum][1]
         self.assertAlmostEqual(score_answer(qnum, "A"), 0.6 * w)
         self.assertAlmostEqual(score_answer(qnum, "B"), 0.6 * w)
         self.assertAlmostEqual(score_answer(qnum, "Both"), 1.0 * w)
@@ -37,20 +92,31 @@ class ScoreAnswerTests(TestCase):
 
 
 class ScoreAnswerDefaultYTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
     def test_y_axis_default_branch(self):
-        # Create a fake Y-axis entry not in (3, 6, 8)
-        Q_AXIS[99] = ("y", 2.0)  # test-only injection
-        try:
-            self.assertAlmostEqual(score_answer(99, "A"), 2.0)
-            self.assertAlmostEqual(score_answer(99, "B"), -2.0)
-            self.assertAlmostEqual(score_answer(99, "Both"), 0.6)
-            self.assertAlmostEqual(score_answer(99, "C"), 0.0)
-        finally:
-            # Clean up to avoid side effects on other tests
-            Q_AXIS.pop(99, None)
+        # A Y-axis question outside the twelve, scored from its own rows
+        create_questions({99: ("y", 2.0, Y_DELTAS)})
+        self.assertAlmostEqual(score_answer(99, "A"), 2.0)
+        self.assertAlmostEqual(score_answer(99, "B"), -2.0)
+        self.assertAlmostEqual(score_answer(99, "Both"), 0.6)
+        self.assertAlmostEqual(score_answer(99, "C"), 0.0)
+
+    def test_question_without_row_is_not_scored(self):
+        self.assertEqual(score_answer(1, "A"), 0.0)
+        self.assertEqual(compute_coords({"q1": "A", "q3": "A"}), (0.0, 0.0))
 
 
 class ComputeCoordsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+
+    def setUp(self):
+        # Drop score tables cached from catalog rows of earlier test classes.
+        cache.clear()
+
     def test_all_A(self):
         """
         X-axis (q1,2,4,5,7): each A => -weight => average -1.0
@@ -124,3 +190,137 @@ class ComputeCoordsTests(TestCase):
         # Specifically:
         self.assertAlmostEqual(x, 1.0)
         self.assertAlmostEqual(y, 1.0)  # 2.6 / 2.6 == 1.0
+
+
+class ComputeCoordsBatchTests(TestCase):
+    """The batch scorer must agree exactly with compute_coords."""
+
+    VALUES = (None, "", "A", "B", "Both", "Neither", "C")
+
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+
+    def setUp(self):
+        # Drop score tables cached from catalog rows of earlier test classes.
+        cache.clear()
+
+    def answers_from(self, values):
+        return {
+            f"q{qnum}": value
+            for qnum, value in zip(SCORING, values)
+            if value is not None
+        }
+
+    def test_every_choice_on_every_question(self):
+        answer_sets = [
+            {f"q{qnum}": value}
+            for qnum in SCORING
+            for value in self.VALUES
+            if value is not None
+        ]
+        self.assertEqual(
+            compute_coords_batch(answer_sets),
+            [compute_coords(a) for a in answer_sets],
+        )
+
+    def test_exhaustive_over_first_four_questions(self):
+        rng = random.Random(1)
+        answer_sets = []
+        for head in itertools.product(self.VALUES, repeat=4):
+            tail = [rng.choice(self.VALUES) for _ in range(len(SCORING) - 4)]
+            answer_sets.append(self.answers_from(list(head) + tail))
+        self.assertEqual(
+            compute_coords_batch(answer_sets),
+            [compute_coords(a) for a in answer_sets],
+        )
+
+    def test_random_answer_sets_with_repeats(self):
+        rng = random.Random(2)
+        patterns = [
+            self.answers_from([rng.choice(self.VALUES) for _ in SCORING])
+            for _ in range(500)
+        ]
+        answer_sets = [rng.choice(patterns) for _ in range(5000)]
+        self.assertEqual(
+            compute_coords_batch(answer_sets),
+            [compute_coords(a) for a in answer_sets],
+        )
+
+    def test_ignores_unknown_keys_and_accepts_table(self):
+        table = compile_score_table()
+        answer_sets = [{"q1": "A", "q99": "B", "name": "x"}, {}]
+        self.assertEqual(
+            compute_coords_batch(answer_sets, table), [(-1.0, 0.0), (0.0, 0.0)]
+        )
+
+
+class CatalogScoreTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_table_holds_only_catalog_rows(self):
+        self.assertEqual(compile_score_table(), [])
+        create_questions()
+        table = compile_score_table()
+        self.assertEqual([row[0] for row in table], list(SCORING))
+        self.assertEqual(table[7], (8, "y", 0.8, (0.0, 0.48, 0.48, 0.8, 0.0, 0.0)))
+        rng = random.Random(3)
+        for _ in range(200):
+            answers = {f"q{q}": rng.choice(CHOICES) for q in SCORING}
+            self.assertEqual(
+                compute_coords(answers), compute_coords_batch([answers], table)[0]
+            )
+
+    def test_deleted_question_is_not_scored(self):
+        create_questions({1: SCORING[1], 3: SCORING[3]})
+        self.assertEqual(compute_coords({"q1": "A", "q3": "A"}), (-1.0, 1.0))
+        Question.objects.get(order=3).delete()
+        self.assertEqual(compute_coords({"q1": "A", "q3": "A"}), (-1.0, 0.0))
+
+    def test_scoring_fields_are_required(self):
+        with transaction.atomic(), self.assertRaises(IntegrityError):
+            Question.objects.create(text="Q13?", order=13, axis="y")
+        question = Question.objects.create(text="Q13?", order=13, axis="y", weight=2)
+        with transaction.atomic(), self.assertRaises(IntegrityError):
+            Choice.objects.create(question=question, label="A", text="A")
+
+    def test_weights_come_from_question_and_choice_rows(self):
+        question = Question.objects.create(
+            text="Q1?", order=1, axis="y", weight=0.5, both_delta=0.4
+        )
+        Choice.objects.create(question=question, label="A", text="A", delta=1.0)
+        Choice.objects.create(question=question, label="B", text="B", delta=-0.5)
+        self.assertAlmostEqual(compute_coords({"q1": "A"})[1], 1.0)
+        self.assertAlmostEqual(compute_coords({"q1": "B"})[1], -0.5)
+        self.assertAlmostEqual(compute_coords({"q1": "Both"})[1], 0.4)
+        self.assertAlmostEqual(compute_coords({"q1": "Neither"})[1], 0.0)
+        self.assertEqual(compute_coords({"q1": "A"})[0], 0.0)
+
+    def test_choice_row_overrides_question_fallback(self):
+        question = Question.objects.create(
+            text="Q3?", order=3, axis="y", weight=1.0, both_delta=0.2
+        )
+        Choice.objects.create(question=question, label="Both", text="", delta=-1.0)
+        self.assertAlmostEqual(compute_coords({"q3": "Both"})[1], -1.0)
+
+    def test_table_recompiled_after_catalog_edits(self):
+        question = Question.objects.create(text="Q1?", order=1, axis="x", weight=1.0)
+        choice = Choice.objects.create(question=question, label="A", text="A", delta=0)
+        self.assertEqual(compute_coords({"q1": "A"}), (0.0, 0.0))
+
+        choice.delta = -1.0
+        choice.save()
+        self.assertEqual(compute_coords({"q1": "A"}), (-1.0, 0.0))
+
+        question.axis = "y"
+        question.save()
+        self.assertEqual(compute_coords({"q1": "A"}), (0.0, -1.0))
+
+        question.delete()
+        self.assertEqual(compute_coords({"q1": "A"}), (0.0, 0.0))
+
+    def test_cached_table_needs_no_queries(self):
+        compute_coords({"q1": "A"})
+        with self.assertNumQueries(0):
+            compute_coords({"q1": "A"})
@@ -0,0 +1,113 @@
+import datetime
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.politics.models import HistogramBin, TestSubmission
+from apps.politics.seeding import DEFAULT_DISTRIBUTION, generate, load_distributions
+from apps.politics.utils import compute_coords, decode_answers
+
+END = timezone.make_aware(datetime.datetime(2025, 6, 1))
+
+
+def sample(seed, count=50, distributions=None, batch_size=20):
+    distributions = distributions or load_distributions(None)
+    batches = generate(count, random.Random(seed), distributions, END, 7, batch_size)
+    return [sub for batch in batches for sub in batch]
+
+
+class GenerateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_same_seed_same_rows(self):
+        first, second = sample(3), sample(3)
+        self.assertEqual(len(first), 50)
+        self.assertEqual(
+            [(s.answers, s.created_at) for s in first],
+            [(s.answers, s.created_at) for s in second],
+        )
+        self.assertNotEqual([s.answers for s in sample(4)], [s.answers for s in first])
+
+    def test_rows_are_scored_and_dated(self):
+        for sub in sample(1):
+            self.assertEqual((sub.x, sub.y), compute_coords(sub.answers))
+            self.assertEqual(decode_answers(sub.answers_code), sub.answers)
+            self.assertLessEqual(sub.created_at, END)
+            self.assertGreaterEqual(sub.created_at, END - datetime.timedelta(days=7))
+
+    def test_distributions_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({"default": {"B": 1}, "q1": {"A": 1}, "q2": {"": 1}}, f)
+        self.addCleanup(os.unlink, f.name)
+        distributions = load_distributions(f.name)
+        self.assertEqual(distributions["q3"], {"B": 1})
+        for sub in sample(0, distributions=distributions):
+            self.assertEqual(sub.answers["q1"], "A")
+            self.assertNotIn("q2", sub.answers)
+            self.assertEqual(sub.answers["q12"], "B")
+
+    def test_default_distribution(self):
+        self.assertEqual(load_distributions(None)["q7"], DEFAULT_DISTRIBUTION)
+
+    def test_invalid_distributions(self):
+        for config in ({"q13": {"A": 1}}, {"q1": {"A": 0}}, {"q1": {"A": -1, "B": 2}}):
+            with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+                json.dump(config, f)
+            self.addCleanup(os.unlink, f.name)
+            with self.assertRaises(ValueError):
+                load_distributions(f.name)
+
+
+class SeedSubmissionsCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_inserts_rows_and_statistics(self):
+        out = StringIO()
+        call_command(
+            "seed_submissions",
+            "30",
+            "--seed",
+            "5",
+            "--batch-size",
+            "8",
+            "--end",
+            "2025-06-01",
+            "--method",
+            "bulk",
+            stdout=out,
+        )
+        self.assertEqual(TestSubmission.objects.count(), 30)
+        self.assertEqual(sum(HistogramBin.objects.values_list("count", flat=True)), 30)
+        self.assertIn("8 rows inserted", out.getvalue())
+        self.assertIn("Done: 30 rows inserted with bulk", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertEqual(
+            sorted(TestSubmission.objects.values_list("answers", flat=True), key=str),
+            sorted((s.answers for s in sample(5, 30, batch_size=8)), key=str),
+        )
+
+    @skipIf(connection.vendor == "postgresql", "COPY is available")
+    def test_copy_requires_postgres(self):
+        with self.assertRaises(CommandError):
+            call_command("seed_submissions", "1", "--method", "copy", stdout=StringIO())
+
+    def test_missing_distributions_file(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "seed_submissions",
+                "1",
+                "--distributions",
+                "/nonexistent.json",
+                stdout=StringIO(),
+            )
@@ -0,0 +1,141 @@
+import random
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.politics.models import AnswerPattern, TestSubmission
+from apps.politics.seeding import load_distributions, synthetic_patterns
+from apps.politics.similar import (
+    PATTERNS_VERSION,
+    PatternIndex,
+    distance,
+    find_similar,
+    get_pattern_index,
+    neighbourhood_size,
+    neighbours,
+    rebuild_patterns,
+)
+from apps.politics.stats import record_submissions
+from apps.politics.utils import encode_answers
+from apps.politics.versions import KEY_PREFIX
+
+ALL_A = {f"q{i}": "A" for i in range(1, 13)}
+
+
+def brute_force(items, code, k):
+    return sum(n for other, n in items if distance(code, other) <= k)
+
+
+class DistanceTests(TestCase):
+    def test_counts_differing_questions(self):
+        code = encode_answers(ALL_A)
+        self.assertEqual(distance(code, code), 0)
+        other = encode_answers({**ALL_A, "q1": "B", "q12": "Neither"})
+        self.assertEqual(distance(code, other), 2)
+        skipped = {q: a for q, a in ALL_A.items() if q != "q7"}
+        self.assertEqual(distance(code, encode_answers(skipped)), 1)
+
+    def test_neighbours_are_all_codes_within_k(self):
+        code = encode_answers({"q1": "Both", "q5": "B"})
+        for k in (0, 1, 2):
+            found = dict(neighbours(code, k))
+            self.assertEqual(len(found), neighbourhood_size(k))
+            self.assertTrue(all(distance(code, o) == d for o, d in found.items()))
+        self.assertEqual(neighbourhood_size(2), 1105)
+
+
+class PatternIndexTests(TestCase):
+    def test_search_matches_brute_force(self):
+        rng = random.Random(1)
+        codes, counts = synthetic_patterns(3000, rng, load_distributions(None))
+        index = PatternIndex(codes[::2], counts[::2])
+        for code, count in zip(codes[1::2], counts[1::2]):
+            index.set(code, count)
+        items = list(zip(codes, counts))
+        queries = rng.sample(list(codes), 20)
+        for k in (0, 1, 2, 3):
+            for code in queries:
+                self.assertEqual(index.search(code, k)[0], brute_force(items, code, k))
+        index.merge()
+        self.assertEqual(list(index.codes), list(codes))
+        self.assertEqual(index.total, sum(counts))
+        for code in queries:
+            self.assertEqual(index.search(code, 2)[0], brute_force(items, code, 2))
+
+    def test_sample_is_closest_then_most_common(self):
+        base = encode_answers(ALL_A)
+        near = encode_answers({**ALL_A, "q3": "B"})
+        far = encode_answers({**ALL_A, "q3": "B", "q4": "B"})
+        index = PatternIndex(sorted([base, near, far]), [1, 1, 1])
+        index.set(far, 9)
+        index.set(near, 5)
+        self.assertEqual(
+            index.search(base, 2, sample=2), (15, [(base, 1, 0), (near, 5, 1)])
+        )
+
+
+class SimilarAnswersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def record(self, *answer_sets):
+        subs = [
+            TestSubmission.objects.create(
+                answers=answers, answers_code=encode_answers(answers)
+            )
+            for answers in answer_sets
+        ]
+        record_submissions(subs)
+
+    def test_counts_recorded_submissions(self):
+        self.record(ALL_A, ALL_A, {**ALL_A, "q2": "B"}, {"q1": "A"}, {"q1": "?"})
+        self.assertEqual(AnswerPattern.objects.get(code=encode_answers(ALL_A)).count, 2)
+        similar = find_similar(ALL_A, k=1, sample=5)
+        self.assertEqual(similar.count, 3)
+        self.assertEqual(similar.sample[0].answers, ALL_A)
+        self.assertEqual(similar.sample[1].distance, 1)
+        self.assertIsNone(find_similar({"q1": "?"}))
+        with override_settings(POLITICS_SIMILAR_DISTANCE=0):
+            self.assertIsNone(find_similar(ALL_A))
+
+    @override_settings(POLITICS_SIMILAR_REFRESH=0)
+    def test_refresh_reads_changed_patterns(self):
+        self.record(ALL_A)
+        index = get_pattern_index()
+        self.record(ALL_A, {**ALL_A, "q9": "Both"})
+        self.assertIs(get_pattern_index(), index)
+        self.assertEqual(find_similar(ALL_A, k=1).count, 3)
+
+    def test_rebuild_recounts_from_submissions(self):
+        self.record(ALL_A)
+        find_similar(ALL_A)
+        TestSubmission.objects.create(answers=ALL_A, answers_code=encode_answers(ALL_A))
+        TestSubmission.objects.create(answers={"q1": "?"})
+        self.assertEqual(rebuild_patterns(), 1)
+        self.assertEqual(find_similar(ALL_A).count, 2)
+
+        out = StringIO()
+        call_command("rebuild_answer_patterns", stdout=out)
+        self.assertIn("1 patterns of 2 submissions", out.getvalue())
+
+    @override_settings(POLITICS_SIMILAR_REFRESH=0)
+    def test_rebuild_in_another_process_drops_removed_patterns(self):
+        other = {**ALL_A, "q4": "B"}
+        self.record(ALL_A, other)
+        self.assertEqual(find_similar(ALL_A, k=1).count, 2)
+        stale = cache.get(KEY_PREFIX + PATTERNS_VERSION)
+        TestSubmission.objects.filter(answers_code=encode_answers(other)).delete()
+        rebuild_patterns()
+        # This process's cache has not seen the other process's bump yet.
+        cache.set(KEY_PREFIX + PATTERNS_VERSION, stale)
+        self.assertEqual(find_similar(ALL_A, k=1).count, 1)
+        self.assertNotIn(encode_answers(other), dict(get_pattern_index().items()))
+
+    def test_result_page_shows_earlier_test_takers(self):
+        self.record(ALL_A)
+        response = self.client.post(reverse("politics:score"), ALL_A)
+        self.assertContains(response, "past test-taker answered like you")
+        self.assertEqual(response.context["similar"].count, 1)
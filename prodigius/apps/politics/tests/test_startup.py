@@ -0,0 +1,78 @@
+import gc
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.politics.models import Politician, Question
+from apps.politics.startup import (
+    STATIC_STAMP,
+    collect_static,
+    ensure_admin,
+    pending_migrations,
+    warm_up,
+)
+
+
+class BootTests(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def test_ensure_admin(self):
+        self.assertEqual(ensure_admin(), "created")
+        self.assertEqual(ensure_admin(), "unchanged")
+        admin = User.objects.get(username="admin")
+        self.assertTrue(admin.is_superuser)
+        admin.set_password("changed")
+        admin.save()
+        self.assertEqual(ensure_admin(), "password reset")
+        admin.refresh_from_db()
+        self.assertTrue(admin.check_password("admin"))
+
+    def test_collect_static_skips_unchanged_files(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            self.assertTrue(collect_static())
+            self.assertTrue(os.path.exists(os.path.join(self.static_root, "css")))
+            self.assertFalse(collect_static())
+            with open(os.path.join(self.static_root, STATIC_STAMP), "w") as f:
+                f.write("stale\n")
+            self.assertTrue(collect_static())
+            self.assertTrue(collect_static(force=True))
+
+    def test_boot_command(self):
+        self.assertEqual(pending_migrations(), [])
+        out = StringIO()
+        with override_settings(STATIC_ROOT=self.static_root):
+            call_command("boot", stdout=out)
+            call_command("boot", stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "Migrations up to date",
+                "Admin user created",
+                "Static files collected",
+                "Migrations up to date",
+                "Admin user unchanged",
+                "Static files up to date",
+            ],
+        )
+
+
+class WarmUpTests(TestCase):
+    def test_loads_shared_data_and_freezes_gc(self):
+        cache.clear()
+        Question.objects.create(text="Q1?", order=1, axis="x", weight=1.0)
+        Politician.objects.create(name="Someone", x=0.0, y=0.0, blurb="")
+        self.addCleanup(gc.unfreeze)
+        stats = warm_up()
+        self.assertEqual(stats["questions"], 1)
+        self.assertEqual(stats["politicians"], 1)
+        self.assertEqual(stats["patterns"], 0)
+        self.assertGreaterEqual(stats["templates"], 10)
+        self.assertGreater(gc.get_freeze_count(), 0)
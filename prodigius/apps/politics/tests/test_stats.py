@@ -0,0 +1,181 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.politics.models import AxisBin, HistogramBin, TestSubmission
+from apps.politics.stats import (
+    bin_index,
+    get_distribution,
+    percentile_rank,
+    percentile_ranks,
+    rebuild_stats,
+    record_submissions,
+)
+from apps.politics.writebehind import SubmissionBuffer
+
+from .test_score_view import TEMPLATES_OVERRIDE
+
+
+def counts(size=4):
+    return {(b.ix, b.iy): b.count for b in HistogramBin.objects.filter(size=size)}
+
+
+@override_settings(POLITICS_HISTOGRAM_BINS=4)
+class HistogramTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bin_index_covers_closed_range(self):
+        self.assertEqual(bin_index(-1.0, 4), 0)
+        self.assertEqual(bin_index(-0.51, 4), 0)
+        self.assertEqual(bin_index(-0.5, 4), 1)
+        self.assertEqual(bin_index(0.0, 4), 2)
+        self.assertEqual(bin_index(0.99, 4), 3)
+        self.assertEqual(bin_index(1.0, 4), 3)
+
+    def test_record_creates_then_increments(self):
+        subs = [TestSubmission(x=-1.0, y=1.0), TestSubmission(x=0.1, y=0.1)]
+        record_submissions(subs)
+        record_submissions(subs[:1])
+        self.assertEqual(counts(), {(0, 3): 2, (2, 2): 1})
+
+    def test_record_writes_each_table_in_one_statement(self):
+        subs = [TestSubmission(x=n / 50 - 1, y=0.0) for n in range(100)]
+        # The grid and the axis bins; there are no answer patterns.
+        with self.assertNumQueries(2):
+            record_submissions(subs)
+        self.assertEqual(sum(counts().values()), 100)
+        with mock.patch.object(
+            connection.features, "supports_update_conflicts_with_target", False
+        ):
+            record_submissions(subs[:10])
+        self.assertEqual(sum(counts().values()), 110)
+        self.assertEqual(counts()[0, 2], 25 + 10)
+
+    def test_rebuild_matches_incremental_counts(self):
+        points = [(-0.9, -0.9), (0.2, 0.3), (0.2, 0.35), (1.0, -1.0)]
+        subs = [TestSubmission.objects.create(x=x, y=y) for x, y in points]
+        record_submissions(subs)
+        incremental = counts()
+        HistogramBin.objects.create(size=4, ix=1, iy=1, count=99)
+
+        self.assertEqual(rebuild_stats(chunk_size=2), 4)
+        self.assertEqual(counts(), incremental)
+
+    def test_rebuild_leaves_other_grids_alone(self):
+        HistogramBin.objects.create(size=10, ix=0, iy=0, count=7)
+        rebuild_stats()
+        self.assertEqual(counts(10), {(0, 0): 7})
+
+    def test_distribution_is_cached_and_weighted(self):
+        HistogramBin.objects.create(size=4, ix=0, iy=3, count=2)
+        HistogramBin.objects.create(size=4, ix=2, iy=2, count=1)
+        cells = sorted(get_distribution(), key=lambda c: c["x"])
+        self.assertEqual(
+            cells,
+            [
+                {"x": -0.75, "y": 0.75, "count": 2, "weight": 1.0},
+                {"x": 0.25, "y": 0.25, "count": 1, "weight": 0.5},
+            ],
+        )
+        with self.assertNumQueries(0):
+            get_distribution()
+
+    def test_empty_distribution(self):
+        self.assertEqual(get_distribution(), [])
+
+    def test_command_reports_count(self):
+        TestSubmission.objects.create(x=0.0, y=0.0)
+        out = StringIO()
+        call_command("rebuild_submission_stats", stdout=out)
+        self.assertIn("Done: 1 submissions counted", out.getvalue())
+        self.assertEqual(counts(), {(2, 2): 1})
+
+
+def axis_counts(axis, size=10):
+    return dict(
+        AxisBin.objects.filter(axis=axis, size=size).values_list("index", "count")
+    )
+
+
+@override_settings(POLITICS_PERCENTILE_BINS=10)
+class PercentileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_record_counts_each_axis(self):
+        record_submissions(
+            [TestSubmission(x=-0.95, y=0.5), TestSubmission(x=0.05, y=0.55)]
+        )
+        self.assertEqual(axis_counts("x"), {0: 1, 5: 1})
+        self.assertEqual(axis_counts("y"), {7: 2})
+
+    def test_rank_counts_own_bin_as_ties(self):
+        totals = [0, 2, 2, 4]  # two in [-1, -1/3), two in [1/3, 1]
+        self.assertEqual(percentile_rank(totals, -1.0), 25.0)
+        self.assertEqual(percentile_rank(totals, -0.5), 25.0)
+        self.assertEqual(percentile_rank(totals, 0.0), 50.0)
+        self.assertEqual(percentile_rank(totals, 1.0), 75.0)
+        self.assertIsNone(percentile_rank([0, 0, 0], 0.0))
+
+    def test_ranks_match_exact_counts(self):
+        points = [(i / 50 - 0.99, 0.99 - i / 50) for i in range(100)]
+        subs = [TestSubmission.objects.create(x=x, y=y) for x, y in points]
+        self.assertEqual(rebuild_stats(), 100)
+        ranks = percentile_ranks(0.3, 0.3)
+        exact_right = sum(1 for s in subs if s.x > 0.3)
+        exact_below_y = sum(1 for s in subs if s.y < 0.3)
+        self.assertLessEqual(abs(ranks["left"] - exact_right), 1)
+        self.assertLessEqual(abs(ranks["libertarian"] - exact_below_y), 1)
+
+    def test_ranks_are_cached(self):
+        record_submissions([TestSubmission(x=0.0, y=0.0)])
+        percentile_ranks(0.0, 0.0)
+        with self.assertNumQueries(0):
+            percentile_ranks(0.5, -0.5)
+
+    def test_no_submissions(self):
+        self.assertIsNone(percentile_ranks(0.0, 0.0))
+
+
+@override_settings(TEMPLATES=TEMPLATES_OVERRIDE, POLITICS_HISTOGRAM_BINS=4)
+class ScoreViewHistogramTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_submission_is_counted_and_distribution_in_context(self):
+        resp = self.client.post(reverse("politics:score"), {})
+        self.assertEqual(counts(), {(2, 2): 1})
+        self.assertEqual(
+            resp.context["distribution"],
+            [{"x": 0.25, "y": 0.25, "count": 1, "weight": 1.0}],
+        )
+        self.assertEqual(resp.context["percentiles"], {"left": 50, "libertarian": 50})
+
+    @override_settings(POLITICS_WRITE_BEHIND=True)
+    def test_write_behind_flush_counts_batch(self):
+        buf = SubmissionBuffer(
+            capacity=10, batch_size=10, max_delay=60, autostart=False
+        )
+        buf.add(TestSubmission(x=0.0, y=0.0))
+        buf.add(TestSubmission(x=-1.0, y=-1.0))
+        self.assertEqual(counts(), {})
+        buf.flush()
+        self.assertEqual(counts(), {(2, 2): 1, (0, 0): 1})
+
+
+@override_settings(POLITICS_HISTOGRAM_BINS=4)
+class ResultChartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_chart_embeds_distribution(self):
+        resp = self.client.post(reverse("politics:score"), {})
+        self.assertContains(resp, '<script id="spectrum-distribution"')
+        self.assertContains(resp, '"weight": 1.0')
+        self.assertContains(resp, "More economically left than 50% of test-takers")
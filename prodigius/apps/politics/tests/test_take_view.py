@@ -1,4 +1,6 @@
-from django.test import RequestFactory, TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase
 from django.urls import resolve, reverse
 
 from apps.politics.models import Choice, Question
@@ -9,13 +11,18 @@ class TakeViewTests(TestCase):
     @classmethod
     def setUpTestData(cls):
         # 3 questions, each with A/B choices (label is max_length=1)
-        q1 = Question.objects.create(text="Q1?", order=1)
-        q2 = Question.objects.create(text="Q2?", order=2)
-        q3 = Question.objects.create(text="Q3?", order=3)
+        q1 = Question.objects.create(text="Q1?", order=1, axis="x", weight=1.0)
+        q2 = Question.objects.create(text="Q2?", order=2, axis="x", weight=1.0)
+        q3 = Question.objects.create(text="Q3?", order=3, axis="x", weight=1.0)
 
         for q in (q1, q2, q3):
-            Choice.objects.create(question=q, label="A", text="A choice")
-            Choice.objects.create(question=q, label="B", text="B choice")
+            Choice.objects.create(question=q, label="A", text="A choice", delta=0.0)
+            Choice.objects.create(question=q, label="B", text="B choice", delta=0.0)
+
+    def setUp(self):
+        # The catalog is cached per version token, which outlives the
+        # rollback of other test classes' questions.
+        cache.clear()
 
     def test_url_and_resolves_to_takeview(self):
         url = reverse("politics:test")
@@ -53,6 +60,51 @@ class TakeViewTests(TestCase):
             for q in questions:
                 _ = list(q.choices.all())
 
+    def test_warm_page_makes_no_queries(self):
+        url = reverse("politics:test")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'name="q3"')
+
+    def test_form_rerendered_after_question_added(self):
+        url = reverse("politics:test")
+        self.client.get(url)
+        q4 = Question.objects.create(text="Q4?", order=4, axis="x", weight=1.0)
+        Choice.objects.create(question=q4, label="A", text="A choice", delta=0.0)
+        self.assertContains(self.client.get(url), 'name="q4"')
+
+    def test_page_is_shareable_and_sets_csrf_cookie(self):
+        response = self.client.get(reverse("politics:test"))
+        self.assertNotContains(response, "csrfmiddlewaretoken")
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_visitor_with_cookie_gets_a_cacheable_page(self):
+        url = reverse("politics:test")
+        self.client.get(url)
+        self.assertIn(settings.CSRF_COOKIE_NAME, self.client.cookies)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertFalse(response.has_header("Set-Cookie"))
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+
+    def test_conditional_get_answers_304_and_still_sets_cookie(self):
+        url = reverse("politics:test")
+        etag = self.client.get(url)["ETag"]
+        client = Client()
+        with self.assertNumQueries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+    def test_score_accepts_token_from_cookie_header(self):
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse("politics:test"))
+        token = client.cookies[settings.CSRF_COOKIE_NAME].value
+        response = client.post(reverse("politics:score"), HTTP_X_CSRFTOKEN=token)
+        self.assertNotEqual(response.status_code, 403)
+
     def test_requestfactory_direct_context(self):
         rf = RequestFactory()
         request = rf.get(reverse("politics:test"))
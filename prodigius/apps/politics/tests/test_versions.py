@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.politics.models import VersionToken
+from apps.politics.versions import bump_version, get_version, get_versions
+
+
+class VersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tokens_are_shared_through_the_database(self):
+        token = get_version("roster")
+        self.assertEqual(VersionToken.objects.get(name="roster").token, token)
+        self.assertNotEqual(bump_version("roster"), token)
+        self.assertEqual(get_versions("catalog", "roster")[1], get_version("roster"))
+
+    def test_bump_from_another_process_is_seen_after_the_ttl(self):
+        token = get_version("roster")
+        # Another worker or a management command bumps it.
+        VersionToken.objects.filter(name="roster").update(token="elsewhere")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_version("roster"), token)
+        cache.clear()  # the TTL passes
+        self.assertEqual(get_version("roster"), "elsewhere")
+
+    @override_settings(POLITICS_VERSION_TTL=0)
+    def test_zero_ttl_reads_every_time(self):
+        get_version("roster")
+        VersionToken.objects.filter(name="roster").update(token="elsewhere")
+        self.assertEqual(get_versions("roster"), ("elsewhere",))
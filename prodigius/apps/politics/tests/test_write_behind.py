@@ -0,0 +1,176 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.politics import writebehind
+from apps.politics.models import Politician, TestSubmission
+from apps.politics.utils import encode_answers
+from apps.politics.writebehind import SubmissionBuffer
+
+from .test_score_view import TEMPLATES_OVERRIDE
+from .test_scoring import create_questions
+
+
+def make_buffer(**kwargs):
+    options = {"capacity": 10, "batch_size": 3, "max_delay": 60, "autostart": False}
+    options.update(kwargs)
+    return SubmissionBuffer(**options)
+
+
+class SubmissionBufferTests(TestCase):
+    def test_flush_bulk_creates_queued_rows(self):
+        buf = make_buffer()
+        for i in range(5):
+            self.assertTrue(buf.add(TestSubmission(answers={"q1": "A"}, x=i, y=0)))
+        self.assertEqual(TestSubmission.objects.count(), 0)
+        self.assertEqual(buf.stats()["depth"], 5)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(buf.flush(), 5)
+        inserts = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith('INSERT INTO "politics_testsubmission"')
+        ]
+        self.assertEqual(len(inserts), 2)  # two bulk INSERTs of batch_size 3
+        self.assertEqual(TestSubmission.objects.count(), 5)
+        self.assertEqual(
+            buf.stats(),
+            {
+                "depth": 0,
+                "enqueued": 5,
+                "flushed": 5,
+                "rejected": 0,
+                "retried": 0,
+                "failed": 0,
+            },
+        )
+        self.assertEqual(buf.flush(), 0)
+
+    def test_full_buffer_rejects_and_counts(self):
+        buf = make_buffer(capacity=2)
+        self.assertTrue(buf.add(TestSubmission()))
+        self.assertTrue(buf.add(TestSubmission()))
+        self.assertFalse(buf.add(TestSubmission()))
+        self.assertEqual(buf.stats()["rejected"], 1)
+        self.assertEqual(buf.stats()["depth"], 2)
+
+    def fail_flush(self, buf, exc, level="WARNING"):
+        with (
+            mock.patch.object(TestSubmission.objects, "bulk_create", side_effect=exc),
+            self.assertLogs("apps.politics.writebehind", level),
+        ):
+            self.assertEqual(buf.flush(), 0)
+
+    def test_failed_write_is_retried(self):
+        buf = make_buffer(capacity=3)
+        buf.add(TestSubmission(x=1, y=0))
+        buf.add(TestSubmission(x=2, y=0))
+        self.fail_flush(buf, RuntimeError("db down"))
+        buf.add(TestSubmission(x=3, y=0))
+        self.assertFalse(buf.add(TestSubmission(x=4, y=0)))
+        self.assertEqual(buf.stats()["depth"], 3)
+        self.assertEqual(buf.stats()["retried"], 2)
+        self.assertEqual(buf.stats()["failed"], 0)
+
+        self.assertEqual(buf.flush(), 3)
+        self.assertEqual(
+            list(TestSubmission.objects.order_by("pk").values_list("x", flat=True)),
+            [1, 2, 3],
+        )
+        self.assertEqual(buf.stats()["failed"], 0)
+
+    def test_failed_write_is_counted_after_max_attempts(self):
+        buf = make_buffer(max_attempts=2)
+        buf.add(TestSubmission())
+        self.fail_flush(buf, RuntimeError("db down"))
+        self.fail_flush(buf, RuntimeError("db down"), "ERROR")
+        self.assertEqual(buf.stats()["failed"], 1)
+        self.assertEqual(buf.stats()["depth"], 0)
+
+    def test_data_error_is_not_retried(self):
+        buf = make_buffer()
+        buf.add(TestSubmission())
+        self.fail_flush(buf, IntegrityError("duplicate key"), "ERROR")
+        self.assertEqual(buf.stats()["failed"], 1)
+        self.assertEqual(buf.stats()["retried"], 0)
+        self.assertEqual(buf.stats()["depth"], 0)
+
+    def test_size_threshold_wakes_flusher_thread(self):
+        buf = make_buffer(batch_size=2)
+        flushed = threading.Event()
+        with mock.patch.object(buf, "flush", side_effect=flushed.set):
+            buf.start()
+            buf.add(TestSubmission())
+            buf.add(TestSubmission())
+            self.assertTrue(flushed.wait(5))
+            buf.stop()
+        self.assertFalse(buf._thread.is_alive())
+
+    def test_stop_drains_queue(self):
+        buf = make_buffer()
+        buf.add(TestSubmission())
+        buf.stop()
+        self.assertEqual(TestSubmission.objects.count(), 1)
+
+    def test_stopped_buffer_rejects(self):
+        buf = make_buffer()
+        buf.stop()
+        self.assertFalse(buf.add(TestSubmission()))
+        self.assertEqual(buf.stats()["rejected"], 1)
+        self.assertEqual(buf.stats()["depth"], 0)
+
+
+@override_settings(TEMPLATES=TEMPLATES_OVERRIDE)
+class WriteBehindScoreViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_questions()
+        Politician.objects.create(name="Near", x=-1.0, y=0.9, blurb="")
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = make_buffer()
+        patcher = mock.patch.object(writebehind, "get_buffer", return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(POLITICS_WRITE_BEHIND=True)
+    def test_response_rendered_before_row_is_written(self):
+        post_data = {f"q{i}": "A" for i in range(1, 9)}
+        resp = self.client.post(reverse("politics:score"), data=post_data)
+        self.assertEqual(resp.status_code, 200)
+        self.assertAlmostEqual(resp.context["x"], -1.0)
+        self.assertEqual([p.name for p in resp.context["nearest"]], ["Near"])
+        self.assertIsNone(resp.context["submission"].pk)
+        self.assertEqual(TestSubmission.objects.count(), 0)
+
+        self.buffer.flush()
+        sub = TestSubmission.objects.get()
+        self.assertEqual(sub.answers, post_data)
+        self.assertEqual(sub.answers_code, encode_answers(post_data))
+
+    @override_settings(POLITICS_WRITE_BEHIND=True)
+    def test_full_buffer_inserts_directly(self):
+        self.buffer.capacity = 0
+        resp = self.client.post(reverse("politics:score"), data={"q1": "A"})
+        self.assertIsNotNone(resp.context["submission"].pk)
+        self.assertEqual(TestSubmission.objects.count(), 1)
+        self.assertEqual(self.buffer.stats()["rejected"], 1)
+
+    @override_settings(POLITICS_WRITE_BEHIND=True)
+    def test_stopping_buffer_inserts_directly(self):
+        self.buffer.stop()
+        self.client.post(reverse("politics:score"), data={"q1": "A"})
+        self.assertEqual(TestSubmission.objects.count(), 1)
+        self.assertEqual(self.buffer.stats()["enqueued"], 0)
+
+    def test_disabled_by_default(self):
+        self.client.post(reverse("politics:score"), data={"q1": "A"})
+        self.assertEqual(TestSubmission.objects.count(), 1)
+        self.assertEqual(self.buffer.stats()["enqueued"], 0)
@@ -1,12 +1,21 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import IndexView, ScoreView, TakeView
+from . import views
 
 app_name = "politics"
 
+if settings.POLITICS_ASYNC_VIEWS:
+    index, take, score = views.AsyncIndexView, views.AsyncTakeView, views.AsyncScoreView
+    export, batch = views.AsyncExportView, views.AsyncBatchScoreView
+else:
+    index, take, score = views.IndexView, views.TakeView, views.ScoreView
+    export, batch = views.ExportView, views.BatchScoreView
 
 urlpatterns = [
-    path("", IndexView.as_view(), name="index"),
-    path("test/", TakeView.as_view(), name="test"),
-    path("score/", ScoreView.as_view(), name="score"),
+    path("", index.as_view(), name="index"),
+    path("test/", take.as_view(), name="test"),
+    path("score/", score.as_view(), name="score"),
+    path("export/", export.as_view(), name="export"),
+    path("api/score/", batch.as_view(), name="score_batch"),
 ]
@@ -1,70 +1,97 @@
-from typing import Dict, Tuple
-
-Q_AXIS = {
-    1: ("x", 1.0),
-    2: ("x", 1.0),
-    3: ("y", 1.0),
-    4: ("x", 1.0),
-    5: ("x", 0.8),
-    6: ("y", 0.8),
-    7: ("x", 0.8),
-    8: ("y", 0.8),
-    9: ("y", 0.9),  # Immigration policy - auth/lib axis
-    10: ("y", 0.7),  # Foreign policy - auth/lib axis
-    11: ("x", 0.9),  # Role of government - left/right axis
-    12: ("x", 0.8),  # Social safety net - left/right axis
-}
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from django.db.models import F, QuerySet
 
-def score_answer(qnum: int, choice: str) -> float:
-    axis, weight = Q_AXIS[qnum]
-    if axis == "x":
-        if choice == "A":
-            return -1.0 * weight
-        if choice == "B":
-            return 1.0 * weight
-        return 0.0
-    else:
-        if qnum in (3, 6):
-            if choice == "A":
-                return 1.0 * weight
-            if choice == "B":
-                return -1.0 * weight
-            if choice == "Both":
-                return 0.3 * weight
-            return 0.0
-        if qnum == 8:
-            if choice == "A":
-                return 0.6 * weight
-            if choice == "B":
-                return 0.6 * weight
-            if choice == "Both":
-                return 1.0 * weight
-            return 0.0
-        if choice == "A":
-            return 1.0 * weight
-        if choice == "B":
-            return -1.0 * weight
-        if choice == "Both":
-            return 0.3 * weight
-        return 0.0
+from .models import Question
+from .versions import get_version
+
+CATALOG_VERSION = "catalog"
 
 
 def compute_coords(answers: Dict[str, str]) -> Tuple[float, float]:
-    x_total = y_total = 0.0
-    x_weight = y_weight = 0.0
+    table = get_score_table()
+    return score_codes(encode_choices(answers, table), table)
+
+
+# Choice codes used by the batch scorer: 0 is an unanswered question and
+# OTHER_CODE any answer that is not one of CHOICES.
+CHOICES = ("A", "B", "Both", "Neither")
+CHOICE_CODES = {label: code for code, label in enumerate(CHOICES, start=1)}
+OTHER_CODE = len(CHOICES) + 1
+
+# One row per question in scoring order:
+# (question number, axis, weight, delta per choice code).
+ScoreTable = List[Tuple[int, str, float, Tuple[float, ...]]]
+
+
+def compile_score_table() -> ScoreTable:
+    """Flatten the question catalog into a question x choice table.
+
+    Each question contributes its axis, weight and weighted delta per choice.
+    A choice without a Choice row falls back to the question's
+    ``both_delta``/``neither_delta`` (or 0 for A/B). Question numbers without
+    a Question row are not scored.
+    """
+    rows = {}
+    for question in Question.objects.prefetch_related("choices"):
+        by_label = {"Both": question.both_delta, "Neither": question.neither_delta}
+        by_label.update((c.label, c.delta) for c in question.choices.all())
+        deltas = [by_label.get(c, 0.0) * question.weight for c in CHOICES]
+        rows[question.order] = (question.axis, question.weight, deltas)
+
+    return [
+        (qnum, axis, weight, (0.0, *deltas, 0.0))
+        for qnum, (axis, weight, deltas) in sorted(rows.items())
+    ]
+
+
+_score_table_lock = threading.Lock()
+_score_table: Tuple[Optional[str], ScoreTable] = (None, [])
+
+
+def get_score_table() -> ScoreTable:
+    """Return the compiled table, recompiling it after the catalog changed."""
+    global _score_table
+    version = get_version(CATALOG_VERSION)
+    if _score_table[0] != version:
+        with _score_table_lock:
+            if _score_table[0] != version:
+                _score_table = (version, compile_score_table())
+    return _score_table[1]
+
+
+def score_answer(qnum: int, choice: str) -> float:
+    """Weighted delta of one answer, looked up in the compiled table; 0.0 for
+    a question number that is not in the catalog."""
+    for row_qnum, _, _, deltas in get_score_table():
+        if row_qnum == qnum:
+            return deltas[CHOICE_CODES.get(choice, OTHER_CODE) if choice else 0]
+    return 0.0
+
 
-    for qnum in Q_AXIS.keys():
+def encode_choices(answers: Dict[str, str], table: ScoreTable) -> Tuple[int, ...]:
+    """Map an answers dict to one choice code per row of ``table``."""
+    codes = []
+    for qnum, _, _, _ in table:
         choice = answers.get(f"q{qnum}")
-        if not choice:
+        codes.append(CHOICE_CODES.get(choice, OTHER_CODE) if choice else 0)
+    return tuple(codes)
+
+
+def score_codes(codes: Tuple[int, ...], table: ScoreTable) -> Tuple[float, float]:
+    """Score one row of choice codes; sums run in the same order as
+    ``compute_coords`` so both give bit-identical results."""
+    x_total = y_total = 0.0
+    x_weight = y_weight = 0.0
+    for code, (_, axis, weight, deltas) in zip(codes, table):
+        if not code:
             continue
-        axis, weight = Q_AXIS[qnum]
-        delta = score_answer(qnum, choice)
         if axis == "x":
-            x_total += delta
+            x_total += deltas[code]
             x_weight += weight
         else:
-            y_total += delta
+            y_total += deltas[code]
             y_weight += weight
 
     x = x_total / x_weight if x_weight else 0.0
@@ -72,3 +99,85 @@ def compute_coords(answers: Dict[str, str]) -> Tuple[float, float]:
     x = max(-1.0, min(1.0, x))
     y = max(-1.0, min(1.0, y))
     return x, y
+
+
+def compute_coords_batch(
+    answer_sets: Iterable[Dict[str, str]], table: Optional[ScoreTable] = None
+) -> List[Tuple[float, float]]:
+    """Score many answer sets at once.
+
+    Each set is encoded to a row of choice codes and every distinct row is
+    scored once, so a batch costs one table pass per distinct answer pattern.
+    """
+    if table is None:
+        table = get_score_table()
+    scored = {}
+    coords = []
+    for answers in answer_sets:
+        codes = encode_choices(answers, table)
+        xy = scored.get(codes)
+        if xy is None:
+            xy = scored[codes] = score_codes(codes, table)
+        coords.append(xy)
+    return coords
+
+
+# Packed answers: question n occupies bits 3(n-1)..3(n-1)+2 of an integer and
+# holds its choice code, so the twelve answers fit in 36 bits.
+ANSWER_BITS = 3
+PACKED_QUESTIONS = 12
+_ANSWER_MASK = (1 << ANSWER_BITS) - 1
+
+
+def encode_answers(answers: Dict[str, str]) -> Optional[int]:
+    """Pack an answers dict into an integer, or None if it holds anything
+    other than ``CHOICES`` for ``q1``..``q12`` and so would not round-trip."""
+    code = 0
+    for key, choice in answers.items():
+        qnum = _packed_question(key)
+        if qnum is None or choice not in CHOICE_CODES:
+            return None
+        code |= CHOICE_CODES[choice] << (ANSWER_BITS * (qnum - 1))
+    return code
+
+
+def decode_answers(code: int) -> Dict[str, str]:
+    """Inverse of ``encode_answers``; keys come out in question order."""
+    answers = {}
+    for qnum in range(1, PACKED_QUESTIONS + 1):
+        choice = (code >> (ANSWER_BITS * (qnum - 1))) & _ANSWER_MASK
+        if choice:
+            answers[f"q{qnum}"] = CHOICES[choice - 1]
+    return answers
+
+
+def _packed_question(key: str) -> Optional[int]:
+    if not key.startswith("q") or not key[1:].isdigit():
+        return None
+    qnum = int(key[1:])
+    return qnum if 1 <= qnum <= PACKED_QUESTIONS else None
+
+
+def answer_mask(answers: Dict[str, str]) -> Tuple[int, int]:
+    """``(mask, value)`` such that a packed code matches every answer in
+    ``answers`` exactly when ``code & mask == value``. An empty choice matches
+    an unanswered question. Raises ValueError for unknown questions or
+    choices."""
+    mask = value = 0
+    for key, choice in answers.items():
+        qnum = _packed_question(key)
+        if qnum is None or (choice and choice not in CHOICE_CODES):
+            raise ValueError(f"Cannot match {key}={choice!r}")
+        shift = ANSWER_BITS * (qnum - 1)
+        mask |= _ANSWER_MASK << shift
+        value |= CHOICE_CODES.get(choice, 0) << shift
+    return mask, value
+
+
+def filter_answers(queryset: QuerySet, answers: Dict[str, str]) -> QuerySet:
+    """Submissions that gave all of ``answers``, e.g. ``{"q3": "A", "q8":
+    "Both"}``, as one bitwise test on ``answers_code``."""
+    mask, value = answer_mask(answers)
+    return queryset.alias(answer_bits=F("answers_code").bitand(mask)).filter(
+        answer_bits=value
+    )
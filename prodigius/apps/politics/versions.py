@@ -0,0 +1,75 @@
+"""Version tokens for process-local caches.
+
+Each named version is an opaque token. Code that keeps derived data in process
+memory remembers the token it was built from and rebuilds when the current
+token differs.
+
+Tokens live in the ``VersionToken`` table, so a bump from any worker or
+management command reaches every process. Reads go through Django's default
+cache for ``POLITICS_VERSION_TTL`` seconds. That bounds how long another
+process keeps serving an old token, even with the per-process locmem cache,
+and a missed bump heals itself.
+"""
+
+import time
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import VersionToken
+
+KEY_PREFIX = "politics:version:"
+
+
+def _new_token() -> str:
+    return f"{time.time_ns():x}"
+
+
+def _load(names: Iterable[str]) -> Dict[str, str]:
+    """Read tokens from the database, creating missing ones, and cache them."""
+    names = list(names)
+    tokens = dict(
+        VersionToken.objects.filter(name__in=names).values_list("name", "token")
+    )
+    for name in names:
+        if name not in tokens:
+            row, _ = VersionToken.objects.get_or_create(
+                name=name, defaults={"token": _new_token()}
+            )
+            tokens[name] = row.token
+    cache.set_many(
+        {KEY_PREFIX + name: token for name, token in tokens.items()},
+        settings.POLITICS_VERSION_TTL,
+    )
+    return tokens
+
+
+def get_version(name: str) -> str:
+    token = cache.get(KEY_PREFIX + name)
+    if token is None:
+        token = _load([name])[name]
+    return token
+
+
+def fetch_version(name: str) -> str:
+    """``get_version`` read from the database, for callers that must not act
+    on a token up to ``POLITICS_VERSION_TTL`` seconds old."""
+    return _load([name])[name]
+
+
+def get_versions(*names: str) -> Tuple[str, ...]:
+    """``get_version`` for several names with one cache round trip."""
+    cached = cache.get_many([KEY_PREFIX + name for name in names])
+    tokens = {key[len(KEY_PREFIX) :]: token for key, token in cached.items()}
+    missing = [name for name in names if name not in tokens]
+    if missing:
+        tokens.update(_load(missing))
+    return tuple(tokens[name] for name in names)
+
+
+def bump_version(name: str) -> str:
+    token = _new_token()
+    VersionToken.objects.update_or_create(name=name, defaults={"token": token})
+    cache.set(KEY_PREFIX + name, token, settings.POLITICS_VERSION_TTL)
+    return token
@@ -1,47 +1,309 @@
-import math
+import functools
+import hmac
+from typing import Dict
 
-from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest
-from django.shortcuts import render
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import RequestDataTooBig
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.template.response import TemplateResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.views.decorators.http import condition
 from django.views.generic import TemplateView, View
 
-from .models import Politician, Question, TestSubmission
-from .utils import compute_coords
+from . import metrics
+from .batch import (
+    Batch,
+    BatchError,
+    parse_batch,
+    result_stream,
+    save_batch,
+    score_batch,
+)
+from .catalog import catalog_etag, catalog_version, get_catalog
+from .export import CONTENT_TYPES, FORMATS, aiterate, export_stream, parse_bound
+from .memo import score
+from .models import TestSubmission
+from .nearest import figures_key
+from .similar import find_similar
+from .stats import get_distribution, percentile_ranks
+from .writebehind import save_submission
 
 
+def _answers(request: HttpRequest) -> Dict[str, str]:
+    return {
+        f"q{i}": request.POST.get(f"q{i}", "")
+        for i in range(1, 13)
+        if request.POST.get(f"q{i}")
+    }
+
+
+# The quiz pages depend only on the catalog, so they carry its ETag and
+# revalidate on every visit; a matching If-None-Match is answered with a 304
+# before any rendering. They hold no per-user data (the take form reads its
+# CSRF token from the cookie), which lets nginx micro-cache them.
+catalog_page = [cache_control(no_cache=True), condition(etag_func=catalog_etag)]
+
+
+def ensure_csrf_cookie_once(view):
+    """``ensure_csrf_cookie`` for visitors that do not have the cookie yet.
+
+    ``get_token`` makes every response set the cookie again, with ``Vary:
+    Cookie``, and nginx stores no response that carries ``Set-Cookie``.
+    Visitors that already send a cookie get the page without it, so nginx can
+    cache that copy. A malformed cookie is replaced by CsrfViewMiddleware.
+    """
+    with_cookie = ensure_csrf_cookie(view)
+
+    if iscoroutinefunction(view):
+
+        async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if settings.CSRF_COOKIE_NAME in request.COOKIES:
+                return await view(request, *args, **kwargs)
+            return await with_cookie(request, *args, **kwargs)
+
+    else:
+
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if settings.CSRF_COOKIE_NAME in request.COOKIES:
+                return view(request, *args, **kwargs)
+            return with_cookie(request, *args, **kwargs)
+
+    return functools.wraps(view)(wrapper)
+
+
+@method_decorator(catalog_page, name="get")
 class IndexView(TemplateView):
     template_name = "politics/index.html"
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["questions"] = Question.objects.all()
+        ctx["questions"] = get_catalog()
         return ctx
 
 
+@method_decorator([ensure_csrf_cookie_once, *catalog_page], name="get")
 class TakeView(TemplateView):
     template_name = "politics/take.html"
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["questions"] = Question.objects.prefetch_related("choices").all()
+        ctx["questions"] = get_catalog()
+        ctx["catalog_version"] = catalog_version()
         return ctx
 
 
+def _result_context(answers: Dict[str, str]) -> dict:
+    """Score ``answers``, save the submission and gather the result page's
+    context."""
+    x, y, nearest = score(answers)
+    # Before the insert, so the new submission does not count itself.
+    similar = find_similar(answers)
+    sub = save_submission(TestSubmission(answers=answers, x=x, y=y))
+    ctx = {"submission": sub, "nearest": nearest, "x": x, "y": y}
+    ctx["similar"] = similar
+    ctx["figures_key"] = figures_key(nearest)
+    ctx["distribution"] = get_distribution()
+    ctx["percentiles"] = percentile_ranks(x, y)
+    return ctx
+
+
 class ScoreView(View):
     def post(self, request: HttpRequest) -> HttpResponse:
-        answers = {
-            f"q{i}": request.POST.get(f"q{i}", "")
-            for i in range(1, 13)
-            if request.POST.get(f"q{i}")
-        }
-        x, y = compute_coords(answers)
-        sub = TestSubmission.objects.create(answers=answers, x=x, y=y)
+        ctx = _result_context(_answers(request))
+        return TemplateResponse(request, "politics/partials/result.html", ctx)
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        return HttpResponseBadRequest("Use POST")
+
+
+def _export_options(request: HttpRequest) -> dict:
+    """Read ``format``, ``since``, ``until`` and ``gzip`` from the query string;
+    raises ValueError for bad values."""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return {
+        "fmt": fmt,
+        "since": parse_bound(request.GET.get("since")),
+        "until": parse_bound(request.GET.get("until")),
+        "compress": request.GET.get("gzip") in ("1", "true"),
+    }
+
+
+def _export_response(content, options: dict) -> StreamingHttpResponse:
+    filename = f"submissions.{options['fmt']}"
+    if options["compress"]:
+        content_type, filename = "application/gzip", filename + ".gz"
+    else:
+        content_type = CONTENT_TYPES[options["fmt"]]
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@method_decorator(staff_member_required, name="get")
+class ExportView(View):
+    """Stream submissions as CSV or NDJSON for staff users."""
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        try:
+            options = _export_options(request)
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        return _export_response(export_stream(**options), options)
+
+
+def _api_key_valid(request: HttpRequest) -> bool:
+    header = request.headers.get("Authorization", "")
+    # Every key is compared, so the time taken does not tell which one matched.
+    matches = [
+        hmac.compare_digest(header, f"Bearer {key}")
+        for key in settings.POLITICS_API_KEYS
+        if key
+    ]
+    return any(matches)
+
+
+def _read_batch(request: HttpRequest) -> Batch:
+    """Authenticate and decode a batch request; raises BatchError."""
+    if not _api_key_valid(request):
+        raise BatchError("Missing or unknown API key", status=403)
+    try:
+        body = request.body
+    except RequestDataTooBig:
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        raise BatchError(f"Body is larger than {limit} bytes", status=413)
+    return parse_batch(body)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class BatchScoreView(View):
+    """Score many answer sets in one JSON request for API key holders and
+    stream the results as NDJSON; see batch.py."""
+
+    http_method_names = ["post"]
+
+    def post(self, request: HttpRequest) -> HttpResponse:
+        try:
+            batch = _read_batch(request)
+        except BatchError as exc:
+            return JsonResponse({"error": str(exc)}, status=exc.status)
+        results = score_batch(batch.answers)
+        subs = save_batch(batch.answers, results) if batch.save else None
+        return StreamingHttpResponse(
+            result_stream(results, subs), content_type=CONTENT_TYPES["ndjson"]
+        )
 
-        def dist(p):
-            return math.hypot(p.x - x, p.y - y)
 
-        nearest = sorted(list(Politician.objects.all()), key=dist)[:3]
-        ctx = {"submission": sub, "nearest": nearest, "x": x, "y": y}
-        return render(request, "politics/partials/result.html", ctx)
+class MetricsView(View):
+    """Prometheus metrics for all workers; needs METRICS_TOKEN as a bearer
+    token, or a staff session."""
 
     def get(self, request: HttpRequest) -> HttpResponse:
+        token = settings.METRICS_TOKEN
+        header = request.headers.get("Authorization", "")
+        authorized = bool(token) and hmac.compare_digest(header, f"Bearer {token}")
+        if not authorized and not request.user.is_staff:
+            return HttpResponseForbidden("Forbidden")
+        return HttpResponse(
+            metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
+# Async variants, wired up by urls.py when POLITICS_ASYNC_VIEWS is set (the
+# default under SERVER_MODE=asgi). They do not use the async ORM: the catalog,
+# scoring, the nearest lookup and the statistics are served from process
+# memory and only touch the database to rebuild, and the submission insert
+# shares a transaction with its statistics update, which the async ORM cannot
+# do. Each view therefore runs the same synchronous code as its WSGI twin in
+# one sync_to_async thread hop, so ASGI mode buys no database concurrency.
+
+
+def _catalog_state():
+    return catalog_version(), get_catalog()
+
+
+def read_catalog(view):
+    """Read the catalog and its version off the event loop, where they may
+    need the database, and hand them to ``catalog_etag`` and the view on the
+    request."""
+
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        state = await sync_to_async(_catalog_state)()
+        request.catalog_version, request.catalog = state
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async_catalog_page = [read_catalog, *catalog_page]
+
+
+@method_decorator(async_catalog_page, name="get")
+class AsyncIndexView(TemplateView):
+    template_name = IndexView.template_name
+
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        ctx = self.get_context_data(**kwargs)
+        ctx["questions"] = request.catalog
+        return self.render_to_response(ctx)
+
+
+@method_decorator([ensure_csrf_cookie_once, *async_catalog_page], name="get")
+class AsyncTakeView(TemplateView):
+    template_name = TakeView.template_name
+
+    async def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        ctx = self.get_context_data(**kwargs)
+        ctx["questions"] = request.catalog
+        ctx["catalog_version"] = request.catalog_version
+        return self.render_to_response(ctx)
+
+
+class AsyncScoreView(View):
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        ctx = await sync_to_async(_result_context)(_answers(request))
+        return TemplateResponse(request, "politics/partials/result.html", ctx)
+
+    async def get(self, request: HttpRequest) -> HttpResponse:
         return HttpResponseBadRequest("Use POST")
+
+
+@method_decorator(staff_member_required, name="get")
+class AsyncExportView(View):
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        try:
+            options = _export_options(request)
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        return _export_response(aiterate(export_stream(**options)), options)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncBatchScoreView(View):
+    http_method_names = ["post"]
+
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        try:
+            batch = _read_batch(request)
+        except BatchError as exc:
+            return JsonResponse({"error": str(exc)}, status=exc.status)
+        results = await sync_to_async(score_batch)(batch.answers)
+        subs = None
+        if batch.save:
+            subs = await sync_to_async(save_batch)(batch.answers, results)
+        return StreamingHttpResponse(
+            aiterate(result_stream(results, subs)),
+            content_type=CONTENT_TYPES["ndjson"],
+        )
@@ -0,0 +1,222 @@
+"""Optional write-behind for TestSubmission inserts.
+
+With ``POLITICS_WRITE_BEHIND`` enabled, ``save_submission`` appends the
+unsaved instance to a bounded per-process buffer instead of inserting it. A
+background thread writes the buffer with ``bulk_create`` once it holds
+``POLITICS_WRITE_BEHIND_BATCH_SIZE`` rows or ``POLITICS_WRITE_BEHIND_MAX_DELAY``
+seconds have passed, and ``shutdown`` drains it when the worker exits. A
+submission that arrives while the buffer is full or shutting down is refused,
+counted, and inserted directly by ``save_submission``, so every result the
+visitor sees belongs to a submission that is saved or queued.
+
+A batch whose write fails goes back to the head of the buffer and is tried
+again on the next flush, after at least ``max_delay`` seconds. It is counted
+as failed only after ``POLITICS_WRITE_BEHIND_MAX_ATTEMPTS`` failed writes in a
+row, or at once when the database rejects the data itself (``IntegrityError``
+or ``DataError``), since retrying would not help.
+
+Either way the submissions are added to the statistics in ``stats.py`` in the
+same transaction as their insert.
+"""
+
+import atexit
+import collections
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, connection, transaction
+
+from .models import TestSubmission
+from .stats import record_submissions
+from .utils import encode_answers
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionBuffer:
+    def __init__(
+        self,
+        capacity: int,
+        batch_size: int,
+        max_delay: float,
+        max_attempts: int = 3,
+        autostart: bool = True,
+    ):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.autostart = autostart
+        self.enqueued = self.flushed = self.rejected = self.failed = 0
+        self.retried = 0
+        # Failed writes in a row; the flusher waits max_delay while nonzero.
+        self._attempts = 0
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def add(self, submission: TestSubmission) -> bool:
+        """Queue a submission; return False, without queueing it, if the buffer
+        is full or stopping."""
+        with self._cond:
+            if self._stopping or len(self._items) >= self.capacity:
+                self.rejected += 1
+                return False
+            self._items.append(submission)
+            self.enqueued += 1
+            if len(self._items) >= self.batch_size:
+                self._cond.notify()
+        if self.autostart and self._thread is None:
+            self.start()
+        return True
+
+    def flush(self) -> int:
+        """Write everything queued so far; return the number of rows saved."""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._items)
+                self._items.clear()
+            if not batch:
+                return 0
+            try:
+                with transaction.atomic():
+                    TestSubmission.objects.bulk_create(
+                        batch, batch_size=self.batch_size
+                    )
+                    record_submissions(batch)
+            except Exception as exc:
+                self._failed(batch, exc)
+                return 0
+            with self._cond:
+                self.flushed += len(batch)
+                self._attempts = 0
+            return len(batch)
+
+    def _failed(self, batch: List[TestSubmission], exc: Exception) -> None:
+        with self._cond:
+            self._attempts += 1
+            if (
+                isinstance(exc, (IntegrityError, DataError))
+                or self._attempts >= self.max_attempts
+            ):
+                logger.error(
+                    "Gave up writing %d buffered submissions after %d attempts",
+                    len(batch),
+                    self._attempts,
+                    exc_info=exc,
+                )
+                self.failed += len(batch)
+                self._attempts = 0
+                return
+            # Back at the head, oldest first, as far as the capacity allows.
+            keep = batch[: max(0, self.capacity - len(self._items))]
+            for submission in keep:
+                # bulk_create may have set primary keys before the rollback.
+                submission.pk = None
+            self._items.extendleft(reversed(keep))
+            self.retried += len(keep)
+            self.failed += len(batch) - len(keep)
+        logger.warning(
+            "Failed to write %d buffered submissions, will retry",
+            len(batch),
+            exc_info=exc,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "enqueued": self.enqueued,
+                "flushed": self.flushed,
+                "rejected": self.rejected,
+                "retried": self.retried,
+                "failed": self.failed,
+            }
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="submission-write-behind", daemon=True
+            )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flusher thread and write whatever is still queued."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.max_delay + 5)
+        for _ in range(self.max_attempts):
+            self.flush()
+            with self._cond:
+                if not self._items:
+                    return
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping
+                    or (len(self._items) >= self.batch_size and not self._attempts),
+                    timeout=self.max_delay,
+                )
+                stopping = self._stopping
+            try:
+                self.flush()
+            finally:
+                connection.close()
+            if stopping:
+                return
+
+
+_buffer: Optional[SubmissionBuffer] = None
+_buffer_pid: Optional[int] = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> SubmissionBuffer:
+    """Return this process's buffer, creating a fresh one after a fork."""
+    global _buffer, _buffer_pid
+    if _buffer is None or _buffer_pid != os.getpid():
+        with _buffer_lock:
+            if _buffer is None or _buffer_pid != os.getpid():
+                _buffer = SubmissionBuffer(
+                    capacity=settings.POLITICS_WRITE_BEHIND_CAPACITY,
+                    batch_size=settings.POLITICS_WRITE_BEHIND_BATCH_SIZE,
+                    max_delay=settings.POLITICS_WRITE_BEHIND_MAX_DELAY,
+                    max_attempts=settings.POLITICS_WRITE_BEHIND_MAX_ATTEMPTS,
+                )
+                _buffer_pid = os.getpid()
+    return _buffer
+
+
+def save_submission(submission: TestSubmission) -> TestSubmission:
+    """Insert the submission now, or queue it when write-behind is enabled and
+    the buffer takes it."""
+    submission.answers_code = encode_answers(submission.answers)
+    if not (settings.POLITICS_WRITE_BEHIND and get_buffer().add(submission)):
+        _insert(submission)
+    return submission
+
+
+@transaction.atomic
+def _insert(submission: TestSubmission) -> None:
+    submission.save(force_insert=True)
+    record_submissions([submission])
+
+
+def shutdown() -> None:
+    """Drain this process's buffer; safe to call more than once."""
+    if _buffer is not None and _buffer_pid == os.getpid():
+        _buffer.stop()
+
+
+atexit.register(shutdown)
@@ -53,6 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "apps.politics.middleware.MetricsMiddleware",
+    # After the metrics so response sizes are the compressed ones.
+    "apps.politics.middleware.CompressionMiddleware",
+    "apps.politics.middleware.AdmissionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,16 +90,40 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "HOST": env("SQL_HOST"),
-        "PORT": env("SQL_PORT"),
-        "USER": env("SQL_USER"),
-        "PASSWORD": env("SQL_PASSWORD"),
-        "NAME": env("SQL_DATABASE"),
+# DATABASE_URL (e.g. sqlite:///bench.sqlite3 for local benchmarks) takes
+# precedence over the SQL_* variables used by the Docker setups.
+if env("DATABASE_URL", default=None):
+    DATABASES = {"default": env.db("DATABASE_URL")}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "HOST": env("SQL_HOST"),
+            "PORT": env("SQL_PORT"),
+            "USER": env("SQL_USER"),
+            "PASSWORD": env("SQL_PASSWORD"),
+            "NAME": env("SQL_DATABASE"),
+            # Check reused connections before handing them out.
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Bind parameters on the server so psycopg can prepare a query
+                # the SQL_PREPARE_THRESHOLD-th time a connection runs it.
+                "server_side_binding": True,
+                "prepare_threshold": env.int("SQL_PREPARE_THRESHOLD", default=5),
+            },
+        }
     }
-}
+    # SQL_POOL (default) keeps a psycopg_pool per process with up to
+    # SQL_POOL_MAX_SIZE connections; otherwise each thread keeps its connection
+    # for SQL_CONN_MAX_AGE seconds (0 closes it after every request).
+    if env.bool("SQL_POOL", default=True):
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": env.int("SQL_POOL_MIN_SIZE", default=1),
+            "max_size": env.int("SQL_POOL_MAX_SIZE", default=4),
+            "timeout": env.float("SQL_POOL_TIMEOUT", default=10.0),
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = env.int("SQL_CONN_MAX_AGE", default=60)
 
 
 # Password validation
@@ -140,6 +168,14 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Hashed file names plus .gz/.br variants for nginx, see apps/politics/storage.py
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "apps.politics.storage.CompressedManifestStaticFilesStorage"
+    },
+}
+
 MEDIA_URL = "media/"
 
 MEDIA_ROOT = BASE_DIR / "mediafiles"
@@ -148,3 +184,112 @@ MEDIA_ROOT = BASE_DIR / "mediafiles"
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+
+# Cache
+# Defaults to per-process local memory. Version tokens that invalidate the
+# per-process caches are kept in the database and re-read from it every
+# POLITICS_VERSION_TTL seconds, so changes reach every worker either way.
+
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+
+# Politics app
+
+# Seconds a process may keep using a version token (apps/politics/versions.py)
+# before reading it from the database again.
+POLITICS_VERSION_TTL = env.float("POLITICS_VERSION_TTL", default=5.0)
+
+# Serve the async views (see apps/politics/views.py). Defaults to on when
+# gunicorn runs ASGI workers (SERVER_MODE=asgi, see gunicorn.conf.py).
+POLITICS_ASYNC_VIEWS = env.bool(
+    "POLITICS_ASYNC_VIEWS", default=env("SERVER_MODE", default="wsgi") == "asgi"
+)
+
+# Optional cache alias (from CACHES) that holds a shared copy of the question
+# catalog, so a worker with a stale copy can skip the database.
+POLITICS_CATALOG_CACHE = env("POLITICS_CATALOG_CACHE", default=None)
+
+# Release identifier mixed into the quiz pages' ETags so a deploy invalidates
+# them. Defaults to a fingerprint of the politics templates.
+POLITICS_RELEASE = env("POLITICS_RELEASE", default="")
+
+# Grid size (bins per axis) of the submission histogram; run
+# rebuild_submission_stats after changing it.
+POLITICS_HISTOGRAM_BINS = env.int("POLITICS_HISTOGRAM_BINS", default=20)
+
+# Bins per axis behind the percentile ranks on the result page; run
+# rebuild_submission_stats after changing it.
+POLITICS_PERCENTILE_BINS = env.int("POLITICS_PERCENTILE_BINS", default=200)
+
+# Seconds that result pages may reuse the cached submission statistics.
+POLITICS_STATS_TTL = env.int("POLITICS_STATS_TTL", default=60)
+
+# compact_submissions keeps this many days of raw submissions and archives
+# older ones as gzipped NDJSON files in POLITICS_ARCHIVE_DIR.
+POLITICS_RETENTION_DAYS = env.int("POLITICS_RETENTION_DAYS", default=365)
+POLITICS_ARCHIVE_DIR = env("POLITICS_ARCHIVE_DIR", default=str(BASE_DIR / "archive"))
+
+# Bearer token for /metrics (staff users can always read it). Workers share
+# metrics through snapshot files in POLITICS_METRICS_DIR, written at most every
+# POLITICS_METRICS_DUMP_INTERVAL seconds; gunicorn.conf.py sets a default.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+POLITICS_METRICS_DIR = env("POLITICS_METRICS_DIR", default="")
+POLITICS_METRICS_DUMP_INTERVAL = env.float(
+    "POLITICS_METRICS_DUMP_INTERVAL", default=5.0
+)
+
+# Number of closest politicians shown with a result.
+POLITICS_NEAREST_K = env.int("POLITICS_NEAREST_K", default=3)
+
+# Score results memoized per answer pattern in each process (0 disables the
+# memo), and an optional cache alias that shares them between workers.
+POLITICS_RESULT_MEMO_SIZE = env.int("POLITICS_RESULT_MEMO_SIZE", default=10000)
+POLITICS_RESULT_CACHE = env("POLITICS_RESULT_CACHE", default=None)
+
+# The result page counts past test-takers whose answers differ from the new
+# ones in at most POLITICS_SIMILAR_DISTANCE questions (0 turns it off). Each
+# process reads changed answer patterns every POLITICS_SIMILAR_REFRESH seconds
+# (apps/politics/similar.py).
+POLITICS_SIMILAR_DISTANCE = env.int("POLITICS_SIMILAR_DISTANCE", default=2)
+POLITICS_SIMILAR_REFRESH = env.float("POLITICS_SIMILAR_REFRESH", default=10.0)
+
+# Bearer keys accepted by the batch scoring API (apps/politics/batch.py); with
+# none set it turns every request away. A batch holds at most MAX_ITEMS answer
+# sets, and its body at most DATA_UPLOAD_MAX_MEMORY_SIZE bytes.
+POLITICS_API_KEYS = env.list("POLITICS_API_KEYS", default=[])
+POLITICS_API_MAX_ITEMS = env.int("POLITICS_API_MAX_ITEMS", default=1000)
+
+# Admission control for the listed views (apps/politics/admission.py): per
+# process at most MAX_INFLIGHT at once, none that queued longer than
+# MAX_QUEUE_WAIT seconds, and per client RATE requests/second with bursts of
+# BURST. Turned-away requests are told to retry after RETRY_AFTER seconds.
+# 0 disables a limit. The per-client rate is off by default: clients behind one
+# NAT share an address, and so do the load test commands.
+POLITICS_ADMISSION_VIEWS = env.list(
+    "POLITICS_ADMISSION_VIEWS", default=["politics:score"]
+)
+POLITICS_ADMISSION_MAX_INFLIGHT = env.int("POLITICS_ADMISSION_MAX_INFLIGHT", default=16)
+POLITICS_ADMISSION_MAX_QUEUE_WAIT = env.float(
+    "POLITICS_ADMISSION_MAX_QUEUE_WAIT", default=2.0
+)
+POLITICS_ADMISSION_RATE = env.float("POLITICS_ADMISSION_RATE", default=0.0)
+POLITICS_ADMISSION_BURST = env.float("POLITICS_ADMISSION_BURST", default=10.0)
+POLITICS_ADMISSION_RETRY_AFTER = env.int("POLITICS_ADMISSION_RETRY_AFTER", default=5)
+
+# Queue TestSubmission inserts and write them in batches from a background
+# thread instead of inserting on every request (see apps/politics/writebehind.py).
+POLITICS_WRITE_BEHIND = env.bool("POLITICS_WRITE_BEHIND", default=False)
+POLITICS_WRITE_BEHIND_CAPACITY = env.int(
+    "POLITICS_WRITE_BEHIND_CAPACITY", default=10000
+)
+POLITICS_WRITE_BEHIND_BATCH_SIZE = env.int(
+    "POLITICS_WRITE_BEHIND_BATCH_SIZE", default=500
+)
+POLITICS_WRITE_BEHIND_MAX_DELAY = env.float(
+    "POLITICS_WRITE_BEHIND_MAX_DELAY", default=1.0
+)
+# Failed writes of a batch in a row before its submissions are given up on.
+POLITICS_WRITE_BEHIND_MAX_ATTEMPTS = env.int(
+    "POLITICS_WRITE_BEHIND_MAX_ATTEMPTS", default=3
+)
@@ -1,3 +0,0 @@
-#!/usr/bin/env bash
-
-python manage.py createsuperuser --username admin --noinput --email admin@localhost
@@ -11,9 +11,7 @@ then
     echo "PostgreSQL started"
 fi
 
-python manage.py migrate
-sh createadmin.sh
-python setadminpw.py
-python manage.py collectstatic --no-input
+# migrate, create the admin user and collectstatic, each only if needed
+python manage.py boot
 
 exec "$@"
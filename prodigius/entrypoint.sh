@@ -12,10 +12,8 @@ then
 fi
 
 # python manage.py flush --no-input
-python manage.py migrate
-sh createadmin.sh
-python setadminpw.py
-python manage.py collectstatic --no-input
+# migrate, create the admin user and collectstatic, each only if needed
+python manage.py boot
 python manage.py diffsettings --all
 
 exec "$@"
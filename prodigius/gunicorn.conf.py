@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration for prodigius.
+
+Gunicorn loads ./gunicorn.conf.py from the working directory, so this applies
+to the command in docker-compose.prod.yml. Command line flags still win.
+
+SERVER_MODE selects the application:
+    wsgi (default)  config.wsgi:application with sync workers
+    asgi            config.asgi:application with uvicorn workers; Django then
+                    serves the async views (POLITICS_ASYNC_VIEWS)
+The worker count comes from WEB_CONCURRENCY, as usual for gunicorn.
+
+GUNICORN_WARM_START=true loads the application in the master and warms it up
+(apps/politics/startup.py) before forking, so workers share the catalog,
+politician index and compiled templates copy-on-write instead of each
+building them on its first requests. Code changes then need a restart rather
+than a HUP.
+
+Workers share /metrics through snapshot files in POLITICS_METRICS_DIR, which
+is emptied when the master starts.
+"""
+
+import os
+import shutil
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+os.environ.setdefault("POLITICS_METRICS_DIR", "/tmp/prodigius-metrics")
+
+preload_app = os.environ.get("GUNICORN_WARM_START", "").lower() in ("1", "true", "yes")
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+elif SERVER_MODE == "wsgi":
+    wsgi_app = "config.wsgi:application"
+else:
+    raise RuntimeError(f"SERVER_MODE must be 'wsgi' or 'asgi', not {SERVER_MODE!r}")
+
+
+def on_starting(server):
+    # Counters restart with the server, so drop snapshots of older workers.
+    shutil.rmtree(os.environ["POLITICS_METRICS_DIR"], ignore_errors=True)
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app was loaded, before any fork.
+    if preload_app:
+        from apps.politics.startup import warm_up
+
+        server.log.info("Warm start: %s", warm_up())
+
+
+def worker_exit(server, worker):
+    # Write out submissions still queued by the write-behind buffer, then the
+    # final metrics snapshot, and close the connection pool.
+    from django.apps import apps as django_apps
+
+    if django_apps.ready:
+        from apps.politics import metrics
+        from apps.politics.startup import close_pools
+        from apps.politics.writebehind import shutdown
+
+        shutdown()
+        metrics.dump()
+        close_pools()